@@ -0,0 +1,205 @@
+import asyncio
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List
+
+from ..monitoring import Counter, Gauge, Histogram
+
+# Per-worker cap on LLM calls in flight; further calls wait in a bounded queue
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+# Longest a call may wait for a slot before it is rejected with 429
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+# A queued call is promoted one priority class for every this many seconds it waits (0 disables aging)
+LLM_PRIORITY_AGING_SECONDS = float(os.getenv("LLM_PRIORITY_AGING_SECONDS", "5"))
+
+# Priority classes for LLM calls, most urgent first
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_MEMO = "memo"
+PRIORITY_BATCH = "batch"
+PRIORITY_CLASSES: Dict[str, int] = {PRIORITY_INTERACTIVE: 0, PRIORITY_MEMO: 1, PRIORITY_BATCH: 2}
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "agentic_lender_llm_in_flight",
+    "LLM calls currently running",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "agentic_lender_llm_queue_depth",
+    "LLM calls waiting for an admission slot, by priority class",
+    ["priority"],
+)
+ADMISSION_WAIT = Histogram(
+    "agentic_lender_llm_queue_wait_seconds",
+    "Time LLM calls spent waiting for an admission slot",
+    ["endpoint", "priority"],
+)
+LLM_CALL_DURATION = Histogram(
+    "agentic_lender_llm_call_duration_seconds",
+    "Duration of admitted LLM calls",
+    ["endpoint", "priority"],
+)
+ADMISSION_REJECTED = Counter(
+    "agentic_lender_llm_rejected_total",
+    "LLM calls rejected by admission control",
+    ["endpoint", "priority", "reason"],
+)
+
+class AdmissionRejected(Exception):
+    """Raised when an LLM call cannot be admitted; the API turns it into a 429 with Retry-After"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"LLM capacity exhausted ({reason}); retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class _Waiter:
+    __slots__ = ("priority", "rank", "queued_at", "seq", "future")
+
+    def __init__(self, priority: str, seq: int, future: "asyncio.Future[None]"):
+        self.priority = priority
+        self.rank = PRIORITY_CLASSES[priority]
+        self.queued_at = time.perf_counter()
+        self.seq = seq
+        self.future = future
+
+class AdmissionController:
+    """
+    Global concurrency cap for LLM calls with a bounded, priority-ordered wait queue and a wait timeout.
+    Rejecting early when the queue is full keeps latency bounded for admitted calls
+    instead of letting every request slow down together under a burst.
+    Free slots go to the most urgent waiting class first (interactive chat, then on-demand memos,
+    then batch work); a waiter is promoted one class for every LLM_PRIORITY_AGING_SECONDS it has
+    waited, so background work still progresses under sustained interactive load.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float, aging_seconds: float = LLM_PRIORITY_AGING_SECONDS):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.aging_seconds = aging_seconds
+        self.in_flight = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        # Moving average of how long a call holds its slot, used to size Retry-After
+        self._avg_hold_seconds = 1.0
+        self.stats: Dict[str, int] = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+        self.admitted_by_priority: Dict[str, int] = {priority: 0 for priority in PRIORITY_CLASSES}
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        backlog = self.waiting + self.in_flight
+        return max(1, math.ceil(self._avg_hold_seconds * backlog / self.max_in_flight))
+
+    def _reject(self, reason: str, endpoint: str, priority: str) -> AdmissionRejected:
+        self.stats[f"rejected_{reason}"] += 1
+        ADMISSION_REJECTED.inc(endpoint=endpoint, priority=priority, reason=reason)
+        return AdmissionRejected(reason, self.retry_after())
+
+    def _update_queue_depth(self):
+        for priority in PRIORITY_CLASSES:
+            ADMISSION_QUEUE_DEPTH.set(sum(1 for waiter in self._waiters if waiter.priority == priority), priority=priority)
+
+    def _effective_rank(self, waiter: _Waiter, now: float) -> float:
+        if self.aging_seconds <= 0:
+            return waiter.rank
+        return waiter.rank - (now - waiter.queued_at) / self.aging_seconds
+
+    def _release(self):
+        """Hand the freed slot straight to the most urgent waiter, or return it to the pool"""
+        now = time.perf_counter()
+        while self._waiters:
+            waiter = min(self._waiters, key=lambda item: (self._effective_rank(item, now), item.seq))
+            self._waiters.remove(waiter)
+            if not waiter.future.done():
+                waiter.future.set_result(None)
+                self._update_queue_depth()
+                return
+        self._update_queue_depth()
+        self.in_flight -= 1
+
+    def try_reserve(self) -> bool:
+        """Take a slot only if one is free right now and nobody is queued (used for hedged calls)"""
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            ADMISSION_IN_FLIGHT.set(self.in_flight)
+            return True
+        return False
+
+    def release(self):
+        """Return a slot taken with try_reserve()"""
+        self._release()
+        ADMISSION_IN_FLIGHT.set(self.in_flight)
+
+    async def _acquire(self, endpoint: str, priority: str):
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+        if self.waiting >= self.max_queue:
+            raise self._reject("queue_full", endpoint, priority)
+        self.stats["queued"] += 1
+        waiter = _Waiter(priority, next(self._seq), asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._update_queue_depth()
+        try:
+            # shield() keeps a timeout from cancelling a slot that was handed over at the same moment
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done():
+                # The slot was granted as we gave up; pass it on instead of leaking it
+                self._release()
+            else:
+                waiter.future.cancel()
+                self._waiters.remove(waiter)
+                self._update_queue_depth()
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject("timeout", endpoint, priority) from None
+            raise
+        # A handed-over slot keeps in_flight unchanged: the releasing call's slot becomes ours
+
+    @asynccontextmanager
+    async def admit(self, endpoint: str = "background", priority: str = PRIORITY_MEMO) -> AsyncIterator[None]:
+        """Hold an LLM slot for the duration of the block, waiting in the priority queue if needed"""
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown LLM priority class '{priority}'")
+        queued_at = time.perf_counter()
+        await self._acquire(endpoint, priority)
+        ADMISSION_WAIT.observe(time.perf_counter() - queued_at, endpoint=endpoint, priority=priority)
+
+        self.stats["admitted"] += 1
+        self.admitted_by_priority[priority] += 1
+        ADMISSION_IN_FLIGHT.set(self.in_flight)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            LLM_CALL_DURATION.observe(elapsed, endpoint=endpoint, priority=priority)
+            self._avg_hold_seconds = 0.8 * self._avg_hold_seconds + 0.2 * elapsed
+            self._release()
+            ADMISSION_IN_FLIGHT.set(self.in_flight)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "priority_aging_seconds": self.aging_seconds,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "queue_depth_by_priority": {
+                priority: sum(1 for waiter in self._waiters if waiter.priority == priority) for priority in PRIORITY_CLASSES
+            },
+            "admitted_by_priority": dict(self.admitted_by_priority),
+            "avg_call_seconds": round(self._avg_hold_seconds, 3),
+            "retry_after_seconds": self.retry_after(),
+            **self.stats,
+        }
+
+llm_admission = AdmissionController(LLM_MAX_IN_FLIGHT, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT_SECONDS)
@@ -0,0 +1,242 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .fake_agent import FakeRunResponse
+from ..monitoring import Counter, current_endpoint, extract_token_usage, get_agent_model_id
+
+# "record" saves every agent exchange to the cassette while calling the configured backend;
+# "replay" serves recorded exchanges instead of calling any provider; "" (default) is off
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "").lower()
+# JSON Lines file of recorded exchanges; record mode appends, so delete it to re-record from scratch
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "cassettes/llm_exchanges.jsonl")
+# Replayed latency = recorded latency x scale (1 keeps the original timing, 0 answers at once)
+LLM_CASSETTE_LATENCY_SCALE = float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1"))
+# How replay picks an exchange: "prompt" (default) matches agent and prompt, falling back to the
+# agent's exchanges in recorded order when the prompt was never recorded (e.g. random mock data);
+# "strict" fails on an unrecorded prompt; "sequence" ignores prompts and replays in recorded order
+LLM_CASSETTE_MATCH = os.getenv("LLM_CASSETTE_MATCH", "prompt").lower()
+
+CASSETTE_CALLS = Counter(
+    "agentic_lender_llm_cassette_calls_total",
+    "Agent calls recorded to or replayed from the LLM cassette, by result",
+    ["agent", "result"],
+)
+
+class CassetteMissError(LookupError):
+    """Replay found no recorded exchange for a call (LLM_CASSETTE_MATCH=strict or an empty cassette)"""
+
+class ReplayedModelError(Exception):
+    """Provider error replayed from the cassette; keeps the recorded status code for the retry policy"""
+
+    def __init__(self, status_code: Optional[int], message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+_replayed_error_types: Dict[str, type] = {}
+
+def _replayed_error(error: Dict[str, Any]) -> Exception:
+    # Same class name as the recorded error, so name-based checks (e.g. APIConnectionError) still apply
+    name = error.get("type") or "ReplayedModelError"
+    error_type = _replayed_error_types.get(name)
+    if error_type is None:
+        error_type = _replayed_error_types[name] = type(name, (ReplayedModelError,), {})
+    return error_type(error.get("status_code"), error.get("message", ""))
+
+def exchange_key(agent_name: str, prompt: str) -> str:
+    return hashlib.sha256(f"{agent_name}\0{prompt}".encode("utf-8")).hexdigest()[:32]
+
+class Cassette:
+    """
+    Recorded agent exchanges, one JSON object per line: agent, model, route, prompt, response
+    content or error, token usage and latency. Replay indexes them by (agent, prompt) and by agent
+    in recorded order; repeated prompts cycle through their recorded responses.
+    """
+
+    def __init__(self, path: str = LLM_CASSETTE_PATH, mode: str = LLM_CASSETTE_MODE, match: str = LLM_CASSETTE_MATCH):
+        self.path = path
+        self.mode = mode
+        self.match = match
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._by_key: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._by_agent: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._cursors: Dict[Any, int] = defaultdict(int)
+        self._results: Dict[str, int] = defaultdict(int)
+        # Exchanges per agent, loaded for replay or written while recording
+        self._exchanges: Dict[str, int] = defaultdict(int)
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            print(f"LLM cassette {self.path} not found; every replayed call will miss")
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._by_key[entry["key"]].append(entry)
+                self._by_agent[entry["agent"]].append(entry)
+                self._exchanges[entry["agent"]] += 1
+        print(f"Loaded {sum(self._exchanges.values())} LLM exchanges from {self.path}")
+
+    def record(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._results["recorded"] += 1
+            self._exchanges[entry["agent"]] += 1
+        CASSETTE_CALLS.inc(agent=entry["agent"], result="recorded")
+
+    def lookup(self, agent_name: str, prompt: str) -> Dict[str, Any]:
+        """Recorded exchange to replay for a call"""
+        with self._lock:
+            self._load()
+            candidates: List[Dict[str, Any]] = []
+            result = "sequence"
+            cursor_key: Any = agent_name
+            if self.match != "sequence":
+                key = exchange_key(agent_name, prompt)
+                candidates = self._by_key.get(key) or []
+                result, cursor_key = "hit", key
+            if not candidates and self.match != "strict":
+                candidates = self._by_agent.get(agent_name) or []
+                result, cursor_key = ("sequence" if self.match == "sequence" else "fallback"), agent_name
+            if not candidates:
+                result = "miss"
+            self._results[result] += 1
+            if candidates:
+                entry = candidates[self._cursors[cursor_key] % len(candidates)]
+                self._cursors[cursor_key] += 1
+        CASSETTE_CALLS.inc(agent=agent_name, result=result)
+        if not candidates:
+            raise CassetteMissError(f"No recorded LLM exchange for agent '{agent_name}' in {self.path}")
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "path": self.path,
+                "match": self.match,
+                "latency_scale": LLM_CASSETTE_LATENCY_SCALE,
+                "exchanges": dict(self._exchanges),
+                "calls": dict(self._results),
+            }
+
+class RecordingAgent:
+    """Wraps a backend agent and appends each call's prompt, response, token usage and latency to the cassette"""
+
+    def __init__(self, agent: Any, cassette: Cassette):
+        self.agent = agent
+        self.cassette = cassette
+        self.name = agent.name
+        self.model_id = get_agent_model_id(agent)
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self.__dict__["agent"], attribute)
+
+    def _entry(self, prompt: str, latency: float) -> Dict[str, Any]:
+        return {
+            "key": exchange_key(self.name, prompt),
+            "agent": self.name,
+            "model": self.model_id,
+            "endpoint": current_endpoint(),
+            "recorded_at": datetime.now().isoformat(),
+            "latency_s": round(latency, 4),
+            "prompt_chars": len(prompt),
+            "prompt": prompt,
+        }
+
+    def _record_error(self, prompt: str, started: float, error: Exception):
+        entry = self._entry(prompt, time.perf_counter() - started)
+        entry["error"] = {
+            "type": type(error).__name__,
+            "status_code": getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None),
+            "message": str(error),
+        }
+        self.cassette.record(entry)
+
+    def _record_response(self, prompt: str, started: float, response: Any):
+        entry = self._entry(prompt, time.perf_counter() - started)
+        content = getattr(response, "content", None)
+        entry["content"] = content if isinstance(content, str) else str(content or "")
+        entry["content_chars"] = len(entry["content"])
+        entry["usage"] = extract_token_usage(response)
+        self.cassette.record(entry)
+
+    async def arun(self, prompt: str, stream: bool = False, **kwargs: Any) -> Any:
+        if stream:
+            raise NotImplementedError("Streaming calls are not recorded")
+        started = time.perf_counter()
+        try:
+            response = await self.agent.arun(prompt, **kwargs)
+        # Calls cancelled by a timeout or a lost hedge race (CancelledError) are not recorded
+        except Exception as e:
+            self._record_error(prompt, started, e)
+            raise
+        self._record_response(prompt, started, response)
+        return response
+
+    def run(self, prompt: str, stream: bool = False, **kwargs: Any) -> Any:
+        if stream:
+            raise NotImplementedError("Streaming calls are not recorded")
+        started = time.perf_counter()
+        try:
+            response = self.agent.run(prompt, **kwargs)
+        except Exception as e:
+            self._record_error(prompt, started, e)
+            raise
+        self._record_response(prompt, started, response)
+        return response
+
+class ReplayAgent:
+    """Serves recorded exchanges with their recorded (or scaled) latency; no provider is called"""
+
+    def __init__(self, name: str, model_id: str, cassette: Cassette):
+        self.name = name
+        self.model_id = f"replay:{model_id}"
+        self.cassette = cassette
+
+    def _response(self, entry: Dict[str, Any]) -> FakeRunResponse:
+        if "error" in entry:
+            raise _replayed_error(entry["error"])
+        usage = entry.get("usage") or {}
+        response = FakeRunResponse(
+            entry.get("content", ""),
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+            model=self.model_id,
+        )
+        response.metrics["cache_read_tokens"] = [usage.get("cache_read_tokens", 0)]
+        response.metrics["cache_write_tokens"] = [usage.get("cache_write_tokens", 0)]
+        return response
+
+    async def arun(self, prompt: str, stream: bool = False, **_: Any) -> Any:
+        if stream:
+            raise NotImplementedError("Streaming calls are not replayed")
+        entry = self.cassette.lookup(self.name, prompt)
+        await asyncio.sleep(entry.get("latency_s", 0.0) * LLM_CASSETTE_LATENCY_SCALE)
+        return self._response(entry)
+
+    def run(self, prompt: str, stream: bool = False, **_: Any) -> Any:
+        if stream:
+            raise NotImplementedError("Streaming calls are not replayed")
+        entry = self.cassette.lookup(self.name, prompt)
+        time.sleep(entry.get("latency_s", 0.0) * LLM_CASSETTE_LATENCY_SCALE)
+        return self._response(entry)
+
+llm_cassette = Cassette()
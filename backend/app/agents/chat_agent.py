@@ -1,11 +1,10 @@
-from agno.agent import Agent
-from agno.models.anthropic import Claude
+from .model_backend import create_agent
 
 # Fast Chat Agent for Quick Responses
-fast_chat_agent = Agent(
+fast_chat_agent = create_agent(
     name="Quick Chat Assistant",
     role="Provides fast, helpful conversational responses about lending",
-    model=Claude(id="claude-3-5-sonnet-20241022"),
+    tier="fast",
     instructions=[
         "You are a quick chat assistant for lending. Keep responses to 1-3 sentences maximum.",
         "Be friendly, acknowledge requests briefly, and direct users to the summary section for details.",
@@ -0,0 +1,278 @@
+import asyncio
+import math
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Offline stand-in for agno agents, used when LLM_BACKEND=fake.
+# Latency specs: "fixed:0.4", "uniform:0.2,1.5", "normal:0.8,0.2", "lognormal:-0.5,0.6", "exponential:0.7"
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+FAKE_LLM_LATENCY = os.getenv("FAKE_LLM_LATENCY", "fixed:0.05")
+FAKE_LLM_CHAT_LATENCY = os.getenv("FAKE_LLM_CHAT_LATENCY", "")
+FAKE_LLM_MEMO_LATENCY = os.getenv("FAKE_LLM_MEMO_LATENCY", "")
+# Output streaming speed; 0 disables the per-token delay
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "0"))
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_STREAM_CHUNK_TOKENS = int(os.getenv("FAKE_LLM_STREAM_CHUNK_TOKENS", "16"))
+
+# Errors injected with FAKE_LLM_ERROR_RATE, mirroring the provider failures we see in production
+INJECTED_ERRORS = [
+    (429, "rate_limit_error: Number of request tokens has exceeded your per-minute rate limit"),
+    (529, "overloaded_error: Overloaded"),
+    (500, "api_error: Internal server error"),
+]
+
+CHAT_RESPONSES = [
+    "Got it! Check the summary for analysis.",
+    "I can help! What aspect interests you?",
+    "Thanks, I've noted that. Anything else on the borrower or collateral?",
+    "Understood. The summary section will reflect the latest details.",
+]
+
+MEMO_SECTIONS = [
+    "Executive Summary",
+    "Credit Summary",
+    "Client Background",
+    "Collateral Analysis",
+    "Pricing & Fees",
+    "Conditions & Covenants",
+    "Risk Assessment",
+    "Recommendation",
+]
+
+CARD_STYLE = "background: white; border-radius: 12px; padding: 24px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); margin-bottom: 24px;"
+HEADER_STYLE = "margin: 0 0 16px 0; color: #1e293b; font-size: 18px; font-weight: 600;"
+CELL_STYLE = "padding: 8px 12px; border-bottom: 1px solid #e2e8f0; color: #475569; font-size: 14px;"
+LABEL_STYLE = "padding: 8px 12px; border-bottom: 1px solid #e2e8f0; color: #1e293b; font-size: 14px; font-weight: 600;"
+
+class FakeModelError(Exception):
+    """Provider-style error raised by the fake backend's error injection"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+class FakeRunResponse:
+    """Minimal stand-in for agno's run response"""
+
+    def __init__(self, content: str, input_tokens: int = 0, output_tokens: int = 0, model: str = "fake"):
+        self.content = content
+        self.model = model
+        self.metrics: Dict[str, List[int]] = {
+            "input_tokens": [input_tokens],
+            "output_tokens": [output_tokens],
+            "cache_read_tokens": [0],
+            "cache_write_tokens": [0],
+        }
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)"""
+    return max(1, len(text) // 4)
+
+def parse_latency_spec(spec: str) -> Callable[[random.Random], float]:
+    """Turn a latency spec such as 'lognormal:-0.5,0.6' into a sampler returning seconds"""
+    kind, _, raw_args = spec.partition(":")
+    args = [float(value) for value in raw_args.split(",") if value.strip()]
+    kind = kind.strip().lower()
+    if kind == "fixed":
+        return lambda rng: args[0] if args else 0.0
+    if kind == "uniform":
+        return lambda rng: rng.uniform(args[0], args[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(args[0], args[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(args[0], args[1])
+    if kind == "exponential":
+        return lambda rng: rng.expovariate(1 / args[0]) if args[0] > 0 else 0.0
+    raise ValueError(f"Unknown latency distribution '{spec}'")
+
+# Labels of the compact credit file encoding (services/prompt_encoder.py), mapped to the labels of the
+# verbose text block, so both prompt formats render the same memo rows
+COMPACT_LABELS: Dict[str, Dict[str, str]] = {
+    "BORROWER": {
+        "name": "Name",
+        "credit score": "Credit Score",
+        "income": "Annual Income",
+        "DTI": "Debt-to-Income Ratio",
+        "employment": "Employment",
+        "assets": "Assets",
+        "liabilities": "Liabilities",
+    },
+    "COLLATERAL": {
+        "type": "Property Type",
+        "value": "Property Value",
+        "LTV": "LTV Ratio",
+        "appraised": "Appraisal Date",
+        "address": "Address",
+    },
+    "PRICING": {
+        "rate": "Interest Rate",
+        "term months": "Loan Term",
+        "payment": "Monthly Payment",
+        "origination fee": "Origination Fee",
+        "processing fee": "Processing Fee",
+        "total fees": "Total Fees",
+    },
+    "LOAN": {
+        "amount": "Loan Amount",
+        "purpose": "Loan Purpose",
+        "status": "Status",
+        "risk rating": "Risk Rating",
+    },
+    "DATES": {"created": "Created", "updated": "Updated"},
+}
+MISSING_VALUE = "Not provided"
+
+def _compact_rows(data_block: str) -> List[Tuple[str, str]]:
+    lines = dict(re.findall(r"^([A-Z]+): (.*)$", data_block, re.MULTILINE))
+    values: Dict[str, str] = {}
+    for section, labels in COMPACT_LABELS.items():
+        # Longest label first, so "term months" is not read as a shorter label
+        known = sorted(labels, key=len, reverse=True)
+        for part in (lines.get(section) or "").split("; "):
+            label = next((label for label in known if part.startswith(label + " ")), None)
+            if label is not None:
+                values[labels[label]] = part[len(label) + 1:]
+    for entry in (lines.get("MISSING") or "").split(", "):
+        section, _, label = entry.partition(" ")
+        name = COMPACT_LABELS.get(section.upper(), {}).get(label)
+        if name is not None:
+            values[name] = MISSING_VALUE
+    return [(name, values[name]) for labels in COMPACT_LABELS.values() for name in labels.values() if name in values]
+
+def _memo_rows(prompt: str) -> List[Tuple[str, str]]:
+    """(label, value) rows of the credit file in a memo prompt, in either prompt format"""
+    # Only the credit data block holds facts; the rest of the prompt is formatting instructions
+    compact_match = re.search(r"^CREDIT FILE .*?^DATES: [^\n]*(?:\nMISSING: [^\n]*)?", prompt, re.DOTALL | re.MULTILINE)
+    if compact_match:
+        return _compact_rows(compact_match.group(0))
+    data_match = re.search(r"CREDIT REQUEST DETAILS.*?- Updated: [^\n]*", prompt, re.DOTALL)
+    data_block = data_match.group(0) if data_match else ""
+    return re.findall(r"^\s*- ([A-Za-z][\w &/-]{1,40}): (.+)$", data_block, re.MULTILINE)
+
+def _render_memo(prompt: str) -> str:
+    """Templated HTML memo built from the credit data in the prompt (compact or verbose format)"""
+    request_match = re.search(r"US-\d{6}-\d{4}", prompt)
+    request_id = request_match.group(0) if request_match else "N/A"
+    rows = _memo_rows(prompt)[:40]
+    per_section = max(1, math.ceil(len(rows) / len(MEMO_SECTIONS))) if rows else 0
+
+    cards = []
+    for index, section in enumerate(MEMO_SECTIONS):
+        section_rows = rows[index * per_section:(index + 1) * per_section] if per_section else []
+        table_rows = "".join(
+            f'<tr><td style="{LABEL_STYLE}">{label}</td><td style="{CELL_STYLE}">{value}</td></tr>'
+            for label, value in section_rows
+        ) or f'<tr><td style="{CELL_STYLE}">No data provided</td></tr>'
+        cards.append(
+            f'<div style="{CARD_STYLE}"><h3 style="{HEADER_STYLE}">{section}</h3>'
+            f'<table style="width: 100%; border-collapse: collapse;">{table_rows}</table></div>'
+        )
+    return (
+        "<div style=\"font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: #f8fafc; padding: 24px;\">"
+        '<div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 24px; '
+        'border-radius: 12px; margin-bottom: 24px;">'
+        f'<h2 style="margin: 0; font-size: 24px; font-weight: 600;">Credit Memo {request_id}</h2></div>'
+        + "".join(cards)
+        + "</div>"
+    )
+
+class FakeAgent:
+    """
+    Deterministic agent replacement with configurable latency, streaming speed and error injection.
+    Mirrors the parts of agno's Agent API the app uses: name, run() and arun(), both with stream=True.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        role: str = "",
+        instructions: Optional[List[str]] = None,
+        response_kind: str = "chat",
+        model_id: str = "fake",
+        latency: Optional[str] = None,
+        tokens_per_second: float = FAKE_LLM_TOKENS_PER_SECOND,
+        error_rate: float = FAKE_LLM_ERROR_RATE,
+        seed: int = FAKE_LLM_SEED,
+        **_: Any,
+    ):
+        self.name = name
+        self.role = role
+        self.instructions = instructions or []
+        self.response_kind = response_kind
+        self.model_id = model_id
+        default_latency = FAKE_LLM_MEMO_LATENCY if response_kind == "memo" else FAKE_LLM_CHAT_LATENCY
+        self._sample_latency = parse_latency_spec(latency or default_latency or FAKE_LLM_LATENCY)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self._rng = random.Random(f"{seed}:{name}")
+        self._rng_lock = threading.Lock()
+
+    def _plan(self, prompt: str) -> Dict[str, Any]:
+        """Draw latency, error and response content for one call"""
+        with self._rng_lock:
+            latency = self._sample_latency(self._rng)
+            error = self._rng.choice(INJECTED_ERRORS) if self._rng.random() < self.error_rate else None
+            chat_reply = self._rng.choice(CHAT_RESPONSES)
+        content = _render_memo(prompt) if self.response_kind == "memo" else chat_reply
+        output_tokens = estimate_tokens(content)
+        generation_time = output_tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        return {
+            "latency": latency,
+            "error": error,
+            "content": content,
+            "input_tokens": estimate_tokens(prompt),
+            "output_tokens": output_tokens,
+            "generation_time": generation_time,
+        }
+
+    def _chunks(self, content: str) -> List[str]:
+        size = max(1, FAKE_LLM_STREAM_CHUNK_TOKENS) * 4
+        return [content[start:start + size] for start in range(0, len(content), size)]
+
+    def _response(self, plan: Dict[str, Any], content: Optional[str] = None) -> FakeRunResponse:
+        return FakeRunResponse(
+            plan["content"] if content is None else content,
+            input_tokens=plan["input_tokens"],
+            output_tokens=plan["output_tokens"],
+            model=self.model_id,
+        )
+
+    def run(self, prompt: str, stream: bool = False, **_: Any) -> Any:
+        plan = self._plan(prompt)
+        if stream:
+            return self._run_stream(plan)
+        time.sleep(plan["latency"] + plan["generation_time"])
+        if plan["error"]:
+            raise FakeModelError(*plan["error"])
+        return self._response(plan)
+
+    def _run_stream(self, plan: Dict[str, Any]) -> Iterator[FakeRunResponse]:
+        time.sleep(plan["latency"])
+        if plan["error"]:
+            raise FakeModelError(*plan["error"])
+        chunks = self._chunks(plan["content"])
+        for chunk in chunks:
+            time.sleep(plan["generation_time"] / len(chunks))
+            yield self._response(plan, chunk)
+
+    async def arun(self, prompt: str, stream: bool = False, **_: Any) -> Any:
+        plan = self._plan(prompt)
+        if stream:
+            return self._arun_stream(plan)
+        await asyncio.sleep(plan["latency"] + plan["generation_time"])
+        if plan["error"]:
+            raise FakeModelError(*plan["error"])
+        return self._response(plan)
+
+    async def _arun_stream(self, plan: Dict[str, Any]) -> AsyncIterator[FakeRunResponse]:
+        await asyncio.sleep(plan["latency"])
+        if plan["error"]:
+            raise FakeModelError(*plan["error"])
+        chunks = self._chunks(plan["content"])
+        for chunk in chunks:
+            await asyncio.sleep(plan["generation_time"] / len(chunks))
+            yield self._response(plan, chunk)
@@ -0,0 +1,153 @@
+import os
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..memory import get_session_memo
+
+# Set to "false" to send every chat message to the quick chat agent
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() != "false"
+
+# Longest message (in words, request IDs excluded) still treated as a plain acknowledgement request
+MAX_ACK_WORDS = 12
+
+GREETING_PATTERN = re.compile(
+    r"^(?:hi|hello|hey|hiya|howdy|greetings|good (?:morning|afternoon|evening)|yo)"
+    r"(?:\s+(?:there|team|all|everyone|again))?[\s!.,:)]*$"
+)
+THANKS_PATTERN = re.compile(
+    r"^(?:(?:ok(?:ay)?|great|perfect|awesome|cool|got it|nice)[\s,!.]*)?"
+    r"(?:thanks?(?: you)?(?: so much| very much| a lot)?|thx|ty|much appreciated|appreciate it|cheers)"
+    r"(?:[\s,!.]+(?:again|a lot|so much))?[\s!.,:)]*$"
+)
+# Whole-message status questions only; anything asking about the memo's content goes to the agent
+MEMO_DOCUMENT = r"(?:my|the) (?:credit )?(?:memo|summary|report)"
+MEMO_STATUS_PATTERN = re.compile(
+    r"^(?:"
+    rf"where(?:'s| is) {MEMO_DOCUMENT}"
+    rf"|is {MEMO_DOCUMENT} (?:ready|done|finished|available)"
+    rf"|has {MEMO_DOCUMENT} been (?:generated|created|made|finished)"
+    rf"|when (?:will|is) {MEMO_DOCUMENT}(?: going to)? be (?:ready|done)"
+    rf"|(?:what(?:'s| is) the )?status of {MEMO_DOCUMENT}"
+    rf"|did you (?:make|generate|create|finish) {MEMO_DOCUMENT}"
+    r")(?: yet)?[\s?!.]*$"
+)
+
+RESPONSE_TEMPLATES: Dict[str, List[str]] = {
+    "greeting": [
+        "Hi! Share a credit request ID (format US-XXXXXX-YYYY) or tell me about the borrower and I'll start the memo.",
+        "Hello! Pick a credit request above or give me its ID and I'll pull up the file for you.",
+    ],
+    "thanks": [
+        "You're welcome! Let me know if there's anything else you need on this file.",
+        "Happy to help! The summary section has the latest memo whenever you need it.",
+    ],
+    "request_id_ack": [
+        "Got it! I've pulled up credit request {request_id}. Check the summary section for the full analysis.",
+        "On it! Credit request {request_id} is loaded and the memo is in the summary section.",
+    ],
+    "request_id_incomplete": [
+        "Got it! Credit request {request_id} is missing key information, so I've put a checklist of what's needed in the summary section.",
+    ],
+    "request_ids_ack": [
+        "Got it! I've pulled up credit requests {request_id}. Their memos are side by side in the summary section.",
+        "On it! Credit requests {request_id} are loaded and their memos are in the summary section.",
+    ],
+    "request_ids_incomplete": [
+        "Got it! I've pulled up credit requests {request_id}. Some files are missing key information, so the summary section has a checklist for those.",
+    ],
+    "memo_ready": [
+        "Your memo for {request_id} is ready in the summary section on the right.",
+    ],
+    "memo_unavailable": [
+        "The memo for {request_id} is no longer in this chat. Send the credit request ID again and I'll regenerate it.",
+    ],
+    "memo_missing": [
+        "There's no memo for this chat yet. Share a credit request ID (format US-XXXXXX-YYYY) and I'll generate one.",
+    ],
+}
+
+# Per-intent routing counters; "llm" counts messages that fell through to the agent
+intent_router_stats: Dict[str, int] = {
+    "greeting": 0,
+    "thanks": 0,
+    "request_id_ack": 0,
+    "memo_status": 0,
+    "llm": 0,
+}
+
+def _normalize(message: str, request_ids: Sequence[str]) -> str:
+    text = message.lower().strip()
+    for request_id in request_ids:
+        text = text.replace(request_id.lower(), " ")
+    return re.sub(r"\s+", " ", text).strip()
+
+def classify_intent(message: str, request_ids: Sequence[str] = ()) -> str:
+    """Classify a chat message into one of the locally answerable intents, or 'open_ended'"""
+    text = _normalize(message, request_ids)
+    if request_ids:
+        # Plain "here's an ID" messages only need an acknowledgement; questions go to the LLM
+        if "?" not in text and len(text.split()) <= MAX_ACK_WORDS:
+            return "request_id_ack"
+        return "open_ended"
+    if GREETING_PATTERN.match(text):
+        return "greeting"
+    if THANKS_PATTERN.match(text):
+        return "thanks"
+    if MEMO_STATUS_PATTERN.match(text):
+        return "memo_status"
+    return "open_ended"
+
+def _pick(template_key: str, message: str, **values: Any) -> str:
+    """Deterministically pick a template variant so replies vary across messages but are reproducible"""
+    variants = RESPONSE_TEMPLATES[template_key]
+    variant = variants[zlib.crc32(message.encode("utf-8")) % len(variants)]
+    return variant.format(**values)
+
+def route_chat_message(
+    message: str,
+    session: Dict[str, Any],
+    request_ids: Sequence[str] = (),
+    memo_ready: bool = True,
+) -> Tuple[str, Optional[str]]:
+    """
+    Route a chat message to a local template or to the quick chat agent.
+    `request_ids` are the credit requests the message mentions; `memo_ready` is False when
+    any of their files is too incomplete for a memo.
+    Returns (intent, reply); reply is None when the message needs the LLM.
+    """
+    intent = classify_intent(message, request_ids) if INTENT_ROUTER_ENABLED else "open_ended"
+
+    reply: Optional[str] = None
+    if intent == "greeting" or intent == "thanks":
+        reply = _pick(intent, message)
+    elif intent == "request_id_ack":
+        template_key = "request_id" if len(request_ids) == 1 else "request_ids"
+        template_key += "_ack" if memo_ready else "_incomplete"
+        reply = _pick(template_key, message, request_id=", ".join(request_ids))
+    elif intent == "memo_status":
+        summary_data = session.get("summaryData") or {}
+        memo_request_ids = summary_data.get("creditRequestIds") or [summary_data.get("creditRequestId")]
+        memo_request_id = ", ".join(request_id for request_id in memo_request_ids if request_id)
+        if memo_request_id and get_session_memo(session):
+            reply = _pick("memo_ready", message, request_id=memo_request_id)
+        elif session.get("selectedRequestId"):
+            # General chat turns replace summaryData, so the memo named here may be gone from the session
+            reply = _pick("memo_unavailable", message, request_id=session["selectedRequestId"])
+        else:
+            reply = _pick("memo_missing", message)
+
+    intent_router_stats["llm" if reply is None else intent] += 1
+    return intent, reply
+
+def get_intent_router_stats() -> Dict[str, Any]:
+    """Routing counters with the share of messages answered without an LLM call"""
+    total = sum(intent_router_stats.values())
+    local_hits = total - intent_router_stats["llm"]
+    return {
+        "enabled": INTENT_ROUTER_ENABLED,
+        "total_messages": total,
+        "local_hits": local_hits,
+        "hit_rate": round(local_hits / total, 4) if total else 0.0,
+        "by_intent": dict(intent_router_stats),
+    }
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .model_tiers import resolve_model_id
+
+# "anthropic" (default) calls Claude through agno; "fake" uses the offline FakeAgent for load testing
+LLM_BACKEND = os.getenv("LLM_BACKEND", "anthropic").lower()
+# Fake-backend latency for fast-tier models, so SLO fallback can be exercised offline
+FAKE_LLM_FAST_LATENCY = os.getenv("FAKE_LLM_FAST_LATENCY", "")
+# "lazy" (default) builds each agent, and imports agno/anthropic, on its first call;
+# "background" builds the default agents in a thread once the app has started
+LLM_AGENT_PRELOAD = os.getenv("LLM_AGENT_PRELOAD", "lazy").lower()
+
+# Construction arguments per agent name, so the same agent can be rebuilt on another model tier
+AGENT_SPECS: Dict[str, Dict[str, Any]] = {}
+_agent_variants: Dict[Tuple[str, str], Any] = {}
+_build_seconds: Dict[Tuple[str, str], float] = {}
+_build_lock = threading.Lock()
+
+class LazyAgent:
+    """
+    Registered agent whose model-backed instance is built on first use.
+    `name` is available without building; any other attribute builds the agent on its default tier.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attribute: str) -> Any:
+        spec = AGENT_SPECS[self.__dict__["name"]]
+        return getattr(get_agent_variant(self, spec["tier"]), attribute)
+
+    def __repr__(self) -> str:
+        return f"LazyAgent({self.name!r})"
+
+def _build_agent(spec: Dict[str, Any], model_id: str, tier: Optional[str]) -> Any:
+    from .cassette import LLM_CASSETTE_MODE, RecordingAgent, ReplayAgent, llm_cassette
+
+    if LLM_CASSETTE_MODE == "replay":
+        return ReplayAgent(spec["name"], model_id, llm_cassette)
+    if LLM_CASSETTE_MODE not in ("", "record"):
+        raise ValueError(f"Unknown LLM_CASSETTE_MODE '{LLM_CASSETTE_MODE}' (expected 'record' or 'replay')")
+    agent = _build_backend_agent(spec, model_id, tier)
+    return RecordingAgent(agent, llm_cassette) if LLM_CASSETTE_MODE == "record" else agent
+
+def _build_backend_agent(spec: Dict[str, Any], model_id: str, tier: Optional[str]) -> Any:
+    if LLM_BACKEND == "fake":
+        from .fake_agent import FakeAgent
+
+        return FakeAgent(
+            name=spec["name"],
+            role=spec["role"],
+            instructions=spec["instructions"],
+            response_kind=spec["response_kind"],
+            model_id=f"fake:{model_id}",
+            latency=FAKE_LLM_FAST_LATENCY if tier == "fast" and FAKE_LLM_FAST_LATENCY else None,
+        )
+    if LLM_BACKEND != "anthropic":
+        raise ValueError(f"Unknown LLM_BACKEND '{LLM_BACKEND}' (expected 'anthropic' or 'fake')")
+
+    from agno.agent import Agent
+    from agno.models.anthropic import Claude
+
+    return Agent(
+        name=spec["name"],
+        role=spec["role"],
+        model=Claude(id=model_id),
+        instructions=spec["instructions"],
+        markdown=spec["markdown"],
+    )
+
+def create_agent(
+    name: str,
+    role: str,
+    instructions: List[str],
+    tier: str = "strong",
+    response_kind: str = "chat",
+    markdown: bool = False,
+) -> Any:
+    """
+    Register an agent on the configured model backend and return a LazyAgent handle; nothing is
+    built (and no LLM client library is imported) until the agent is first run.
+    `tier` ("fast", "strong" or an explicit model ID) is the agent's default model; requests may
+    run it on another tier (see model_tiers). `response_kind` ("chat" or "memo") identifies the
+    agent in tier/SLO routes and selects the canned output shape of the fake backend.
+    """
+    spec = {
+        "name": name,
+        "role": role,
+        "instructions": instructions,
+        "tier": tier,
+        "response_kind": response_kind,
+        "markdown": markdown,
+    }
+    AGENT_SPECS[name] = spec
+    return LazyAgent(name)
+
+def get_agent_spec(agent: Any) -> Dict[str, Any]:
+    """Construction arguments of an agent built with create_agent (defaults for anything else)"""
+    name = getattr(agent, "name", None) or "agent"
+    return AGENT_SPECS.get(name) or {"name": name, "tier": "strong", "response_kind": "chat"}
+
+def get_agent_variant(agent: Any, tier: str) -> Any:
+    """The same agent running on the model of `tier`, built on first use"""
+    spec = AGENT_SPECS.get(getattr(agent, "name", None) or "")
+    if spec is None:
+        return agent
+    key = (spec["name"], resolve_model_id(tier))
+    variant = _agent_variants.get(key)
+    if variant is None:
+        with _build_lock:
+            variant = _agent_variants.get(key)
+            if variant is None:
+                started = time.perf_counter()
+                variant = _agent_variants[key] = _build_agent(spec, key[1], tier)
+                _build_seconds[key] = time.perf_counter() - started
+                print(f"Built agent {spec['name']} on {key[1]} in {_build_seconds[key]:.2f}s")
+    return variant
+
+def preload_agents():
+    """Build every registered agent on its default tier (e.g. in a thread after startup)"""
+    for name, spec in list(AGENT_SPECS.items()):
+        get_agent_variant(LazyAgent(name), spec["tier"])
+
+def get_agent_registry_stats() -> Dict[str, Any]:
+    """Registered agents, which model variants have been built and how long each build took"""
+    from .cassette import LLM_CASSETTE_MODE, llm_cassette
+
+    return {
+        "backend": LLM_BACKEND,
+        "cassette": llm_cassette.stats() if LLM_CASSETTE_MODE else None,
+        "preload": LLM_AGENT_PRELOAD,
+        "agents": {
+            name: {
+                "default_tier": spec["tier"],
+                "built": {
+                    model_id: round(_build_seconds.get((agent_name, model_id), 0.0), 3)
+                    for agent_name, model_id in list(_agent_variants)
+                    if agent_name == name
+                },
+            }
+            for name, spec in AGENT_SPECS.items()
+        },
+    }
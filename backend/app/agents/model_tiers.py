@@ -0,0 +1,146 @@
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from ..monitoring import Counter, Gauge
+
+# Model behind each tier; chat defaults to the fast tier, memos to the strong one
+MODEL_TIERS: Dict[str, str] = {
+    "fast": os.getenv("LLM_FAST_MODEL", "claude-3-5-haiku-20241022"),
+    "strong": os.getenv("LLM_STRONG_MODEL", "claude-3-5-sonnet-20241022"),
+}
+# Tiers from fastest to strongest; SLO fallback moves one step towards the front
+TIER_ORDER = ["fast", "strong"]
+
+def parse_route_table(spec: str) -> Dict[str, str]:
+    """
+    Parse "key=value" pairs separated by commas. Keys are an agent kind ("chat", "memo"),
+    an endpoint ("/generate-summary") or both ("/chat:memo").
+    """
+    table: Dict[str, str] = {}
+    for entry in spec.split(","):
+        key, sep, value = entry.partition("=")
+        if sep and key.strip() and value.strip():
+            table[key.strip()] = value.strip()
+    return table
+
+# Tier (or explicit model ID) per agent kind and endpoint, e.g. "/generate-summary=fast,/chat:memo=fast"
+LLM_TIER_ROUTES = parse_route_table(os.getenv("LLM_TIER_ROUTES", ""))
+# Rolling p95 call latency (seconds) above which an endpoint falls back to the faster tier
+LLM_LATENCY_SLOS = parse_route_table(os.getenv("LLM_LATENCY_SLOS", "chat=8,memo=60"))
+LLM_SLO_WINDOW = int(os.getenv("LLM_SLO_WINDOW", "50"))
+LLM_SLO_MIN_SAMPLES = int(os.getenv("LLM_SLO_MIN_SAMPLES", "10"))
+LLM_SLO_PERCENTILE = float(os.getenv("LLM_SLO_PERCENTILE", "0.95"))
+# How long a fallback lasts before the configured tier is tried again
+LLM_SLO_FALLBACK_SECONDS = float(os.getenv("LLM_SLO_FALLBACK_SECONDS", "300"))
+
+TIER_SWITCHES = Counter(
+    "agentic_lender_llm_tier_switches_total",
+    "Model tier switches (latency SLO fallbacks and recoveries), by endpoint and agent",
+    ["endpoint", "agent", "from_tier", "to_tier", "reason"],
+)
+TIER_FALLBACK_ACTIVE = Gauge(
+    "agentic_lender_llm_tier_fallback_active",
+    "1 while an endpoint/agent pair is served by the faster tier because of its latency SLO",
+    ["endpoint", "agent"],
+)
+
+def lookup_route(table: Dict[str, str], endpoint: str, kind: str) -> Optional[str]:
+    """Most specific entry for an endpoint and agent kind: 'endpoint:kind', then 'endpoint', then 'kind'"""
+    return table.get(f"{endpoint}:{kind}") or table.get(endpoint) or table.get(kind)
+
+def resolve_model_id(tier_or_model: str) -> str:
+    """Model ID for a tier name; anything else is taken as a model ID"""
+    return MODEL_TIERS.get(tier_or_model, tier_or_model)
+
+def faster_tier(tier: str) -> Optional[str]:
+    """Next faster tier, or None when already the fastest (explicit model IDs fall back to the fastest tier)"""
+    if tier not in TIER_ORDER:
+        return TIER_ORDER[0]
+    index = TIER_ORDER.index(tier)
+    return TIER_ORDER[index - 1] if index > 0 else None
+
+def _percentile(samples: Deque[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+class TierRouter:
+    """
+    Chooses the model tier for each agent call from the per-kind/per-endpoint route table,
+    and temporarily moves an endpoint to the faster tier when its rolling latency breaks the SLO.
+    """
+
+    def __init__(self):
+        self._latencies: Dict[Tuple[str, str, str], Deque[float]] = {}
+        # (endpoint, agent) -> (configured tier, fallback tier, fallback expiry)
+        self._fallbacks: Dict[Tuple[str, str], Tuple[str, str, float]] = {}
+
+    def configured_tier(self, endpoint: str, kind: str, default_tier: str) -> str:
+        return lookup_route(LLM_TIER_ROUTES, endpoint, kind) or default_tier
+
+    def select(self, endpoint: str, agent_name: str, kind: str, default_tier: str) -> str:
+        """Tier (or model ID) to use for this call"""
+        tier = self.configured_tier(endpoint, kind, default_tier)
+        fallback = self._fallbacks.get((endpoint, agent_name))
+        if fallback is None:
+            return tier
+        configured, fallback_tier, expires_at = fallback
+        if time.monotonic() < expires_at and configured == tier:
+            return fallback_tier
+        # Fallback expired (or the route changed): go back to the configured tier with a fresh window
+        del self._fallbacks[(endpoint, agent_name)]
+        self._latencies.pop((endpoint, agent_name, tier), None)
+        TIER_SWITCHES.inc(endpoint=endpoint, agent=agent_name, from_tier=fallback_tier, to_tier=tier, reason="recovered")
+        TIER_FALLBACK_ACTIVE.set(0, endpoint=endpoint, agent=agent_name)
+        return tier
+
+    def observe(self, endpoint: str, agent_name: str, kind: str, tier: str, seconds: float):
+        """Record one call's latency and fall back to the faster tier when the SLO is broken"""
+        key = (endpoint, agent_name, tier)
+        window = self._latencies.get(key)
+        if window is None:
+            window = self._latencies[key] = deque(maxlen=max(1, LLM_SLO_WINDOW))
+        window.append(seconds)
+
+        slo = lookup_route(LLM_LATENCY_SLOS, endpoint, kind)
+        target = faster_tier(tier)
+        if (
+            slo is None
+            or target is None
+            or (endpoint, agent_name) in self._fallbacks
+            or len(window) < LLM_SLO_MIN_SAMPLES
+            or _percentile(window, LLM_SLO_PERCENTILE) <= float(slo)
+        ):
+            return
+        print(f"Latency SLO of {slo}s broken for {agent_name} on {endpoint}; falling back from {tier} to {target}")
+        self._fallbacks[(endpoint, agent_name)] = (tier, target, time.monotonic() + LLM_SLO_FALLBACK_SECONDS)
+        window.clear()
+        TIER_SWITCHES.inc(endpoint=endpoint, agent=agent_name, from_tier=tier, to_tier=target, reason="slo")
+        TIER_FALLBACK_ACTIVE.set(1, endpoint=endpoint, agent=agent_name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "tiers": dict(MODEL_TIERS),
+            "routes": dict(LLM_TIER_ROUTES),
+            "latency_slos": dict(LLM_LATENCY_SLOS),
+            "active_fallbacks": [
+                {
+                    "endpoint": endpoint,
+                    "agent": agent_name,
+                    "configured_tier": configured,
+                    "serving_tier": fallback_tier,
+                    "seconds_remaining": round(max(0.0, expires_at - now), 1),
+                }
+                for (endpoint, agent_name), (configured, fallback_tier, expires_at) in self._fallbacks.items()
+            ],
+            "rolling_latency_percentile_seconds": {
+                f"{endpoint} {agent_name} {tier}": round(_percentile(window, LLM_SLO_PERCENTILE), 3)
+                for (endpoint, agent_name, tier), window in self._latencies.items()
+                if window
+            },
+        }
+
+tier_router = TierRouter()
@@ -0,0 +1,308 @@
+import asyncio
+import hashlib
+import os
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..memory import compress_text, expand_text
+from ..monitoring import Counter, Gauge
+
+# Per-attempt deadline for one model call, by priority class
+LLM_CHAT_TIMEOUT_SECONDS = float(os.getenv("LLM_CHAT_TIMEOUT_SECONDS", "20"))
+LLM_MEMO_TIMEOUT_SECONDS = float(os.getenv("LLM_MEMO_TIMEOUT_SECONDS", "120"))
+# Attempts per call on retryable errors (timeouts, 429/5xx/529, connection failures)
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+LLM_RETRY_BACKOFF_SECONDS = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "0.5"))
+# Consecutive failures that open an agent's circuit, and how long it stays open before a probe call
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+# Start a duplicate quick-chat call when the first has not answered after this many seconds (0 disables)
+LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+# Successful responses kept per agent to serve while its circuit is open
+LLM_FALLBACK_CACHE_SIZE = int(os.getenv("LLM_FALLBACK_CACHE_SIZE", "256"))
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+CHAT_FALLBACK_REPLY = (
+    "I'm having trouble reaching the assistant right now. "
+    "Your message is saved, so please try again in a minute."
+)
+MEMO_FALLBACK_HTML = (
+    "<div style=\"font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: #f8fafc; padding: 24px;\">"
+    '<div style="background: white; border-radius: 12px; padding: 24px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); '
+    'border-left: 4px solid #f59e0b;">'
+    '<h3 style="margin: 0 0 8px 0; color: #1e293b; font-size: 18px; font-weight: 600;">Credit memo temporarily unavailable</h3>'
+    '<p style="margin: 0; color: #475569; font-size: 14px;">The memo service is not responding. '
+    "Send the credit request ID again in a minute to generate the full memo.</p></div></div>"
+)
+
+LLM_RETRIES = Counter(
+    "agentic_lender_llm_retries_total",
+    "LLM call attempts retried after a retryable error",
+    ["agent"],
+)
+LLM_FALLBACKS = Counter(
+    "agentic_lender_llm_fallbacks_total",
+    "Cached or template responses served instead of an LLM call",
+    ["agent", "source"],
+)
+LLM_HEDGES = Counter(
+    "agentic_lender_llm_hedged_requests_total",
+    "Duplicate LLM calls started to cut tail latency, by which call answered first",
+    ["agent", "winner"],
+)
+CIRCUIT_STATE = Gauge(
+    "agentic_lender_llm_circuit_open",
+    "1 while an agent's circuit breaker is open or half-open",
+    ["agent"],
+)
+
+class AgentRunFailed(Exception):
+    """An agent run that finished with an error status instead of raising"""
+
+class CircuitOpenError(Exception):
+    """Raised without calling the model while an agent's circuit breaker is open"""
+
+    def __init__(self, agent_name: str, retry_after: int):
+        super().__init__(f"{agent_name} is unavailable after repeated failures; retry after {retry_after}s")
+        self.agent_name = agent_name
+        self.retry_after = retry_after
+
+class FallbackResponse:
+    """Stand-in run response served from the cache or a template while the circuit is open"""
+
+    def __init__(self, content: str, source: str):
+        self.content = content
+        self.source = source
+        self.metrics: Dict[str, Any] = {}
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error is transient enough to retry (and counts against the circuit)"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError, AgentRunFailed)):
+        return True
+    status_code = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status_code, int):
+        return status_code in RETRYABLE_STATUS_CODES
+    # Provider SDK connection/timeout errors (e.g. APIConnectionError, APITimeoutError)
+    name = type(error).__name__
+    return "Connection" in name or "Timeout" in name
+
+def check_run_status(response: Any) -> Any:
+    """agno reports provider failures as a run with an error status; turn those into exceptions"""
+    status = getattr(response, "status", None)
+    if str(getattr(status, "value", status) or "").lower() == "error":
+        raise AgentRunFailed(str(getattr(response, "content", "") or "Agent run failed"))
+    return response
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    closed -> open after `failure_threshold` retryable failures; open -> half_open after
+    `reset_seconds`, letting one probe call through; the probe's outcome closes or re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+            self._probe_in_flight = False
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release_probe(self):
+        """Let another probe through when a half-open probe ended without a verdict"""
+        self._probe_in_flight = False
+
+    def retry_after(self) -> int:
+        remaining = self.reset_seconds - (time.monotonic() - self.opened_at)
+        return max(1, int(remaining + 0.999))
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+        CIRCUIT_STATE.set(0, agent=self.name)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+            CIRCUIT_STATE.set(1, agent=self.name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "retry_after_seconds": self.retry_after() if self.state != "closed" else 0,
+        }
+
+class ResponseCache:
+    """Small LRU of successful responses, keyed by agent and prompt; large (memo) responses are kept compressed"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+
+    @staticmethod
+    def key(agent_name: str, prompt: str) -> str:
+        return hashlib.sha256(f"{agent_name}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        content = self._entries.get(key)
+        if content is not None:
+            self._entries.move_to_end(key)
+        return expand_text(content)
+
+    def put(self, key: str, content: str):
+        if self.max_entries <= 0 or not isinstance(content, str):
+            return
+        self._entries[key] = compress_text(content)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+_breakers: Dict[str, CircuitBreaker] = {}
+response_cache = ResponseCache(LLM_FALLBACK_CACHE_SIZE)
+
+def get_circuit_breaker(agent_name: str) -> CircuitBreaker:
+    breaker = _breakers.get(agent_name)
+    if breaker is None:
+        breaker = _breakers[agent_name] = CircuitBreaker(agent_name, LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_RESET_SECONDS)
+    return breaker
+
+async def hedged_call(
+    make_call: Callable[[], Awaitable[Any]],
+    timeout: float,
+    hedge_after: float = 0.0,
+    try_reserve_hedge: Optional[Callable[[], bool]] = None,
+    release_hedge: Optional[Callable[[], None]] = None,
+    agent_name: str = "agent",
+) -> Any:
+    """
+    Run one model call under a deadline. With `hedge_after` > 0, a duplicate call is started
+    if the first has not answered by then (and `try_reserve_hedge` grants spare capacity);
+    the first successful answer wins and the other call is cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    primary = asyncio.ensure_future(make_call())
+    started = [primary]
+    hedge_reserved = False
+    try:
+        if hedge_after <= 0 or hedge_after >= timeout:
+            return check_run_status(await asyncio.wait_for(primary, timeout=timeout))
+
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if not done and (try_reserve_hedge is None or try_reserve_hedge()):
+            hedge_reserved = try_reserve_hedge is not None
+            started.append(asyncio.ensure_future(make_call()))
+
+        pending = set(started)
+        last_error: Optional[BaseException] = None
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise asyncio.TimeoutError()
+            for task in done:
+                try:
+                    response = check_run_status(task.result())
+                except Exception as e:
+                    last_error = e
+                    continue
+                if len(started) > 1:
+                    LLM_HEDGES.inc(agent=agent_name, winner="primary" if task is primary else "hedge")
+                return response
+        raise last_error or asyncio.TimeoutError()
+    finally:
+        for task in started:
+            if not task.done():
+                task.cancel()
+        if hedge_reserved and release_hedge is not None:
+            release_hedge()
+
+async def call_with_resilience(
+    agent_name: str,
+    prompt: str,
+    attempt: Callable[[], Awaitable[Any]],
+    fallback_content: Optional[str] = None,
+    max_attempts: Optional[int] = None,
+) -> Any:
+    """
+    Call `attempt` with jittered retries on retryable errors behind the agent's circuit breaker.
+    While the circuit is open (or after the last failed attempt) a cached response for the same
+    prompt, or `fallback_content`, is served; without either the error is raised.
+    """
+    breaker = get_circuit_breaker(agent_name)
+    cache_key = ResponseCache.key(agent_name, prompt)
+    attempts = max(1, max_attempts or LLM_MAX_ATTEMPTS)
+
+    def fallback(error: BaseException) -> Any:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            LLM_FALLBACKS.inc(agent=agent_name, source="cache")
+            return FallbackResponse(cached, "cache")
+        if fallback_content is not None:
+            LLM_FALLBACKS.inc(agent=agent_name, source="template")
+            return FallbackResponse(fallback_content, "template")
+        raise error
+
+    if not breaker.allow():
+        return fallback(CircuitOpenError(agent_name, breaker.retry_after()))
+
+    for attempt_number in range(1, attempts + 1):
+        try:
+            response = await attempt()
+        except Exception as e:
+            if not is_retryable(e):
+                breaker.release_probe()
+                raise
+            breaker.record_failure()
+            print(f"{agent_name} attempt {attempt_number}/{attempts} failed: {str(e) or type(e).__name__}")
+            if attempt_number == attempts or not breaker.allow():
+                if breaker.state == "open":
+                    return fallback(CircuitOpenError(agent_name, breaker.retry_after()))
+                return fallback(e)
+            LLM_RETRIES.inc(agent=agent_name)
+            backoff = LLM_RETRY_BACKOFF_SECONDS * (2 ** (attempt_number - 1))
+            await asyncio.sleep(random.uniform(0, backoff))
+            continue
+        except BaseException:
+            # Cancelled (e.g. client disconnect): no verdict on the provider's health
+            breaker.release_probe()
+            raise
+        breaker.record_success()
+        response_cache.put(cache_key, getattr(response, "content", None))
+        return response
+
+def get_resilience_stats() -> Dict[str, Any]:
+    """Circuit breaker state per agent plus the resilience settings in effect"""
+    return {
+        "chat_timeout_seconds": LLM_CHAT_TIMEOUT_SECONDS,
+        "memo_timeout_seconds": LLM_MEMO_TIMEOUT_SECONDS,
+        "max_attempts": LLM_MAX_ATTEMPTS,
+        "hedge_after_seconds": LLM_HEDGE_AFTER_SECONDS,
+        "circuits": {name: breaker.snapshot() for name, breaker in _breakers.items()},
+    }
@@ -0,0 +1,90 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from .admission import PRIORITY_INTERACTIVE, PRIORITY_BATCH, PRIORITY_MEMO, llm_admission
+from .model_backend import get_agent_spec, get_agent_variant
+from .model_tiers import tier_router
+from .resilience import (
+    CHAT_FALLBACK_REPLY,
+    LLM_CHAT_TIMEOUT_SECONDS,
+    LLM_HEDGE_AFTER_SECONDS,
+    LLM_MEMO_TIMEOUT_SECONDS,
+    MEMO_FALLBACK_HTML,
+    FallbackResponse,
+    call_with_resilience,
+    hedged_call,
+)
+from ..monitoring import add_usage, current_endpoint, extract_token_usage, get_agent_model_id, token_usage_store
+
+async def run_agent(
+    agent: Any,
+    prompt: str,
+    chat_id: Optional[str] = None,
+    request_id: Optional[str] = None,
+    session: Optional[Dict[str, Any]] = None,
+    priority: str = PRIORITY_MEMO,
+    allow_fallback: bool = True,
+) -> Any:
+    """
+    Run an agent without blocking the event loop.
+    All agent invocations from the API go through here so cross-cutting
+    concerns (scheduling, accounting, resilience) have a single entry point.
+    Calls wait for a slot in the global admission controller, ordered by
+    `priority` (interactive, memo or batch), and raise AdmissionRejected
+    when the queue is full or the wait times out.
+    Each attempt runs under a per-priority deadline and is retried on transient
+    errors behind a per-agent circuit breaker; while the circuit is open a cached
+    or template response is returned instead (unless `allow_fallback` is False,
+    e.g. for batch work that should rather be retried later). Interactive calls
+    may be hedged with a duplicate request when LLM_HEDGE_AFTER_SECONDS is set.
+    The model tier comes from the per-agent/per-endpoint routes, falling back to
+    the faster tier while the endpoint's rolling latency breaks its SLO.
+    Token usage is recorded per endpoint, session and credit request, and added
+    to `session["tokenUsage"]` when a session is given so it persists with it.
+    """
+    endpoint = current_endpoint()
+    agent_name = getattr(agent, "name", None) or "agent"
+    spec = get_agent_spec(agent)
+    tier = tier_router.select(endpoint, agent_name, spec["response_kind"], spec["tier"])
+    model_agent = get_agent_variant(agent, tier)
+    interactive = priority == PRIORITY_INTERACTIVE
+    timeout = LLM_CHAT_TIMEOUT_SECONDS if interactive else LLM_MEMO_TIMEOUT_SECONDS
+    fallback_content = None
+    if allow_fallback and priority != PRIORITY_BATCH:
+        fallback_content = CHAT_FALLBACK_REPLY if interactive else MEMO_FALLBACK_HTML
+
+    async def attempt() -> Any:
+        async with llm_admission.admit(endpoint, priority):
+            started = time.perf_counter()
+            try:
+                response = await hedged_call(
+                    lambda: model_agent.arun(prompt),
+                    timeout=timeout,
+                    hedge_after=LLM_HEDGE_AFTER_SECONDS if interactive else 0.0,
+                    try_reserve_hedge=llm_admission.try_reserve,
+                    release_hedge=llm_admission.release,
+                    agent_name=agent_name,
+                )
+            except asyncio.TimeoutError:
+                tier_router.observe(endpoint, agent_name, spec["response_kind"], tier, timeout)
+                raise
+            tier_router.observe(endpoint, agent_name, spec["response_kind"], tier, time.perf_counter() - started)
+            return response
+
+    response = await call_with_resilience(agent_name, prompt, attempt, fallback_content)
+    if isinstance(response, FallbackResponse):
+        return response
+
+    usage = extract_token_usage(response)
+    cost_usd = token_usage_store.record(
+        usage,
+        model_id=get_agent_model_id(model_agent),
+        endpoint=endpoint,
+        agent_name=agent_name,
+        chat_id=chat_id,
+        request_id=request_id,
+    )
+    if session is not None:
+        session["tokenUsage"] = add_usage(session.get("tokenUsage") or {}, usage, cost_usd)
+    return response
@@ -1,11 +1,11 @@
-from agno.agent import Agent
-from agno.models.anthropic import Claude
+from .model_backend import create_agent
 
 # Summary Generation Agent - Specialized in creating detailed credit memos (used separately for summaries)
-summary_generation_agent = Agent(
+summary_generation_agent = create_agent(
     name="Credit Memo Specialist", 
     role="Generates comprehensive credit memos and lending recommendations",
-    model=Claude(id="claude-3-5-sonnet-20241022"),
+    tier="strong",
+    response_kind="memo",
     instructions=[
         "You are a specialized Credit Memo Specialist responsible for creating comprehensive lending analysis and recommendations.",
         "",
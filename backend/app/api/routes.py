@@ -1,38 +1,275 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response, StreamingResponse
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import asyncio
+import json
 import os
-import re
 import random
+import time
 from datetime import datetime
 
-from ..models import ChatMessage, CreditRequest, DetailedCreditRequest
-from ..memory import get_chat_session, update_chat_session, chat_sessions
+from ..models import ChatMessage, BatchMemoRequest, CreditRequest, DetailedCreditRequest
+from ..memory import (
+    get_chat_session,
+    update_chat_session,
+    chat_sessions,
+    expand_summary_data,
+    expand_text,
+    get_session_memo,
+    get_session_messages,
+    archived_message_count,
+    gzip_bytes,
+    memo_archive,
+    message_archive,
+    search_index,
+    session_store,
+)
 from ..agents import fast_chat_agent, summary_generation_agent
-from ..services import fetch_credit_request_details
+from ..agents.intent_router import route_chat_message, get_intent_router_stats
+from ..agents.admission import PRIORITY_INTERACTIVE, AdmissionRejected, llm_admission
+from ..agents.model_backend import get_agent_registry_stats
+from ..agents.model_tiers import tier_router
+from ..agents.resilience import CircuitOpenError, FallbackResponse, get_resilience_stats
+from ..agents.runner import run_agent
+from ..monitoring import (
+    PROFILE_FORMATS,
+    Counter,
+    Gauge,
+    Histogram,
+    render_prometheus,
+    request_profiler,
+    stage_timer,
+    token_usage_store,
+)
+from ..services import (
+    build_credit_memo_prompt,
+    clean_html_content,
+    combine_memo_html,
+    extract_request_ids,
+    find_reusable_memo,
+    gather_limited,
+    build_memo_revision_prompt,
+    index_memo_source,
+    load_credit_memo_inputs,
+    near_duplicate_index,
+    render_missing_data_checklist
+)
+from ..services.batch_service import run_memo_batch
+from ..services.prompt_encoder import CREDIT_PROMPT_FORMAT
+from ..services.request_ids import MAX_REQUEST_IDS_PER_MESSAGE
+from ..services.fact_extraction import extract_lending_facts, format_facts_for_prompt, has_sufficient_memo_coverage
 from ..services.mock_data_service import get_mock_credit_requests, get_mock_detailed_credit_request
 
 router = APIRouter()
 
+CHAT_SOCKET_CONNECTIONS = Gauge(
+    "agentic_lender_chat_socket_connections",
+    "Open chat WebSocket connections",
+)
+CHAT_SOCKET_MESSAGES = Counter(
+    "agentic_lender_chat_socket_messages_total",
+    "Chat messages received over WebSocket",
+)
+CHAT_SOCKET_LATENCY = Histogram(
+    "agentic_lender_chat_socket_latency_seconds",
+    "Time from receiving a chat WebSocket message to sending each event (ack, reply, memo)",
+    ["event"],
+)
+
 @router.get("/")
 async def root():
     return {"message": "Agentic Lender Memo API is running"}
 
 @router.get("/chat-history/{chat_id}")
-async def get_chat_history(chat_id: str):
-    """Get chat history for a specific chat ID"""
+async def get_chat_history(chat_id: str, before: Optional[int] = None, limit: Optional[int] = None):
+    """
+    Get chat history for a specific chat ID.
+    Without paging parameters this returns the messages still in the session; `limit` (and
+    `before`, a message position) page back through the whole history, archived messages included.
+    """
     if chat_id not in chat_sessions:
         raise HTTPException(status_code=404, detail="Chat session not found")
     
     session = chat_sessions[chat_id]
+    archived = archived_message_count(session)
+    if before is None and limit is None:
+        messages, first_index = session["messages"], archived
+    else:
+        messages, first_index = get_session_messages(session, before, min(max(1, limit or 50), 500))
     return {
         "chatId": chat_id,
-        "messages": session["messages"],
-        "summaryData": session["summaryData"],
+        "messages": messages,
+        "firstMessageIndex": first_index,
+        "hasMore": first_index > 0,
+        "totalMessages": archived + len(session["messages"]),
+        "archiveDigest": session.get("archiveDigest"),
+        "summaryData": expand_summary_data(session["summaryData"]),
         "selectedRequestId": session["selectedRequestId"],
+        "tokenUsage": session.get("tokenUsage"),
         "created_at": session["created_at"],
         "updated_at": session["updated_at"]
     }
 
+@router.get("/sessions/store/stats")
+async def get_session_store_stats():
+    """Get the on-disk session store size, index and last open time, and cold message storage"""
+    return {**session_store.stats(), "cold_messages": message_archive.stats()}
+
+@router.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics: request and per-stage latency histograms"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+def _require_profile_admin(request: Request):
+    if not request_profiler.is_admin(request.headers.get("x-admin-token")):
+        raise HTTPException(status_code=403, detail="Profiles need the X-Admin-Token header (set PROFILE_ADMIN_TOKEN to enable)")
+
+@router.get("/admin/profiles")
+async def list_request_profiles(request: Request):
+    """List stored request profiles with their request metadata, newest first"""
+    _require_profile_admin(request)
+    return {**request_profiler.stats(), "profiles": request_profiler.list()}
+
+@router.get("/admin/profiles/{profile_id}")
+async def download_request_profile(profile_id: str, request: Request):
+    """Download a profile: collapsed stacks (.folded) for flamegraph tools, or a pstats file (.prof)"""
+    _require_profile_admin(request)
+    stored = request_profiler.get(profile_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    metadata, data = stored
+    return Response(
+        content=data,
+        media_type=PROFILE_FORMATS[metadata["mode"]][1],
+        headers={"Content-Disposition": f'attachment; filename="{metadata["filename"]}"'},
+    )
+
+@router.get("/chat-history/{chat_id}/memo")
+async def get_chat_memo(chat_id: str, request: Request):
+    """Get the latest memo HTML of a chat session, sent pre-compressed to clients that accept gzip"""
+    if chat_id not in chat_sessions:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    html_summary = get_session_memo(chat_sessions[chat_id])
+    if not html_summary:
+        raise HTTPException(status_code=404, detail="No memo generated for this chat session")
+    if "gzip" in request.headers.get("accept-encoding", "").lower():
+        return Response(
+            content=gzip_bytes(html_summary),
+            media_type="text/html",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+        )
+    # Only clients that cannot take gzip pay for decompression
+    return HTMLResponse(expand_text(html_summary), headers={"Vary": "Accept-Encoding"})
+
+@router.get("/memos/stats")
+async def get_memo_archive_stats():
+    """Get memo archive size, deduplication and compaction statistics"""
+    return memo_archive.size_stats()
+
+@router.get("/memos/near-duplicates/stats")
+async def get_near_duplicate_index_stats():
+    """Get the size and LSH settings of the near-duplicate credit file index"""
+    return near_duplicate_index.stats()
+
+@router.post("/memos/compact")
+async def compact_memo_archive():
+    """Store older memo versions as deltas; memos shown in chat sessions stay in full"""
+    pinned = {
+        session["summaryData"]["memoRef"]["hash"]
+        for session in chat_sessions.values()
+        if isinstance(session.get("summaryData"), dict) and session["summaryData"].get("memoRef")
+    }
+    return memo_archive.compact(pinned)
+
+@router.get("/memos/{request_id}")
+async def get_latest_memo(request_id: str):
+    """Get the latest archived memo for a credit request ID"""
+    memo = memo_archive.get_version(request_id)
+    if memo is None:
+        raise HTTPException(status_code=404, detail="No memo archived for this credit request")
+    return memo
+
+@router.get("/memos/{request_id}/versions")
+async def get_memo_versions(request_id: str):
+    """Get the version history of a credit request's memo"""
+    versions = memo_archive.versions(request_id)
+    if not versions:
+        raise HTTPException(status_code=404, detail="No memo archived for this credit request")
+    return {"credit_request_id": request_id, "versions": versions}
+
+@router.get("/memos/{request_id}/versions/{version}")
+async def get_memo_version(request_id: str, version: int):
+    """Get one archived version of a credit request's memo"""
+    memo = memo_archive.get_version(request_id, version)
+    if memo is None:
+        raise HTTPException(status_code=404, detail="Memo version not found")
+    return memo
+
+@router.get("/memos/{request_id}/diff")
+async def get_memo_diff(request_id: str, from_version: int, to_version: int):
+    """Get a unified diff (one HTML tag per line) between two versions of a credit request's memo"""
+    diff = memo_archive.diff(request_id, from_version, to_version)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Memo version not found")
+    return PlainTextResponse(diff)
+
+@router.get("/search")
+async def search_sessions(q: str, limit: int = 20, offset: int = 0, kind: Optional[str] = None):
+    """Full-text search over chat messages and memos, ranked by relevance; kind narrows to "message" or "memo" hits"""
+    if kind not in (None, "message", "memo"):
+        raise HTTPException(status_code=400, detail="kind must be 'message' or 'memo'")
+    return search_index.search(q, limit=limit, offset=offset, kind=kind)
+
+@router.get("/search/stats")
+async def get_search_index_stats():
+    """Get the number of indexed sessions and documents"""
+    return search_index.stats()
+
+@router.get("/token-usage")
+async def get_token_usage(top: int = 20):
+    """Get LLM token usage and estimated cost by endpoint, agent, model, session and credit request"""
+    return token_usage_store.snapshot(top)
+
+@router.get("/token-usage/sessions/{chat_id}")
+async def get_session_token_usage(chat_id: str):
+    """Get LLM token usage recorded on a chat session"""
+    if chat_id not in chat_sessions:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    return {"chatId": chat_id, "tokenUsage": chat_sessions[chat_id].get("tokenUsage")}
+
+@router.get("/token-usage/requests/{request_id}")
+async def get_request_token_usage(request_id: str):
+    """Get LLM token usage recorded for a credit request ID"""
+    usage = token_usage_store.get_request_usage(request_id)
+    if usage is None:
+        raise HTTPException(status_code=404, detail="No token usage recorded for this credit request")
+    return {"credit_request_id": request_id, "tokenUsage": usage}
+
+@router.get("/llm-admission/stats")
+async def get_llm_admission_stats():
+    """Get LLM admission control capacity, queue depth and rejection counts"""
+    return llm_admission.snapshot()
+
+@router.get("/llm-resilience/stats")
+async def get_llm_resilience_stats():
+    """Get circuit breaker state per agent and the timeout, retry and hedging settings"""
+    return get_resilience_stats()
+
+@router.get("/llm-agents/stats")
+async def get_llm_agent_stats():
+    """Get registered agents and which model variants have been built so far"""
+    return get_agent_registry_stats()
+
+@router.get("/llm-tiers/stats")
+async def get_llm_tier_stats():
+    """Get model tiers, tier routes, latency SLOs and any active SLO fallbacks"""
+    return tier_router.snapshot()
+
+@router.get("/intent-router/stats")
+async def get_intent_router_statistics():
+    """Get how many chat messages were answered locally instead of by the chat agent"""
+    return get_intent_router_stats()
+
 @router.get("/credit-requests")
 async def get_credit_requests() -> List[CreditRequest]:
     """Get list of credit requests"""
@@ -43,60 +280,102 @@ async def get_credit_request_details(request_id: str) -> DetailedCreditRequest:
     """Get detailed credit request information"""
     return get_mock_detailed_credit_request(request_id)
 
-@router.post("/chat")
-async def chat_with_agent(chat_message: ChatMessage):
-    """Chat with the AI agent"""
-    # Get chat session (create if doesn't exist)
-    chat_id = chat_message.chatId or f"chat_{int(datetime.now().timestamp())}_{random.randint(1000, 9999)}"
-    session = get_chat_session(chat_id)
-    
-    # Create new message
-    new_message = {
+# Shown in a combined memo for a credit request whose memo could not be generated
+MEMO_UNAVAILABLE_HTML = (
+    "<div style='padding: 20px; background: #f8f9fa; border: 1px solid #dee2e6; border-radius: 8px;'>"
+    "<p style='margin: 0; color: #dc3545;'>The memo for this credit request could not be generated right now. Please try again shortly.</p></div>"
+)
+
+def _chat_message_entry(text: str, sender: str) -> Dict[str, Any]:
+    return {
         "id": f"msg_{int(datetime.now().timestamp())}_{random.randint(1000, 9999)}",
-        "text": chat_message.message,
-        "sender": "user",
+        "text": text,
+        "sender": sender,
         "timestamp": datetime.now().isoformat()
     }
-    
-    # Add user message to session
-    session["messages"].append(new_message)
-    
-    # Check if the message contains a credit request ID
-    request_id_pattern = r"US-\d{6}-\d{4}"
-    request_id_match = re.search(request_id_pattern, chat_message.message)
-    
-    if request_id_match:
-        request_id = request_id_match.group(0)
-        print(f"Credit request ID detected: {request_id}")
-        
-        # Fetch detailed credit request information
-        credit_details = await fetch_credit_request_details(request_id)
-        
+
+async def _reply_to_message(
+    message: str,
+    chat_id: str,
+    session: Dict[str, Any],
+    request_ids: Sequence[str] = (),
+    memo_ready: bool = True,
+):
+    """Quick chat reply to a user message about zero or more credit requests: (intent, response text)"""
+    if request_ids:
         # Create a concise message for fast chat response
-        enhanced_message = f"""
-User asked: {chat_message.message}
+        if len(request_ids) == 1:
+            retrieved = f"Credit request for {request_ids[0]} has been retrieved"
+        else:
+            retrieved = f"Credit requests {', '.join(request_ids)} have been retrieved"
+        prompt = f"""
+User asked: {message}
 
-Credit request for {request_id} has been retrieved. Key details:
+{retrieved}. Key details:
 - Borrower: Available in data
-- Status: Ready for analysis
-- Summary: Will be generated automatically
+- Status: {"Ready for analysis" if memo_ready else "Incomplete file, too much data missing for a full memo"}
+- Summary: {"Will be generated automatically" if memo_ready else "A checklist of the missing information is in the summary section"}
 
 Provide a quick, friendly acknowledgment (1-3 sentences max) that you've got their request and direct them to check the summary section for details.
 """
-        
-        # Get fast AI response from single chat agent
-        response = fast_chat_agent.run(enhanced_message)
-        
-        # If we have credit request data, also generate the HTML summary
-        print(f"Generating HTML summary for: {request_id}")
-        
-        # Generate HTML summary using the Credit Memo Specialist
+    else:
+        prompt = f"""
+User message: {message}
+
+Provide a quick, helpful response (1-3 sentences max). Be conversational and ask clarifying questions if needed.
+"""
+    
+    # Acknowledgements, greetings, thanks and memo status checks are answered from templates;
+    # only real questions go to the chat agent
+    intent, response_text = route_chat_message(message, session, request_ids, memo_ready)
+    if response_text is None:
+        request_id = request_ids[0] if len(request_ids) == 1 else None
+        with stage_timer("chat_llm"):
+            response = await run_agent(fast_chat_agent, prompt, chat_id, request_id, session, PRIORITY_INTERACTIVE)
+        response_text = response.content
+    return intent, response_text
+
+async def _generate_chat_memo(
+    chat_id: str,
+    session: Dict[str, Any],
+    request_id: str,
+    credit_details: str,
+    completeness: Any,
+    credit_data: Optional[Dict[str, Any]],
+):
+    """
+    Memo HTML for a credit request mentioned in chat: (html, near-duplicate match, whether the
+    memo should be indexed for reuse, whether it is the outage template of a degraded call).
+    Incomplete files get the missing-data checklist instead.
+    """
+    memo_ready = completeness is None or completeness.is_sufficient
+    if not memo_ready:
+        # Too little data for a meaningful memo: serve the missing-data checklist without an LLM call
+        print(f"Skipping memo generation for {request_id}: file is {completeness.score:.0%} complete")
+        with stage_timer("postprocess"):
+            return render_missing_data_checklist(completeness), None, False, False
+    
+    reuse = find_reusable_memo(request_id, credit_data)
+    if reuse is not None and reuse.reusable:
+        # An equivalent file already has a memo: serve it without an LLM call
+        return reuse.html, reuse, True, False
+    
+    # If we have credit request data, also generate the HTML summary
+    print(f"Generating HTML summary for: {request_id}")
+    
+    # Generate HTML summary using the Credit Memo Specialist
+    if reuse is not None:
+        # A near-duplicate file has a memo: only the sections covering changed fields are rewritten
+        summary_prompt = build_memo_revision_prompt(request_id, credit_details, reuse)
+    elif CREDIT_PROMPT_FORMAT == "compact":
+        summary_prompt = build_credit_memo_prompt(request_id, credit_details)
+    else:
         summary_prompt = f"""
         Based on the following credit request data, generate a comprehensive HTML credit memo that displays key lending data in a professional banking format.
-        
+    
         CREDIT REQUEST DATA:
         {credit_details}
-        
+    
         Create a comprehensive HTML credit memo with these sections:
         - EXECUTIVE SUMMARY - Brief overview with key metrics
         - CREDIT SUMMARY - Borrower profile, financials, and collateral details
@@ -106,7 +385,7 @@ Provide a quick, friendly acknowledgment (1-3 sentences max) that you've got the
         - COLLATERAL ANALYSIS - Detailed collateral breakdown with LTV analysis
         - RISK ASSESSMENT - Key risks and mitigating factors
         - RECOMMENDATION - Final approval recommendation
-        
+    
         Use professional banking memo styling with:
         - Clean section headers with borders
         - Data tables for financial information
@@ -118,108 +397,386 @@ Provide a quick, friendly acknowledgment (1-3 sentences max) that you've got the
         - Main container background: #f8fafc
         - Card styling: white background, border-radius: 12px, box-shadow: 0 2px 10px rgba(0,0,0,0.1)
         - For incomplete sections: add clickable-section class with data-section attribute and hover effects
-        
+    
         CRITICAL: Return ONLY the HTML content with inline CSS styling. Do NOT include any markdown formatting, code blocks, or ```html tags.
         Start directly with <div> and end with </div>. The HTML should be ready to inject into a React component using dangerouslySetInnerHTML.
         """
+    
+    # Generate HTML summary
+    with stage_timer("summary_llm"):
+        summary_response = await run_agent(summary_generation_agent, summary_prompt, chat_id, request_id, session)
+    
+    # Clean up any markdown formatting
+    with stage_timer("postprocess"):
+        html_content = clean_html_content(summary_response.content)
+    degraded = isinstance(summary_response, FallbackResponse)
+    return html_content, reuse, not degraded, degraded
+
+def _save_chat_memo(
+    chat_id: str,
+    session: Dict[str, Any],
+    message: str,
+    response_text: str,
+    request_id: str,
+    html_content: str,
+    credit_data: Optional[Dict[str, Any]],
+    index_for_reuse: bool,
+    degraded: bool = False,
+):
+    """
+    Store a chat memo in the session (and the memo archive), and make it reusable. The outage
+    template of a degraded call is neither archived nor stored: the session keeps its last real memo.
+    """
+    if degraded:
+        with stage_timer("session_update"):
+            update_chat_session(chat_id, session["messages"], None, request_id)
+        return
+    summary_data = {
+        "lastQuery": message,
+        "lastResponse": response_text,
+        "timestamp": datetime.now().isoformat(),
+        "htmlSummary": html_content,
+        "creditRequestId": request_id,
+        "borrowerName": credit_data["borrower"]["name"] if credit_data else None,
+        "summaryGenerated": True
+    }
+    with stage_timer("session_update"):
+        update_chat_session(chat_id, session["messages"], summary_data, request_id)
+    if index_for_reuse:
+        index_memo_source(request_id, credit_data, html_content)
+
+async def _generate_chat_memos(
+    chat_id: str,
+    session: Dict[str, Any],
+    request_ids: List[str],
+    inputs: List[Any],
+) -> List[Tuple[Dict[str, Any], Optional[str]]]:
+    """
+    Memos for several credit requests mentioned in one chat message, generated concurrently
+    (CHAT_REQUEST_ID_CONCURRENCY at a time): (memo details, html) per request, in order.
+    Each memo is archived and indexed on its own; a request whose memo could not be admitted
+    carries an `error` and no HTML, and the outage template of a degraded call is returned as
+    `degraded` without being archived.
+    """
+    async def generate(item):
+        request_id, (credit_details, completeness, credit_data) = item
+        entry: Dict[str, Any] = {
+            "credit_request_id": request_id,
+            "completeness_score": completeness.score if completeness else None,
+        }
+        try:
+            html_content, reuse, index_for_reuse, degraded = await _generate_chat_memo(
+                chat_id, session, request_id, credit_details, completeness, credit_data
+            )
+        except (AdmissionRejected, CircuitOpenError) as e:
+            entry.update(error=str(e), retry_after=e.retry_after)
+            return entry, None
+        if degraded:
+            entry.update(degraded=True)
+            return entry, html_content
+        memo_ref = memo_archive.put(request_id, html_content, source="chat", chat_id=chat_id)
+        if index_for_reuse:
+            index_memo_source(request_id, credit_data, html_content)
+        entry.update(memo_version=memo_ref["version"], memo_reuse=reuse.to_dict() if reuse is not None else None)
+        return entry, html_content
+    
+    return await gather_limited(list(zip(request_ids, inputs)), generate)
+
+def _save_chat_memos(
+    chat_id: str,
+    session: Dict[str, Any],
+    message: str,
+    response_text: str,
+    memos: List[Tuple[Dict[str, Any], Optional[str]]],
+) -> str:
+    """
+    Store the combined memo of a multi-request message in the session; returns its HTML.
+    When no memo was generated (all failed or degraded) the session keeps its previous memo.
+    """
+    html_content = combine_memo_html([(memo["credit_request_id"], html or MEMO_UNAVAILABLE_HTML) for memo, html in memos])
+    request_ids = [memo["credit_request_id"] for memo, _ in memos]
+    if all(html is None or memo.get("degraded") for memo, html in memos):
+        with stage_timer("session_update"):
+            update_chat_session(chat_id, session["messages"], None, request_ids[0])
+        return html_content
+    summary_data = {
+        "lastQuery": message,
+        "lastResponse": response_text,
+        "timestamp": datetime.now().isoformat(),
+        "htmlSummary": html_content,
+        "creditRequestIds": request_ids,
+        "summaryGenerated": True
+    }
+    with stage_timer("session_update"):
+        update_chat_session(chat_id, session["messages"], summary_data, request_ids[0])
+    return html_content
+
+# summaryData fields of the session's memo, kept across general chat turns
+MEMO_SUMMARY_FIELDS = ("memoRef", "htmlSummary", "creditRequestId", "creditRequestIds", "borrowerName")
+
+def _general_summary_data(session: Dict[str, Any], message: str, response_text: str) -> Dict[str, Any]:
+    """summaryData for a chat turn without a credit request ID; the session's memo (as stored) stays"""
+    previous = session.get("summaryData") or {}
+    summary_data = {field: previous[field] for field in MEMO_SUMMARY_FIELDS if previous.get(field)}
+    summary_data.update({
+        "lastQuery": message,
+        "lastResponse": response_text,
+        "timestamp": datetime.now().isoformat(),
+        "summaryGenerated": False
+    })
+    return summary_data
+
+@router.post("/chat")
+async def chat_with_agent(chat_message: ChatMessage):
+    """Chat with the AI agent"""
+    # Get chat session (create if doesn't exist)
+    chat_id = chat_message.chatId or f"chat_{int(datetime.now().timestamp())}_{random.randint(1000, 9999)}"
+    session = get_chat_session(chat_id)
+    
+    # Add user message to session
+    session["messages"].append(_chat_message_entry(chat_message.message, "user"))
+    
+    # Every credit request ID in the message, in one scan
+    request_ids = extract_request_ids(chat_message.message)
+    
+    if len(request_ids) > 1:
+        # Several IDs (e.g. deals to compare): fetch and generate concurrently, answer once
+        skipped_request_ids = request_ids[MAX_REQUEST_IDS_PER_MESSAGE:]
+        request_ids = request_ids[:MAX_REQUEST_IDS_PER_MESSAGE]
+        print(f"Credit request IDs detected: {', '.join(request_ids)}")
         
-        # Generate HTML summary
-        summary_response = summary_generation_agent.run(summary_prompt)
+        inputs = await gather_limited(request_ids, load_credit_memo_inputs)
+        memo_ready = all(completeness is None or completeness.is_sufficient for _, completeness, _ in inputs)
         
-        # Clean up any markdown formatting
-        html_content = summary_response.content
-        if html_content.startswith('```html'):
-            html_content = html_content[7:]  # Remove ```html
-        if html_content.endswith('```'):
-            html_content = html_content[:-3]  # Remove ```
-        html_content = html_content.strip()
+        intent, response_text = await _reply_to_message(chat_message.message, chat_id, session, request_ids, memo_ready)
+        memos = await _generate_chat_memos(chat_id, session, request_ids, inputs)
         
-        # Create agent response message
-        agent_message = {
-            "id": f"msg_{int(datetime.now().timestamp())}_{random.randint(1000, 9999)}",
-            "text": response.content,
-            "sender": "agent",
-            "timestamp": datetime.now().isoformat()
+        session["messages"].append(_chat_message_entry(response_text, "agent"))
+        html_content = _save_chat_memos(chat_id, session, chat_message.message, response_text, memos)
+        
+        return {
+            "response": response_text,
+            "team_mode": "fast_single_agent",
+            "agents_used": [fast_chat_agent.name] if intent == "open_ended" else [],
+            "intent": intent,
+            "html_summary": html_content,
+            "credit_request_id": request_ids[0],
+            "credit_request_ids": request_ids,
+            "skipped_request_ids": skipped_request_ids,
+            "memos": [memo for memo, _ in memos],
+            "summary_generated": True,
+            "chatId": chat_id
         }
+    elif request_ids:
+        request_id = request_ids[0]
+        print(f"Credit request ID detected: {request_id}")
         
-        # Add agent message to session
-        session["messages"].append(agent_message)
+        # Fetch detailed credit request information and score how complete the file is
+        credit_details, completeness, credit_data = await load_credit_memo_inputs(request_id)
+        memo_ready = completeness is None or completeness.is_sufficient
         
-        # Delay summary update to show after chatbot response
-        # Update summary data
-        summary_data = {
-            "lastQuery": chat_message.message,
-            "lastResponse": response.content,
-            "timestamp": datetime.now().isoformat(),
-            "htmlSummary": html_content,
-            "creditRequestId": request_id,
-            "summaryGenerated": True
-        }
+        intent, response_text = await _reply_to_message(chat_message.message, chat_id, session, [request_id], memo_ready)
+        html_content, reuse, index_for_reuse, degraded = await _generate_chat_memo(
+            chat_id, session, request_id, credit_details, completeness, credit_data
+        )
         
-        # Update session with new data
-        update_chat_session(chat_id, session["messages"], summary_data, request_id)
+        # Add agent message to session, then the memo (shown after the chatbot response)
+        session["messages"].append(_chat_message_entry(response_text, "agent"))
+        _save_chat_memo(
+            chat_id, session, chat_message.message, response_text, request_id, html_content, credit_data, index_for_reuse, degraded
+        )
         
         return {
-            "response": response.content,
+            "response": response_text,
             "team_mode": "fast_single_agent",
-            "agents_used": [fast_chat_agent.name],
+            "agents_used": [fast_chat_agent.name] if intent == "open_ended" else [],
+            "intent": intent,
             "html_summary": html_content,
             "credit_request_id": request_id,
-            "summary_generated": True,
+            "summary_generated": not degraded,
+            "memo_degraded": degraded,
+            "completeness_score": completeness.score if completeness else None,
+            "memo_reuse": reuse.to_dict() if reuse is not None else None,
             "chatId": chat_id
         }
     else:
         # Handle general messages without credit request ID
-        general_message = f"""
-User message: {chat_message.message}
-
-Provide a quick, helpful response (1-3 sentences max). Be conversational and ask clarifying questions if needed.
-"""
-        
-        # Get fast AI response for general conversation
-        response = fast_chat_agent.run(general_message)
-        
-        # Create agent response message
-        agent_message = {
-            "id": f"msg_{int(datetime.now().timestamp())}_{random.randint(1000, 9999)}",
-            "text": response.content,
-            "sender": "agent",
-            "timestamp": datetime.now().isoformat()
-        }
+        intent, response_text = await _reply_to_message(chat_message.message, chat_id, session)
         
         # Add agent message to session
-        session["messages"].append(agent_message)
+        session["messages"].append(_chat_message_entry(response_text, "agent"))
         
         # Update summary data
-        summary_data = {
-            "lastQuery": chat_message.message,
-            "lastResponse": response.content,
-            "timestamp": datetime.now().isoformat(),
-            "summaryGenerated": False
-        }
+        summary_data = _general_summary_data(session, chat_message.message, response_text)
         
         # Update session with new data
-        update_chat_session(chat_id, session["messages"], summary_data)
+        with stage_timer("session_update"):
+            update_chat_session(chat_id, session["messages"], summary_data)
         
         return {
-            "response": response.content,
+            "response": response_text,
             "team_mode": "fast_single_agent",
-            "agents_used": [fast_chat_agent.name],
+            "agents_used": [fast_chat_agent.name] if intent == "open_ended" else [],
+            "intent": intent,
             "summary_generated": False,
             "chatId": chat_id
         }
 
+@router.websocket("/ws/chat/{chat_id}")
+async def chat_socket(websocket: WebSocket, chat_id: str):
+    """
+    Chat over one long-lived connection per session.
+    Send {"message": "...", "clientId": "..."}; the server answers with an `ack` event at once, a
+    `reply` event with the chat response, and, for messages with credit request IDs, a `memo` event
+    when the memo (or, for several IDs, the combined memo) is ready. Memos are generated in the background, so the next message can be sent
+    (and answered) meanwhile. Events echo `clientId` so replies can be matched to messages.
+    A frame that cannot be parsed or answered gets an `error` event; the connection stays open.
+    """
+    await websocket.accept()
+    CHAT_SOCKET_CONNECTIONS.inc()
+    send_lock = asyncio.Lock()
+    memo_tasks: Set[asyncio.Task] = set()
+    
+    async def send_event(event: Dict[str, Any], received_at: Optional[float] = None):
+        if received_at is not None:
+            CHAT_SOCKET_LATENCY.observe(time.perf_counter() - received_at, event=event["type"])
+        async with send_lock:
+            await websocket.send_json(event)
+    
+    async def push_memo(message: str, response_text: str, request_ids: List[str], inputs: List[Any], client_id: Any, received_at: float):
+        session = get_chat_session(chat_id)
+        # The memo is saved even if the client has gone away; chat history picks it up on reconnect
+        try:
+            if len(request_ids) > 1:
+                memos = await _generate_chat_memos(chat_id, session, request_ids, inputs)
+                html_content = _save_chat_memos(chat_id, session, message, response_text, memos)
+            else:
+                request_id = request_ids[0]
+                credit_details, completeness, credit_data = inputs[0]
+                html_content, reuse, index_for_reuse, degraded = await _generate_chat_memo(
+                    chat_id, session, request_id, credit_details, completeness, credit_data
+                )
+                _save_chat_memo(chat_id, session, message, response_text, request_id, html_content, credit_data, index_for_reuse, degraded)
+        except Exception as e:
+            print(f"Memo generation over WebSocket failed for {', '.join(request_ids)}: {e}")
+            await send_event({
+                "type": "error",
+                "clientId": client_id,
+                "credit_request_id": request_ids[0],
+                "credit_request_ids": request_ids,
+                "detail": "Memo generation failed",
+            })
+            return
+        
+        if len(request_ids) > 1:
+            await send_event({
+                "type": "memo",
+                "clientId": client_id,
+                "html_summary": html_content,
+                "credit_request_id": request_ids[0],
+                "credit_request_ids": request_ids,
+                "memos": [memo for memo, _ in memos],
+                "summary_generated": True,
+            }, received_at)
+            return
+        await send_event({
+            "type": "memo",
+            "clientId": client_id,
+            "html_summary": html_content,
+            "credit_request_id": request_id,
+            "summary_generated": not degraded,
+            "memo_degraded": degraded,
+            "completeness_score": completeness.score if completeness else None,
+            "memo_reuse": reuse.to_dict() if reuse is not None else None,
+        }, received_at)
+    
+    def memo_done(task: asyncio.Task):
+        memo_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # Sending to a closed socket; the memo itself was saved before the send
+            print(f"Could not push memo over WebSocket for {chat_id}: {task.exception()}")
+    
+    try:
+        while True:
+            frame = await websocket.receive_text()
+            received_at = time.perf_counter()
+            CHAT_SOCKET_MESSAGES.inc()
+            # A malformed frame is answered, not allowed to end the connection
+            try:
+                payload = json.loads(frame)
+            except ValueError:
+                await send_event({"type": "error", "detail": "invalid JSON"})
+                continue
+            message = str(payload.get("message") or "").strip() if isinstance(payload, dict) else ""
+            client_id = payload.get("clientId") if isinstance(payload, dict) else None
+            if not message:
+                await send_event({"type": "error", "clientId": client_id, "detail": "message is required"})
+                continue
+            
+            session = get_chat_session(chat_id)
+            user_message = _chat_message_entry(message, "user")
+            session["messages"].append(user_message)
+            await send_event({"type": "ack", "clientId": client_id, "messageId": user_message["id"]}, received_at)
+            
+            request_ids = extract_request_ids(message)
+            skipped_request_ids = request_ids[MAX_REQUEST_IDS_PER_MESSAGE:]
+            request_ids = request_ids[:MAX_REQUEST_IDS_PER_MESSAGE]
+            inputs: List[Any] = []
+            memo_ready = True
+            try:
+                if request_ids:
+                    inputs = await gather_limited(request_ids, load_credit_memo_inputs)
+                    memo_ready = all(completeness is None or completeness.is_sufficient for _, completeness, _ in inputs)
+                intent, response_text = await _reply_to_message(message, chat_id, session, request_ids, memo_ready)
+            except (AdmissionRejected, CircuitOpenError) as e:
+                await send_event({"type": "error", "clientId": client_id, "detail": str(e), "retry_after": e.retry_after}, received_at)
+                continue
+            except Exception as e:
+                print(f"Chat reply over WebSocket failed for {chat_id}: {e}")
+                await send_event({"type": "error", "clientId": client_id, "detail": "Chat reply failed"}, received_at)
+                continue
+            
+            session["messages"].append(_chat_message_entry(response_text, "agent"))
+            if not request_ids:
+                summary_data = _general_summary_data(session, message, response_text)
+                with stage_timer("session_update"):
+                    update_chat_session(chat_id, session["messages"], summary_data)
+            else:
+                # Keep the previous memo in the session until the new one is ready
+                with stage_timer("session_update"):
+                    update_chat_session(chat_id, session["messages"], None, request_ids[0])
+            await send_event({
+                "type": "reply",
+                "clientId": client_id,
+                "response": response_text,
+                "intent": intent,
+                "agents_used": [fast_chat_agent.name] if intent == "open_ended" else [],
+                "credit_request_id": request_ids[0] if request_ids else None,
+                "credit_request_ids": request_ids,
+                "skipped_request_ids": skipped_request_ids,
+                "memo_pending": bool(request_ids),
+                "chatId": chat_id,
+            }, received_at)
+            
+            if request_ids:
+                task = asyncio.create_task(push_memo(message, response_text, request_ids, inputs, client_id, received_at))
+                memo_tasks.add(task)
+                task.add_done_callback(memo_done)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        CHAT_SOCKET_CONNECTIONS.dec()
+
 @router.post("/generate-summary")
 async def generate_summary(chat_message: ChatMessage):
     """Generate summary from conversation"""
     # Use the provided message text for summary generation
     conversation_text = chat_message.message
     
-    # Check if conversation has enough content for a full memo
-    has_sufficient_data = (
-        len(conversation_text.split()) > 50 and  # At least 50 words
-        any(keyword in conversation_text.lower() for keyword in ['borrower', 'loan', 'credit', 'collateral', 'income'])
-    )
+    # Check if conversation covers enough memo sections with concrete facts for a full memo
+    with stage_timer("fact_extraction"):
+        facts = extract_lending_facts(conversation_text)
+    has_sufficient_data = has_sufficient_memo_coverage(facts)
     
     if not has_sufficient_data:
         # Load HTML template from file
@@ -229,12 +786,15 @@ async def generate_summary(chat_message: ChatMessage):
                 html_content = f.read()
         except FileNotFoundError:
             html_content = "<div>Insufficient data for summary generation</div>"
-        return {"html_summary": html_content}
+        return {"html_summary": html_content, "extracted_facts": facts}
     
     # Generate full memo using the dedicated Credit Memo Specialist directly
     prompt = f"""
     Based on the following structured lending conversation, generate a comprehensive HTML credit memo that displays key lending data in a professional banking format.
     
+    EXTRACTED FACTS (parsed from the conversation; sections marked NOT PROVIDED have no data yet):
+{format_facts_for_prompt(facts)}
+    
     Conversation: {conversation_text}
     
     Create a comprehensive HTML credit memo with these sections:
@@ -264,20 +824,21 @@ async def generate_summary(chat_message: ChatMessage):
     """
     
     # Use the Credit Memo Specialist directly to avoid team coordination text
-    response = summary_generation_agent.run(prompt)
+    session = get_chat_session(chat_message.chatId) if chat_message.chatId else None
+    with stage_timer("summary_llm"):
+        response = await run_agent(summary_generation_agent, prompt, chat_message.chatId, session=session)
+    if session is not None:
+        session_store.save(chat_message.chatId, session)
     
     # Clean up any markdown formatting that might be added
-    html_content = response.content
-    if html_content.startswith('```html'):
-        html_content = html_content[7:]  # Remove ```html
-    if html_content.endswith('```'):
-        html_content = html_content[:-3]  # Remove ```
-    html_content = html_content.strip()
+    with stage_timer("postprocess"):
+        html_content = clean_html_content(response.content)
     
     return {
         "html_summary": html_content,
         "generated_by": "credit-memo-specialist",
-        "agents_used": [summary_generation_agent.name]
+        "agents_used": [summary_generation_agent.name],
+        "extracted_facts": facts
     }
 
 @router.post("/generate-credit-memo")
@@ -285,75 +846,124 @@ async def generate_credit_memo(chat_message: ChatMessage):
     """
     Generate an HTML credit memo based on a credit request ID.
     This endpoint specifically handles credit request ID analysis and generates detailed HTML memos.
+    Messages with several IDs get their memos generated concurrently and combined into one response.
     """
-    # Check if the message contains a credit request ID
-    request_id_pattern = r"US-\d{6}-\d{4}"
-    request_id_match = re.search(request_id_pattern, chat_message.message)
+    # Every credit request ID in the message, in one scan
+    request_ids = extract_request_ids(chat_message.message)
     
-    if not request_id_match:
+    if not request_ids:
         return {
             "error": "No credit request ID found in message. Please provide a valid credit request ID.",
             "html_summary": "<div style='padding: 20px; background: #f8f9fa; border: 1px solid #dee2e6; border-radius: 8px;'><h3 style='color: #dc3545; margin: 0;'>Error</h3><p style='margin: 10px 0 0 0;'>Please provide a valid credit request ID (format: US-XXXXXX-YYYY) to generate a credit memo.</p></div>"
         }
+    if len(request_ids) == 1:
+        return await _generate_credit_memo_for(request_ids[0], chat_message.chatId)
+    
+    skipped_request_ids = request_ids[MAX_REQUEST_IDS_PER_MESSAGE:]
+    request_ids = request_ids[:MAX_REQUEST_IDS_PER_MESSAGE]
+    print(f"Generating HTML credit memos for: {', '.join(request_ids)}")
+    
+    async def generate(request_id: str) -> Dict[str, Any]:
+        try:
+            return await _generate_credit_memo_for(request_id, chat_message.chatId)
+        except (AdmissionRejected, CircuitOpenError) as e:
+            return {"credit_request_id": request_id, "html_summary": None, "error": str(e), "retry_after": e.retry_after}
     
-    request_id = request_id_match.group(0)
+    results = await gather_limited(request_ids, generate)
+    return {
+        "html_summary": combine_memo_html([(result["credit_request_id"], result["html_summary"] or MEMO_UNAVAILABLE_HTML) for result in results]),
+        "credit_request_id": request_ids[0],
+        "credit_request_ids": request_ids,
+        "skipped_request_ids": skipped_request_ids,
+        "memos": [{key: value for key, value in result.items() if key != "html_summary"} for result in results],
+        "memo_type": "combined_credit_analysis"
+    }
+
+async def _generate_credit_memo_for(request_id: str, chat_id: Optional[str]) -> Dict[str, Any]:
+    """/generate-credit-memo response for one credit request"""
     print(f"Generating HTML credit memo for: {request_id}")
     
     # Fetch detailed credit request information
-    credit_details = await fetch_credit_request_details(request_id)
-    
-    # Create detailed prompt for HTML memo generation
-    memo_prompt = f"""
-Generate a comprehensive HTML credit memo for credit request {request_id}.
-
-CREDIT REQUEST DATA:
-{credit_details}
-
-Generate a comprehensive HTML credit memo with these sections:
-- EXECUTIVE SUMMARY - Key metrics, recommendation summary, loan overview
-- CREDIT SUMMARY - Borrower financial profile, risk assessment, creditworthiness
-- CLIENT BACKGROUND - Borrower details, employment history, guarantors
-- COLLATERAL ANALYSIS - Property valuation, LTV analysis, market conditions
-- PRICING & FEES - Interest rate justification, fee structure, payment analysis
-- CONDITIONS & COVENANTS - Pre-funding conditions, ongoing requirements
-- RISK ASSESSMENT - Key risks, mitigating factors, overall risk rating
-- RECOMMENDATION - Final lending decision with supporting rationale
-
-CRITICAL HTML FORMATTING REQUIREMENTS:
-- Generate ONLY HTML content with inline CSS styling
-- Use professional banking memo design with clean sections
-- Include data tables for financial information
-- Use color-coded risk indicators (green=low, yellow=medium, red=high)
-- Add progress bars for LTV ratios and key metrics
-- Professional color scheme (blues, grays, whites)
-- Card-based layout with proper spacing and borders
-- Consistent typography: font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif
-- Main container background: #f8fafc
-- Card styling: white background, border-radius: 12px, box-shadow: 0 2px 10px rgba(0,0,0,0.1)
-- For incomplete sections: add clickable-section class with data-section attribute and hover effects
-- Make it visually appealing and easy to read
-- Do NOT include any markdown, code blocks, or ```html tags
-- Start with <div> and end with </div>
-- Ready for React dangerouslySetInnerHTML injection
-
-Focus on creating a professional, comprehensive, and visually appealing credit memo.
-"""
+    credit_details, completeness, credit_data = await load_credit_memo_inputs(request_id)
+    
+    if completeness is not None and not completeness.is_sufficient:
+        print(f"Returning missing-data checklist for {request_id}: file is {completeness.score:.0%} complete")
+        return {
+            "html_summary": render_missing_data_checklist(completeness),
+            "credit_request_id": request_id,
+            "generated_by": "completeness-check",
+            "agents_used": [],
+            "memo_type": "missing_data_checklist",
+            "completeness": completeness.model_dump()
+        }
+    
+    reuse = find_reusable_memo(request_id, credit_data)
+    if reuse is not None and reuse.reusable:
+        # An equivalent file already has a memo: serve it without an LLM call
+        memo_ref = memo_archive.put(request_id, reuse.html, source="near-duplicate", chat_id=chat_id)
+        index_memo_source(request_id, credit_data, reuse.html)
+        return {
+            "html_summary": reuse.html,
+            "credit_request_id": request_id,
+            "memo_version": memo_ref["version"],
+            "generated_by": "near-duplicate-reuse",
+            "agents_used": [],
+            "memo_type": "comprehensive_credit_analysis",
+            "memo_reuse": reuse.to_dict()
+        }
     
-    # Generate HTML memo using summary generation agent
-    response = summary_generation_agent.run(memo_prompt)
+    # Create detailed prompt for HTML memo generation; a near-duplicate's memo is revised instead
+    if reuse is not None:
+        memo_prompt = build_memo_revision_prompt(request_id, credit_details, reuse)
+    else:
+        memo_prompt = build_credit_memo_prompt(request_id, credit_details)
+    
+    # Generate HTML memo using summary generation agent; a chat's token usage is kept (and saved) with its session
+    session = get_chat_session(chat_id) if chat_id else None
+    with stage_timer("summary_llm"):
+        response = await run_agent(summary_generation_agent, memo_prompt, chat_id, request_id, session)
+    if session is not None:
+        session_store.save(chat_id, session)
     
     # Clean up any markdown formatting that might be added
-    html_content = response.content
-    if html_content.startswith('```html'):
-        html_content = html_content[7:]  # Remove ```html
-    if html_content.endswith('```'):
-        html_content = html_content[:-3]  # Remove ```
-    html_content = html_content.strip()
+    with stage_timer("postprocess"):
+        html_content = clean_html_content(response.content)
+    # The outage template of a degraded call is served but not archived, so the last real memo stays latest
+    degraded = isinstance(response, FallbackResponse)
+    memo_ref = None
+    if not degraded:
+        memo_ref = memo_archive.put(request_id, html_content, source="generate-credit-memo", chat_id=chat_id)
+        index_memo_source(request_id, credit_data, html_content)
     
     return {
         "html_summary": html_content,
         "credit_request_id": request_id,
+        "memo_version": memo_ref["version"] if memo_ref else None,
+        "memo_degraded": degraded,
         "generated_by": "credit-memo-specialist",
         "agents_used": [summary_generation_agent.name],
-        "memo_type": "comprehensive_credit_analysis"
-    }
\ No newline at end of file
+        "memo_type": "comprehensive_credit_analysis",
+        "memo_reuse": reuse.to_dict() if reuse is not None else None
+    }
+
+@router.post("/generate-credit-memos/batch")
+async def generate_credit_memos_batch(batch_request: BatchMemoRequest):
+    """
+    Generate HTML credit memos for many credit request IDs.
+    Memos are generated concurrently under the provider rate limits and streamed back as
+    newline-delimited JSON events as each one finishes; failed items are retried individually.
+    """
+    if not batch_request.request_ids:
+        raise HTTPException(status_code=400, detail="request_ids must contain at least one credit request ID")
+    
+    async def event_stream():
+        async for event in run_memo_batch(
+            batch_request.request_ids,
+            max_concurrency=batch_request.max_concurrency,
+            max_attempts=batch_request.max_attempts
+        ):
+            yield json.dumps(event) + "\n"
+    
+    # Content-Encoding set: GZipMiddleware passes the stream through, so each event reaches the
+    # client as it is produced (compressed chunks are buffered rather than flushed per event)
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson", headers={"Content-Encoding": "identity"})
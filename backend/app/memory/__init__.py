@@ -1,11 +1,32 @@
+from .compression import CompressedText, compress_text, expand_text, gzip_bytes
+from .memo_archive import memo_archive
+from .message_archive import message_archive
+from .search_index import search_index
+from .session_store import session_store
 from .session_manager import (
     get_chat_session,
     update_chat_session,
-    chat_sessions
+    chat_sessions,
+    expand_summary_data,
+    get_session_memo,
+    get_session_messages,
+    archived_message_count
 )
 
 __all__ = [
     "get_chat_session",
     "update_chat_session", 
-    "chat_sessions"
+    "chat_sessions",
+    "expand_summary_data",
+    "get_session_memo",
+    "get_session_messages",
+    "archived_message_count",
+    "message_archive",
+    "memo_archive",
+    "search_index",
+    "session_store",
+    "CompressedText",
+    "compress_text",
+    "expand_text",
+    "gzip_bytes"
 ]
\ No newline at end of file
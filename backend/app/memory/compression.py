@@ -0,0 +1,61 @@
+import gzip
+import os
+from typing import Any, Dict, Optional, Union
+
+from ..monitoring import Counter
+
+# Memo HTML at least this large is kept gzip-compressed in sessions and caches
+MEMO_COMPRESSION_MIN_BYTES = int(os.getenv("MEMO_COMPRESSION_MIN_BYTES", "1024"))
+MEMO_COMPRESSION_LEVEL = int(os.getenv("MEMO_COMPRESSION_LEVEL", "6"))
+
+MEMO_STORED_BYTES = Counter(
+    "agentic_lender_memo_stored_bytes_total",
+    "Memo HTML bytes stored in sessions and caches, before and after compression",
+    ["form"],
+)
+
+class CompressedText:
+    """
+    Text held as gzip bytes (a complete gzip member, so it can be sent as-is with
+    `Content-Encoding: gzip`) and only decompressed when a plain string is needed.
+    """
+
+    __slots__ = ("data", "size")
+
+    def __init__(self, data: bytes, size: int):
+        self.data = data
+        self.size = size
+
+    def text(self) -> str:
+        return gzip.decompress(self.data).decode("utf-8")
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self) -> str:
+        return f"CompressedText({self.size} -> {len(self.data)} bytes)"
+
+StoredText = Union[str, CompressedText]
+
+def compress_text(text: Optional[str]) -> Any:
+    """Compress text above the size threshold; smaller text and non-strings are returned unchanged"""
+    if not isinstance(text, str):
+        return text
+    raw = text.encode("utf-8")
+    if len(raw) < MEMO_COMPRESSION_MIN_BYTES:
+        return text
+    # mtime=0 keeps the output deterministic for identical memos
+    data = gzip.compress(raw, compresslevel=MEMO_COMPRESSION_LEVEL, mtime=0)
+    MEMO_STORED_BYTES.inc(len(raw), form="raw")
+    MEMO_STORED_BYTES.inc(len(data), form="stored")
+    return CompressedText(data, len(raw))
+
+def expand_text(value: Any) -> Any:
+    """Plain string for a value produced by compress_text"""
+    return value.text() if isinstance(value, CompressedText) else value
+
+def gzip_bytes(value: StoredText) -> bytes:
+    """gzip bytes for a stored value, reusing the stored compression when there is one"""
+    if isinstance(value, CompressedText):
+        return value.data
+    return gzip.compress(value.encode("utf-8"), compresslevel=MEMO_COMPRESSION_LEVEL, mtime=0)
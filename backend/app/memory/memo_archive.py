@@ -0,0 +1,340 @@
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import re
+import struct
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..monitoring import Counter, Gauge
+from .compression import CompressedText, MEMO_COMPRESSION_LEVEL
+
+# Versions per credit request kept as full blobs by compaction; older ones become deltas
+MEMO_ARCHIVE_KEEP_FULL_VERSIONS = int(os.getenv("MEMO_ARCHIVE_KEEP_FULL_VERSIONS", "2"))
+# The archive is kept in `memos.log` in the session store directory, so sessions restored after a
+# restart find their memos and version history; without a store it lives in memory only
+MEMO_ARCHIVE_DIR = os.getenv("SESSION_STORE_DIR", "")
+
+LOG_FILE = "memos.log"
+# record kind, payload length
+RECORD_HEADER = struct.Struct("<BI")
+# Full blob: hash, HTML size, gzip HTML; delta: hash, base hash, packed ops; version: JSON
+RECORD_BLOB, RECORD_DELTA, RECORD_VERSION = 1, 2, 3
+BLOB_SIZE = struct.Struct("<I")
+HASH_LENGTH = 64
+
+# Memo HTML is usually a single line, so diffs and deltas work on tag-sized tokens instead of lines
+TOKEN_PATTERN = re.compile(r"[^>]*>|[^>]+$")
+
+MEMO_ARCHIVE_WRITES = Counter(
+    "agentic_lender_memo_archive_writes_total",
+    "Memos written to the archive, by whether the content was already stored",
+    ["result"],
+)
+MEMO_ARCHIVE_BYTES = Gauge(
+    "agentic_lender_memo_archive_bytes",
+    "Bytes held by the memo archive, by storage form",
+    ["form"],
+)
+
+def content_hash(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+def _tokens(html: str) -> List[str]:
+    return TOKEN_PATTERN.findall(html)
+
+def _pack(value: Any) -> bytes:
+    return gzip.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), compresslevel=MEMO_COMPRESSION_LEVEL, mtime=0)
+
+def _unpack(data: bytes) -> Any:
+    return json.loads(gzip.decompress(data).decode("utf-8"))
+
+def make_delta(base: str, target: str) -> List[Any]:
+    """Delta that rebuilds `target` from `base`: [start, end] copies base tokens, strings are literal text"""
+    base_tokens, target_tokens = _tokens(base), _tokens(target)
+    ops: List[Any] = []
+    matcher = difflib.SequenceMatcher(None, base_tokens, target_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(target_tokens[j1:j2]))
+    return ops
+
+def apply_delta(base: str, ops: List[Any]) -> str:
+    base_tokens = _tokens(base)
+    return "".join("".join(base_tokens[op[0]:op[1]]) if isinstance(op, list) else op for op in ops)
+
+class MemoArchive:
+    """
+    Content-addressed memo store with per-credit-request version history.
+    Each distinct memo is stored once (gzip, keyed by SHA-256) however many sessions or requests
+    produced it; a request's history is a list of versions pointing at those hashes, so the latest
+    memo is a dict lookup. compact() rewrites older versions still held in full as deltas against
+    the next version, keeping only the newest few versions of each request as full blobs.
+    With a directory, new blobs and versions are appended to `memos.log` and read back on start;
+    compact() rewrites the log with the compacted blobs.
+    """
+
+    def __init__(self, keep_full_versions: int = MEMO_ARCHIVE_KEEP_FULL_VERSIONS, directory: str = MEMO_ARCHIVE_DIR):
+        self.keep_full_versions = max(1, keep_full_versions)
+        self.directory = directory
+        # hash -> full blob, or (base hash, packed delta) once compacted
+        self._blobs: Dict[str, CompressedText] = {}
+        self._deltas: Dict[str, Tuple[str, bytes]] = {}
+        self._versions: Dict[str, List[Dict[str, Any]]] = {}
+        self._full_bytes = 0
+        self._delta_bytes = 0
+        self._log = None
+        if directory:
+            self._open()
+
+    @property
+    def persistent(self) -> bool:
+        return bool(self.directory)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(LOG_FILE)
+        data = b""
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+        position = 0
+        while position + RECORD_HEADER.size <= len(data):
+            kind, length = RECORD_HEADER.unpack_from(data, position)
+            if position + RECORD_HEADER.size + length > len(data):
+                break
+            start = position + RECORD_HEADER.size
+            self._apply(kind, data[start:start + length])
+            position = start + length
+        if position < len(data):
+            # A torn record at the end (crash mid-append): its memo or version was never referenced
+            with open(path, "r+b") as f:
+                f.truncate(position)
+        self._log = open(path, "ab")
+        self._update_size_metrics()
+        print(f"Memo archive loaded: {len(self._versions)} requests, {len(self._blobs) + len(self._deltas)} memos")
+
+    def _apply(self, kind: int, payload: bytes):
+        if kind == RECORD_BLOB:
+            digest = payload[:HASH_LENGTH].decode("ascii")
+            size, = BLOB_SIZE.unpack_from(payload, HASH_LENGTH)
+            self._blobs[digest] = CompressedText(payload[HASH_LENGTH + BLOB_SIZE.size:], size)
+            self._full_bytes += len(self._blobs[digest].data)
+        elif kind == RECORD_DELTA:
+            digest = payload[:HASH_LENGTH].decode("ascii")
+            base_hash = payload[HASH_LENGTH:2 * HASH_LENGTH].decode("ascii")
+            self._deltas[digest] = (base_hash, payload[2 * HASH_LENGTH:])
+            self._delta_bytes += len(payload) - 2 * HASH_LENGTH
+        elif kind == RECORD_VERSION:
+            version = json.loads(payload.decode("utf-8"))
+            self._versions.setdefault(version.pop("requestId"), []).append(version)
+
+    @staticmethod
+    def _record(kind: int, payload: bytes) -> bytes:
+        return RECORD_HEADER.pack(kind, len(payload)) + payload
+
+    @staticmethod
+    def _blob_record(digest: str, blob: CompressedText) -> bytes:
+        return MemoArchive._record(RECORD_BLOB, digest.encode("ascii") + BLOB_SIZE.pack(blob.size) + blob.data)
+
+    @staticmethod
+    def _version_record(request_id: str, version: Dict[str, Any]) -> bytes:
+        return MemoArchive._record(RECORD_VERSION, json.dumps(dict(version, requestId=request_id), separators=(",", ":")).encode("utf-8"))
+
+    def _append(self, record: bytes):
+        if self._log is not None:
+            self._log.write(record)
+            self._log.flush()
+
+    def _store_full(self, digest: str, html: str):
+        raw = html.encode("utf-8")
+        self._blobs[digest] = CompressedText(gzip.compress(raw, compresslevel=MEMO_COMPRESSION_LEVEL, mtime=0), len(raw))
+        self._full_bytes += len(self._blobs[digest].data)
+        self._append(self._blob_record(digest, self._blobs[digest]))
+
+    def put(self, request_id: str, html: str, source: str = "chat", chat_id: Optional[str] = None) -> Dict[str, Any]:
+        """Archive a memo; returns the reference ({requestId, version, hash}) sessions keep instead of the HTML"""
+        digest = content_hash(html)
+        history = self._versions.setdefault(request_id, [])
+        if history and history[-1]["hash"] == digest:
+            MEMO_ARCHIVE_WRITES.inc(result="unchanged")
+            return self._ref(request_id, history[-1])
+
+        if digest in self._blobs or digest in self._deltas:
+            MEMO_ARCHIVE_WRITES.inc(result="deduplicated")
+        else:
+            MEMO_ARCHIVE_WRITES.inc(result="stored")
+            self._store_full(digest, html)
+
+        version = {
+            "version": len(history) + 1,
+            "hash": digest,
+            "size": len(html.encode("utf-8")),
+            "source": source,
+            "chat_id": chat_id,
+            "created_at": datetime.now().isoformat(),
+        }
+        history.append(version)
+        # The blob is in the log before the version that points at it
+        self._append(self._version_record(request_id, version))
+        self._update_size_metrics()
+        return self._ref(request_id, version)
+
+    def restore(self, digest: str, html: str):
+        """Make a memo known again (e.g. for a session restored after a restart) without adding a version"""
+        if digest in self._blobs or digest in self._deltas or content_hash(html) != digest:
+            return
+        self._store_full(digest, html)
+        self._update_size_metrics()
+
+    @staticmethod
+    def _ref(request_id: str, version: Dict[str, Any]) -> Dict[str, Any]:
+        return {"requestId": request_id, "version": version["version"], "hash": version["hash"]}
+
+    def get_stored(self, digest: str) -> Optional[CompressedText]:
+        """Memo as stored gzip (rebuilding a compacted version), or None when unknown"""
+        blob = self._blobs.get(digest)
+        if blob is not None:
+            return blob
+        html = self.get_html(digest)
+        if html is None:
+            return None
+        raw = html.encode("utf-8")
+        return CompressedText(gzip.compress(raw, compresslevel=MEMO_COMPRESSION_LEVEL, mtime=0), len(raw))
+
+    def get_html(self, digest: str) -> Optional[str]:
+        blob = self._blobs.get(digest)
+        if blob is not None:
+            return blob.text()
+        delta = self._deltas.get(digest)
+        if delta is None:
+            return None
+        base_hash, packed_ops = delta
+        base = self.get_html(base_hash)
+        return apply_delta(base, _unpack(packed_ops)) if base is not None else None
+
+    def versions(self, request_id: str) -> List[Dict[str, Any]]:
+        return [dict(version) for version in self._versions.get(request_id, [])]
+
+    def get_version(self, request_id: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Metadata and HTML of one version (the latest when `version` is None)"""
+        history = self._versions.get(request_id)
+        if not history:
+            return None
+        if version is None:
+            entry = history[-1]
+        elif 1 <= version <= len(history):
+            entry = history[version - 1]
+        else:
+            return None
+        return {**entry, "credit_request_id": request_id, "html": self.get_html(entry["hash"])}
+
+    def diff(self, request_id: str, from_version: int, to_version: int) -> Optional[str]:
+        """Unified diff between two versions, one tag per line"""
+        old = self.get_version(request_id, from_version)
+        new = self.get_version(request_id, to_version)
+        if old is None or new is None:
+            return None
+        lines = difflib.unified_diff(
+            _tokens(old["html"]),
+            _tokens(new["html"]),
+            fromfile=f"{request_id} v{from_version}",
+            tofile=f"{request_id} v{to_version}",
+            lineterm="",
+        )
+        return "\n".join(lines)
+
+    def compact(self, pinned_hashes: Optional[set] = None) -> Dict[str, int]:
+        """
+        Store older versions as deltas against the following version. The newest
+        `keep_full_versions` of each request, the latest memo archived for each chat (the
+        one its session shows, whether or not the session is loaded) and `pinned_hashes`
+        stay full so serving them never needs a rebuild.
+        """
+        pinned = set(pinned_hashes or ())
+        keep: set = set(pinned)
+        latest_by_chat: Dict[str, Tuple[str, str]] = {}
+        for history in self._versions.values():
+            keep.update(version["hash"] for version in history[-self.keep_full_versions:])
+            for version in history:
+                chat_id = version.get("chat_id")
+                if chat_id and version["created_at"] >= latest_by_chat.get(chat_id, ("", ""))[0]:
+                    latest_by_chat[chat_id] = (version["created_at"], version["hash"])
+        keep.update(digest for _, digest in latest_by_chat.values())
+
+        compacted = 0
+        saved = 0
+        for history in self._versions.values():
+            for older, newer in zip(history, history[1:]):
+                digest = older["hash"]
+                if digest in keep or digest not in self._blobs or digest == newer["hash"]:
+                    continue
+                # Never chain a delta onto itself through a later repeat of the same content
+                if self._depends_on(newer["hash"], digest):
+                    continue
+                html = self._blobs[digest].text()
+                packed = _pack(make_delta(self.get_html(newer["hash"]), html))
+                if len(packed) >= len(self._blobs[digest].data):
+                    continue
+                saved += len(self._blobs[digest].data) - len(packed)
+                self._full_bytes -= len(self._blobs[digest].data)
+                self._delta_bytes += len(packed)
+                self._deltas[digest] = (newer["hash"], packed)
+                del self._blobs[digest]
+                compacted += 1
+        if compacted:
+            self._rewrite_log()
+        self._update_size_metrics()
+        return {"compacted_versions": compacted, "bytes_saved": saved, **self.size_stats()}
+
+    def _rewrite_log(self):
+        """Replace the log with the archive's current blobs, deltas and versions (dropping superseded full blobs)"""
+        if self._log is None:
+            return
+        path = self._path(LOG_FILE)
+        with open(f"{path}.tmp", "wb") as f:
+            for digest, blob in self._blobs.items():
+                f.write(self._blob_record(digest, blob))
+            for digest, (base_hash, packed) in self._deltas.items():
+                f.write(self._record(RECORD_DELTA, digest.encode("ascii") + base_hash.encode("ascii") + packed))
+            for request_id, history in self._versions.items():
+                for version in history:
+                    f.write(self._version_record(request_id, version))
+            f.flush()
+            os.fsync(f.fileno())
+        self._log.close()
+        os.replace(f"{path}.tmp", path)
+        self._log = open(path, "ab")
+
+    def _depends_on(self, digest: str, target: str) -> bool:
+        while digest in self._deltas:
+            digest = self._deltas[digest][0]
+            if digest == target:
+                return True
+        return False
+
+    def size_stats(self) -> Dict[str, int]:
+        return {
+            "requests": len(self._versions),
+            "versions": sum(len(history) for history in self._versions.values()),
+            "unique_memos": len(self._blobs) + len(self._deltas),
+            "full_blobs": len(self._blobs),
+            "delta_blobs": len(self._deltas),
+            "full_bytes": self._full_bytes,
+            "delta_bytes": self._delta_bytes,
+            "logical_bytes": sum(version["size"] for history in self._versions.values() for version in history),
+            "persistent": self.persistent,
+        }
+
+    def _update_size_metrics(self):
+        MEMO_ARCHIVE_BYTES.set(self._full_bytes, form="full")
+        MEMO_ARCHIVE_BYTES.set(self._delta_bytes, form="delta")
+
+memo_archive = MemoArchive()
@@ -0,0 +1,142 @@
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from ..monitoring import Counter
+from .compression import MEMO_COMPRESSION_LEVEL
+from .session_store import SESSION_STORE_DIR
+
+# Messages kept in a session (newest first); older ones are moved to cold storage in batches
+SESSION_HOT_MESSAGES = int(os.getenv("SESSION_HOT_MESSAGES", "200"))
+# Messages older than this are archived even below SESSION_HOT_MESSAGES (0 disables the age limit)
+SESSION_ARCHIVE_AFTER_DAYS = float(os.getenv("SESSION_ARCHIVE_AFTER_DAYS", "0"))
+# Fewest messages archived at once, so each chunk compresses well and sessions are not rewritten every turn
+SESSION_ARCHIVE_MIN_BATCH = int(os.getenv("SESSION_ARCHIVE_MIN_BATCH", "50"))
+# Decoded chunks kept for clients paging back through a history
+MESSAGE_ARCHIVE_CACHE_CHUNKS = int(os.getenv("MESSAGE_ARCHIVE_CACHE_CHUNKS", "64"))
+
+COLD_FILE = "messages.cold"
+# Request IDs listed in a session's archive digest
+DIGEST_MAX_REQUEST_IDS = 20
+
+MESSAGES_ARCHIVED = Counter(
+    "agentic_lender_session_messages_archived_total",
+    "Chat messages moved from sessions to cold storage",
+)
+MESSAGE_CHUNK_LOADS = Counter(
+    "agentic_lender_session_message_chunk_loads_total",
+    "Archived message chunks read back for history paging, by whether they were cached",
+    ["result"],
+)
+
+def _age_cutoff() -> Optional[str]:
+    if SESSION_ARCHIVE_AFTER_DAYS <= 0:
+        return None
+    return (datetime.now() - timedelta(days=SESSION_ARCHIVE_AFTER_DAYS)).isoformat()
+
+def messages_to_archive(messages: List[Dict[str, Any]]) -> int:
+    """How many of the oldest messages the compaction policy moves to cold storage (0 below the batch size)"""
+    count = max(0, len(messages) - SESSION_HOT_MESSAGES)
+    cutoff = _age_cutoff()
+    if cutoff is not None:
+        while count < len(messages) and (messages[count].get("timestamp") or "") < cutoff:
+            count += 1
+    return count if count >= SESSION_ARCHIVE_MIN_BATCH else 0
+
+class MessageArchive:
+    """
+    Cold storage for old chat messages: gzip JSON chunks, appended to `messages.cold` next to the
+    session store (or kept in memory without one). Sessions keep a reference per chunk (position,
+    count, time range, location) and a digest of everything archived, so reading a session only
+    touches the hot messages and a chunk is decompressed when a client pages back into it.
+    """
+
+    def __init__(self, directory: str = SESSION_STORE_DIR, cache_chunks: int = MESSAGE_ARCHIVE_CACHE_CHUNKS):
+        self.directory = directory
+        self.cache_chunks = max(0, cache_chunks)
+        self._lock = threading.Lock()
+        self._chunks: List[bytes] = []
+        self._cache: "OrderedDict[Any, List[Dict[str, Any]]]" = OrderedDict()
+        self._stored_bytes = 0
+        self._log = None
+        self._reader = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, COLD_FILE)
+            self._log = open(path, "ab")
+            self._reader = open(path, "rb")
+            self._stored_bytes = self._log.tell()
+
+    def put(self, messages: List[Dict[str, Any]], first_index: int) -> Dict[str, Any]:
+        """Store a chunk of consecutive messages starting at history position `first_index`; returns its reference"""
+        data = gzip.compress(json.dumps(messages, separators=(",", ":")).encode("utf-8"), compresslevel=MEMO_COMPRESSION_LEVEL, mtime=0)
+        ref: Dict[str, Any] = {
+            "first": first_index,
+            "count": len(messages),
+            "from": messages[0].get("timestamp"),
+            "to": messages[-1].get("timestamp"),
+        }
+        with self._lock:
+            if self._log is not None:
+                ref["offset"] = self._log.tell()
+                self._log.write(data)
+                self._log.flush()
+            else:
+                ref["chunk"] = len(self._chunks)
+                self._chunks.append(data)
+            ref["length"] = len(data)
+            self._stored_bytes += len(data)
+        MESSAGES_ARCHIVED.inc(len(messages))
+        return ref
+
+    def get(self, ref: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Messages of an archived chunk"""
+        key = ("chunk", ref["chunk"]) if "chunk" in ref else ("offset", ref["offset"])
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                MESSAGE_CHUNK_LOADS.inc(result="cached")
+                return cached
+            if "chunk" in ref:
+                data = self._chunks[ref["chunk"]]
+            else:
+                self._reader.seek(ref["offset"])
+                data = self._reader.read(ref["length"])
+        messages = json.loads(gzip.decompress(data).decode("utf-8"))
+        MESSAGE_CHUNK_LOADS.inc(result="loaded")
+        with self._lock:
+            if self.cache_chunks:
+                self._cache[key] = messages
+                while len(self._cache) > self.cache_chunks:
+                    self._cache.popitem(last=False)
+        return messages
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "storage": os.path.join(self.directory, COLD_FILE) if self._log is not None else "memory",
+                "stored_bytes": self._stored_bytes,
+                "cached_chunks": len(self._cache),
+                "hot_messages": SESSION_HOT_MESSAGES,
+                "archive_after_days": SESSION_ARCHIVE_AFTER_DAYS,
+                "min_batch": SESSION_ARCHIVE_MIN_BATCH,
+            }
+
+def update_archive_digest(digest: Optional[Dict[str, Any]], messages: List[Dict[str, Any]], request_ids: List[str]) -> Dict[str, Any]:
+    """Running summary of a session's archived messages: counts, time range and credit requests discussed"""
+    digest = dict(digest or {"messageCount": 0, "userMessages": 0, "agentMessages": 0, "from": None, "to": None, "requestIds": []})
+    digest["messageCount"] += len(messages)
+    digest["userMessages"] += sum(1 for message in messages if message.get("sender") == "user")
+    digest["agentMessages"] += sum(1 for message in messages if message.get("sender") == "agent")
+    digest["from"] = digest["from"] or messages[0].get("timestamp")
+    digest["to"] = messages[-1].get("timestamp")
+    known = list(dict.fromkeys(digest["requestIds"] + request_ids))
+    digest["requestIds"] = known[-DIGEST_MAX_REQUEST_IDS:]
+    return digest
+
+message_archive = MessageArchive()
@@ -0,0 +1,193 @@
+import html
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from ..monitoring import Histogram
+from ..services.request_ids import extract_request_ids
+from .session_store import SESSION_STORE_DIR
+
+INDEX_FILE = "search.db"
+# SQLite file of the index; defaults to one next to the session store, so sessions and their
+# archived messages stay searchable across restarts (":memory:" without a store)
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH") or (os.path.join(SESSION_STORE_DIR, INDEX_FILE) if SESSION_STORE_DIR else ":memory:")
+
+STYLE_BLOCK_PATTERN = re.compile(r"<(style|script)\b[^>]*>.*?</\1>", re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+QUERY_TERM_PATTERN = re.compile(r"[\w][\w-]*")
+
+SEARCH_DURATION = Histogram(
+    "agentic_lender_search_duration_seconds",
+    "Full-text search query latency",
+)
+
+def html_to_text(content: str) -> str:
+    """Visible text of memo HTML (styles, scripts and tags stripped)"""
+    text = TAG_PATTERN.sub(" ", STYLE_BLOCK_PATTERN.sub(" ", content))
+    return " ".join(html.unescape(text).split())
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    FTS5 query for free text: every term must match (terms are quoted, so request IDs and
+    punctuation are safe) and the last term also matches as a prefix for search-as-you-type
+    """
+    terms = QUERY_TERM_PATTERN.findall(query)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+class SearchIndex:
+    """
+    Incrementally maintained SQLite FTS5 index over chat messages and session memos.
+    Only messages added since the last update are indexed, and a session's memo document is
+    replaced only when its memo changes, so indexing cost stays proportional to what changed.
+    Results are ranked with BM25 (request IDs and borrower names weigh more than body text).
+    """
+
+    def __init__(self, path: str = SEARCH_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5("
+            "chat_id UNINDEXED, kind UNINDEXED, ref UNINDEXED, timestamp UNINDEXED, "
+            "request_ids, borrower, body, tokenize='porter unicode61')"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS indexed_sessions ("
+            "chat_id TEXT PRIMARY KEY, message_count INTEGER NOT NULL, memo_key TEXT)"
+        )
+        self._db.commit()
+
+    def index_session(
+        self,
+        chat_id: str,
+        session: Dict[str, Any],
+        memo_key: Optional[str] = None,
+        load_memo_text: Optional[Callable[[], Optional[str]]] = None,
+    ):
+        """
+        Index what changed in a session since the last call: new messages, and the memo when
+        `memo_key` (e.g. the archive hash) differs from the indexed one. `load_memo_text` is
+        only called in that case, so unchanged memos are never decompressed.
+        """
+        messages = session.get("messages") or []
+        # Messages moved to cold storage were indexed before they left the session
+        archived = session["archiveDigest"]["messageCount"] if session.get("archiveDigest") else 0
+        summary_data = session.get("summaryData") if isinstance(session.get("summaryData"), dict) else {}
+        # Every credit request a combined memo covers, else the memo's (or the session's) request
+        request_ids = " ".join(summary_data.get("creditRequestIds") or []) or summary_data.get("creditRequestId") or session.get("selectedRequestId") or ""
+        borrower = summary_data.get("borrowerName") or ""
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT message_count, memo_key FROM indexed_sessions WHERE chat_id = ?", (chat_id,)
+            ).fetchone()
+            indexed_count, indexed_memo_key = row if row else (0, None)
+            if indexed_count > archived + len(messages):
+                # History was replaced rather than appended to: reindex the session's messages
+                self._db.execute("DELETE FROM documents WHERE chat_id = ? AND kind = 'message'", (chat_id,))
+                indexed_count = 0
+
+            self._db.executemany(
+                "INSERT INTO documents (chat_id, kind, ref, timestamp, request_ids, borrower, body) "
+                "VALUES (?, 'message', ?, ?, ?, ?, ?)",
+                [
+                    (
+                        chat_id,
+                        message.get("id", ""),
+                        message.get("timestamp", ""),
+                        " ".join(extract_request_ids(message.get("text", ""))),
+                        "",
+                        message.get("text", ""),
+                    )
+                    for message in messages[max(0, indexed_count - archived):]
+                ],
+            )
+
+            memo_text = None
+            if memo_key and memo_key != indexed_memo_key and load_memo_text is not None:
+                memo_text = load_memo_text()
+            if memo_text is not None:
+                self._db.execute("DELETE FROM documents WHERE chat_id = ? AND kind = 'memo'", (chat_id,))
+                self._db.execute(
+                    "INSERT INTO documents (chat_id, kind, ref, timestamp, request_ids, borrower, body) "
+                    "VALUES (?, 'memo', ?, ?, ?, ?, ?)",
+                    (chat_id, memo_key or "", session.get("updated_at", ""), request_ids, borrower, memo_text),
+                )
+                indexed_memo_key = memo_key
+
+            self._db.execute(
+                "INSERT INTO indexed_sessions (chat_id, message_count, memo_key) VALUES (?, ?, ?) "
+                "ON CONFLICT(chat_id) DO UPDATE SET message_count = excluded.message_count, memo_key = excluded.memo_key",
+                (chat_id, archived + len(messages), indexed_memo_key),
+            )
+            self._db.commit()
+
+    def remove_session(self, chat_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM documents WHERE chat_id = ?", (chat_id,))
+            self._db.execute("DELETE FROM indexed_sessions WHERE chat_id = ?", (chat_id,))
+            self._db.commit()
+
+    def search(self, query: str, limit: int = 20, offset: int = 0, kind: Optional[str] = None) -> Dict[str, Any]:
+        """Ranked, paginated matches with highlighted snippets"""
+        started = time.perf_counter()
+        match = build_match_query(query)
+        limit = max(1, min(limit, 100))
+        offset = max(0, offset)
+        if match is None:
+            return {"query": query, "total": 0, "limit": limit, "offset": offset, "results": []}
+
+        kind_filter = "AND kind = ?" if kind else ""
+        params: List[Any] = [match] + ([kind] if kind else [])
+        with self._lock:
+            total = self._db.execute(
+                f"SELECT count(*) FROM documents WHERE documents MATCH ? {kind_filter}", params
+            ).fetchone()[0]
+            rows = self._db.execute(
+                "SELECT chat_id, kind, ref, timestamp, request_ids, borrower, "
+                "snippet(documents, -1, '<mark>', '</mark>', '…', 16), bm25(documents, 0, 0, 0, 0, 5.0, 3.0, 1.0) AS score "
+                f"FROM documents WHERE documents MATCH ? {kind_filter} ORDER BY score LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        SEARCH_DURATION.observe(time.perf_counter() - started)
+
+        return {
+            "query": query,
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+            "results": [
+                {
+                    "chatId": chat_id,
+                    "kind": doc_kind,
+                    "ref": ref,
+                    "timestamp": timestamp,
+                    "credit_request_ids": request_ids.split() if request_ids else [],
+                    "borrower": borrower or None,
+                    "snippet": snippet,
+                    # bm25() is lower-is-better; flip it so higher means more relevant
+                    "score": round(-score, 4),
+                }
+                for chat_id, doc_kind, ref, timestamp, request_ids, borrower, snippet, score in rows
+            ],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = self._db.execute("SELECT count(*) FROM indexed_sessions").fetchone()[0]
+            by_kind = dict(self._db.execute("SELECT kind, count(*) FROM documents GROUP BY kind").fetchall())
+        return {"path": self.path, "sessions": sessions, "documents": by_kind}
+
+search_index = SearchIndex()
@@ -1,8 +1,33 @@
-from typing import Dict, Any, List
+import hashlib
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
-# In-memory storage for chat sessions (in production, use a database)
-chat_sessions: Dict[str, Dict[str, Any]] = {}
+from .compression import CompressedText, StoredText, compress_text, expand_text
+from .memo_archive import memo_archive
+from .message_archive import message_archive, messages_to_archive, update_archive_digest
+from ..services.request_ids import extract_request_ids
+from .search_index import html_to_text, search_index
+from .session_store import session_store
+
+class SessionCache(dict):
+    """
+    Chat sessions loaded in this worker. Sessions saved in the session store by an earlier run
+    count as present and are read from disk on first access, so a restart loads nothing up front;
+    iteration and len() only cover loaded sessions.
+    """
+
+    def __missing__(self, chat_id: str) -> Dict[str, Any]:
+        session = session_store.load(chat_id)
+        if session is None:
+            raise KeyError(chat_id)
+        self[chat_id] = session
+        return session
+
+    def __contains__(self, chat_id: object) -> bool:
+        return dict.__contains__(self, chat_id) or (isinstance(chat_id, str) and session_store.contains(chat_id))
+
+# Chat sessions, persisted to the session store when SESSION_STORE_DIR is set
+chat_sessions: Dict[str, Dict[str, Any]] = SessionCache()
 
 def get_chat_session(chat_id: str) -> Dict[str, Any]:
     """Get or create a chat session"""
@@ -17,12 +42,112 @@ def get_chat_session(chat_id: str) -> Dict[str, Any]:
     return chat_sessions[chat_id]
 
 def update_chat_session(chat_id: str, messages: List[Dict], summary_data: Any = None, selected_request_id: str = ""):
-    """Update a chat session with new data"""
+    """Update a chat session with new data (memo HTML in summary_data goes to the memo archive)"""
     session = get_chat_session(chat_id)
     session["messages"] = messages
     session["updated_at"] = datetime.now().isoformat()
     if summary_data is not None:
-        session["summaryData"] = summary_data
+        session["summaryData"] = store_summary_data(chat_id, summary_data)
     if selected_request_id:
         session["selectedRequestId"] = selected_request_id
-    chat_sessions[chat_id] = session
\ No newline at end of file
+    chat_sessions[chat_id] = session
+    compact_session(session)
+    session_store.save(chat_id, session)
+    _index_session(chat_id, session)
+
+def archived_message_count(session: Dict[str, Any]) -> int:
+    """Messages of the session moved to cold storage (they precede session["messages"])"""
+    digest = session.get("archiveDigest")
+    return digest["messageCount"] if digest else 0
+
+def compact_session(session: Dict[str, Any]) -> int:
+    """
+    Move the session's oldest messages to cold storage when the compaction policy says so,
+    leaving a chunk reference and an updated digest in the session. Returns the messages moved.
+    """
+    messages = session["messages"]
+    count = messages_to_archive(messages)
+    if not count:
+        return 0
+    archived = messages[:count]
+    ref = message_archive.put(archived, archived_message_count(session))
+    request_ids = [request_id for message in archived for request_id in extract_request_ids(message.get("text", ""))]
+    session.setdefault("archivedMessages", []).append(ref)
+    session["archiveDigest"] = update_archive_digest(session.get("archiveDigest"), archived, request_ids)
+    # In place, so callers holding the list see the compacted history
+    del messages[:count]
+    return count
+
+def get_session_messages(session: Dict[str, Any], before: Optional[int] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Page of a session's history ending just before position `before` (the end when None), with
+    archived messages read back from cold storage as needed. Returns (messages, first position).
+    """
+    archived = archived_message_count(session)
+    end = archived + len(session["messages"])
+    if before is not None:
+        end = max(0, min(before, end))
+    start = max(0, end - max(1, limit))
+    page: List[Dict[str, Any]] = []
+    for ref in session.get("archivedMessages") or []:
+        first, last = ref["first"], ref["first"] + ref["count"]
+        if last > start and first < min(end, archived):
+            page.extend(message_archive.get(ref)[max(start, first) - first:min(end, last) - first])
+    page.extend(session["messages"][max(0, start - archived):max(0, end - archived)])
+    return page, start
+
+def _index_session(chat_id: str, session: Dict[str, Any]):
+    """
+    Add the session's new messages and changed memo to the full-text index: an archived memo by
+    its archive hash, a memo kept in the session (e.g. the combined memo of several credit
+    requests) by a hash of its stored bytes
+    """
+    summary_data = session.get("summaryData")
+    memo_ref = summary_data.get("memoRef") if isinstance(summary_data, dict) else None
+    stored = summary_data.get("htmlSummary") if isinstance(summary_data, dict) else None
+    if memo_ref:
+        memo_hash = memo_ref["hash"]
+        search_index.index_session(chat_id, session, memo_hash, lambda: html_to_text(memo_archive.get_html(memo_hash) or ""))
+    elif isinstance(stored, (str, CompressedText)) and stored:
+        # Compressed bytes are deterministic (mtime=0), so hashing them avoids decompressing unchanged memos
+        memo_key = hashlib.sha256(stored.data if isinstance(stored, CompressedText) else stored.encode("utf-8")).hexdigest()
+        search_index.index_session(chat_id, session, memo_key, lambda: html_to_text(expand_text(stored)))
+    else:
+        search_index.index_session(chat_id, session)
+
+def store_summary_data(chat_id: str, summary_data: Any) -> Any:
+    """
+    Session form of summaryData: memos for a credit request are archived and replaced by a
+    `memoRef`; any other HTML is kept compressed in place
+    """
+    if not isinstance(summary_data, dict) or not isinstance(summary_data.get("htmlSummary"), str):
+        return summary_data
+    stored = dict(summary_data)
+    request_id = stored.get("creditRequestId")
+    if request_id:
+        stored["memoRef"] = memo_archive.put(request_id, stored.pop("htmlSummary"), source="chat", chat_id=chat_id)
+    else:
+        stored["htmlSummary"] = compress_text(stored["htmlSummary"])
+    return stored
+
+def get_session_memo(session: Dict[str, Any]) -> Optional[StoredText]:
+    """The session's memo HTML as stored (archive blob, compressed text or string), or None"""
+    summary_data = session.get("summaryData")
+    if not isinstance(summary_data, dict):
+        return None
+    memo_ref = summary_data.get("memoRef")
+    if memo_ref:
+        return memo_archive.get_stored(memo_ref["hash"])
+    return summary_data.get("htmlSummary")
+
+def expand_summary_data(summary_data: Any) -> Any:
+    """Copy of a session's summaryData with the memo HTML as a plain string, for JSON responses"""
+    if not isinstance(summary_data, dict):
+        return summary_data
+    expanded = dict(summary_data)
+    memo_ref = expanded.get("memoRef")
+    if memo_ref:
+        expanded["htmlSummary"] = memo_archive.get_html(memo_ref["hash"])
+    elif isinstance(expanded.get("htmlSummary"), CompressedText):
+        expanded["htmlSummary"] = expanded["htmlSummary"].text()
+    return expanded
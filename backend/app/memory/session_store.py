@@ -0,0 +1,463 @@
+import gzip
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from ..monitoring import Counter
+from .compression import CompressedText, compress_text
+from .memo_archive import memo_archive
+
+# Directory for the session log and its index; empty keeps sessions in memory only (one directory per worker)
+SESSION_STORE_DIR = os.getenv("SESSION_STORE_DIR", "")
+# Journal entries after which the snapshot index is rewritten with them merged in
+SESSION_INDEX_CHECKPOINT_RECORDS = int(os.getenv("SESSION_INDEX_CHECKPOINT_RECORDS", "10000"))
+# A checkpoint rewrites the log with only the latest record of each session once the log is this many
+# times the size of those records (superseded records are garbage; 0 disables compaction)...
+SESSION_LOG_COMPACT_RATIO = float(os.getenv("SESSION_LOG_COMPACT_RATIO", "2"))
+# ...and at least this large, so small stores are not rewritten over and over
+SESSION_LOG_COMPACT_MIN_BYTES = int(float(os.getenv("SESSION_LOG_COMPACT_MIN_MB", "64")) * 1024 * 1024)
+
+LOG_FILE = "sessions.log"
+INDEX_FILE = "sessions.idx"
+JOURNAL_FILE = "sessions.journal"
+# Suffix of the journal being merged by a running checkpoint; replayed before the journal if a worker stops mid-merge
+MERGING_SUFFIX = ".merging"
+# Log and journal files of any generation (sessions.log, sessions.3.log, sessions.3.journal.merging, ...)
+GENERATION_FILE_PATTERN = re.compile(r"^sessions(?:\.(\d+))?\.(?:log|journal)(?:\.merging)?$")
+
+INDEX_MAGIC = b"ALSI"
+INDEX_VERSION = 2
+INDEX_PREFIX = struct.Struct("<4sI")
+# magic, version, record count (version 1, always log generation 0)
+INDEX_HEADER_V1 = struct.Struct("<4sIQ")
+# magic, version, record count, log generation
+INDEX_HEADER = struct.Struct("<4sIQQ")
+# chat ID key (BLAKE2b-128), updated_at (epoch seconds), message count, log offset, record length
+INDEX_RECORD = struct.Struct("<16sdIQI")
+
+IndexEntry = Tuple[bytes, float, int, int, int]
+
+SESSION_STORE_LOADS = Counter(
+    "agentic_lender_session_store_loads_total",
+    "Chat sessions looked up in the on-disk session store, by outcome",
+    ["result"],
+)
+
+def generation_file(name: str, generation: int) -> str:
+    """File name of a log or journal generation; compaction starts a new one (generation 0 keeps the plain name)"""
+    if not generation:
+        return name
+    stem, extension = os.path.splitext(name)
+    return f"{stem}.{generation}{extension}"
+
+def session_key(chat_id: str) -> bytes:
+    return hashlib.blake2b(chat_id.encode("utf-8"), digest_size=16).digest()
+
+def _timestamp(value: Any) -> float:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+def encode_session(chat_id: str, session: Dict[str, Any]) -> bytes:
+    """
+    Gzip record of a session. The memo archive keeps memos next to the store, so a `memoRef` is
+    enough; an archive held in memory only has its memo HTML written alongside the `memoRef`,
+    so a restored session can still serve its memo after a restart.
+    """
+    record = dict(session, chatId=chat_id)
+    summary_data = session.get("summaryData")
+    if isinstance(summary_data, dict):
+        summary_data = dict(summary_data)
+        if isinstance(summary_data.get("htmlSummary"), CompressedText):
+            summary_data["htmlSummary"] = summary_data["htmlSummary"].text()
+        memo_ref = summary_data.get("memoRef")
+        if memo_ref and not memo_archive.persistent:
+            summary_data["memoHtml"] = memo_archive.get_html(memo_ref["hash"])
+        record["summaryData"] = summary_data
+    return gzip.compress(json.dumps(record, separators=(",", ":")).encode("utf-8"), compresslevel=6, mtime=0)
+
+def decode_session(data: bytes) -> Dict[str, Any]:
+    session = json.loads(gzip.decompress(data).decode("utf-8"))
+    session.pop("chatId", None)
+    summary_data = session.get("summaryData")
+    if isinstance(summary_data, dict):
+        memo_html = summary_data.pop("memoHtml", None)
+        if summary_data.get("memoRef") and memo_html is not None:
+            memo_archive.restore(summary_data["memoRef"]["hash"], memo_html)
+        if isinstance(summary_data.get("htmlSummary"), str):
+            summary_data["htmlSummary"] = compress_text(summary_data["htmlSummary"])
+    return session
+
+class SessionStore:
+    """
+    Append-only on-disk session log with a compact index, for fast warm restarts.
+    Every session update appends a gzip record to the log and a fixed-size index entry
+    (key, updated_at, message count, offset, length) to a small journal. The snapshot index
+    holds the entries sorted by key and is memory-mapped, so opening the store costs the same
+    for a thousand sessions or millions: only the journal is read, and a session is found with a
+    binary search of the mapping and read from the log when first accessed. Once the journal
+    reaches SESSION_INDEX_CHECKPOINT_RECORDS entries it is merged into a new snapshot on a
+    background thread, while new updates go to a fresh journal.
+    Each update supersedes the session's previous record (memo HTML included), so the same
+    checkpoint compacts the log when superseded records dominate it: the latest records are
+    copied to a new log generation, and the snapshot index naming that generation is the commit
+    point, so a worker stopping mid-compaction restarts on the old, still complete, log.
+    """
+
+    def __init__(self, directory: str = SESSION_STORE_DIR, checkpoint_records: int = SESSION_INDEX_CHECKPOINT_RECORDS):
+        self.directory = directory
+        self.checkpoint_records = max(1, checkpoint_records)
+        self._lock = threading.Lock()
+        self._snapshot: Optional[mmap.mmap] = None
+        self._snapshot_count = 0
+        self._journal: Dict[bytes, IndexEntry] = {}
+        self._log = None
+        self._reader = None
+        self._journal_file = None
+        self._checkpoint_lock = threading.Lock()
+        self._checkpoint_thread: Optional[threading.Thread] = None
+        # Log generation named by the snapshot index, and bytes of live records as of the last checkpoint
+        self.generation = 0
+        self._live_bytes = 0
+        self.compactions = 0
+        self.open_seconds = 0.0
+        if directory:
+            self._open()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @property
+    def _log_path(self) -> str:
+        return self._path(generation_file(LOG_FILE, self.generation))
+
+    @property
+    def _journal_path(self) -> str:
+        return self._path(generation_file(JOURNAL_FILE, self.generation))
+
+    def _open(self):
+        started = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+        self._map_snapshot()
+        self._remove_other_generations()
+        self._log = open(self._log_path, "ab")
+        self._reader = open(self._log_path, "rb")
+        journal_path = self._journal_path
+        merging_path = journal_path + MERGING_SUFFIX
+        for path in (merging_path, journal_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            # A torn entry at the end (crash mid-append) is dropped; its session keeps the previous record
+            usable = len(data) - len(data) % INDEX_RECORD.size
+            for entry in INDEX_RECORD.iter_unpack(data[:usable]):
+                self._journal[entry[0]] = entry
+        if os.path.exists(merging_path):
+            # An interrupted checkpoint: carry its entries over into the journal
+            with open(journal_path, "wb") as f:
+                f.write(b"".join(INDEX_RECORD.pack(*entry) for entry in self._journal.values()))
+            os.remove(merging_path)
+        elif os.path.exists(journal_path) and os.path.getsize(journal_path) % INDEX_RECORD.size:
+            with open(journal_path, "r+b") as f:
+                f.truncate(os.path.getsize(journal_path) - os.path.getsize(journal_path) % INDEX_RECORD.size)
+        self._journal_file = open(journal_path, "ab")
+        self.open_seconds = time.perf_counter() - started
+        print(
+            f"Session store opened in {self.open_seconds * 1000:.1f} ms: "
+            f"{self._snapshot_count} indexed sessions, {len(self._journal)} journal entries"
+        )
+
+    def _remove_other_generations(self):
+        """Delete log and journal files of other generations (left by a compaction that stopped before or after its commit)"""
+        for name in os.listdir(self.directory):
+            match = GENERATION_FILE_PATTERN.match(name)
+            if match and int(match.group(1) or 0) != self.generation:
+                os.remove(self._path(name))
+
+    def _map_snapshot(self):
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+        self._snapshot_count = 0
+        self._header_size = INDEX_HEADER.size
+        path = self._path(INDEX_FILE)
+        if not os.path.exists(path) or os.path.getsize(path) <= INDEX_PREFIX.size:
+            return
+        with open(path, "rb") as f:
+            snapshot = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = INDEX_PREFIX.unpack_from(snapshot, 0)
+        if magic == INDEX_MAGIC and version == 1:
+            _, _, count = INDEX_HEADER_V1.unpack_from(snapshot, 0)
+            generation = 0
+            self._header_size = INDEX_HEADER_V1.size
+        elif magic == INDEX_MAGIC and version == INDEX_VERSION:
+            _, _, count, generation = INDEX_HEADER.unpack_from(snapshot, 0)
+        else:
+            snapshot.close()
+            raise ValueError(f"Unsupported session index {path}")
+        self._snapshot = snapshot
+        self._snapshot_count = count
+        self.generation = generation
+
+    def _snapshot_entry(self, position: int) -> IndexEntry:
+        return INDEX_RECORD.unpack_from(self._snapshot, self._header_size + position * INDEX_RECORD.size)
+
+    def _find(self, key: bytes) -> Optional[IndexEntry]:
+        entry = self._journal.get(key)
+        if entry is not None or self._snapshot is None:
+            return entry
+        low, high = 0, self._snapshot_count
+        while low < high:
+            middle = (low + high) // 2
+            offset = self._header_size + middle * INDEX_RECORD.size
+            middle_key = self._snapshot[offset:offset + 16]
+            if middle_key < key:
+                low = middle + 1
+            elif middle_key > key:
+                high = middle
+            else:
+                return self._snapshot_entry(middle)
+        return None
+
+    def _snapshot_entries(self) -> Iterator[IndexEntry]:
+        if self._snapshot is None:
+            return iter(())
+        end = self._header_size + self._snapshot_count * INDEX_RECORD.size
+        return INDEX_RECORD.iter_unpack(self._snapshot[self._header_size:end])
+
+    def contains(self, chat_id: str) -> bool:
+        if not self.enabled:
+            return False
+        with self._lock:
+            return self._find(session_key(chat_id)) is not None
+
+    def metadata(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        """Indexed metadata of a stored session, without reading its record"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._find(session_key(chat_id))
+        if entry is None:
+            return None
+        _, updated_at, message_count, offset, length = entry
+        return {
+            "updated_at": datetime.fromtimestamp(updated_at).isoformat() if updated_at else None,
+            "message_count": message_count,
+            "offset": offset,
+            "length": length,
+        }
+
+    def load(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        """Read a session's latest record from the log, or None when it was never stored"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._find(session_key(chat_id))
+            if entry is None:
+                SESSION_STORE_LOADS.inc(result="miss")
+                return None
+            self._reader.seek(entry[3])
+            data = self._reader.read(entry[4])
+        SESSION_STORE_LOADS.inc(result="loaded")
+        return decode_session(data)
+
+    def save(self, chat_id: str, session: Dict[str, Any]):
+        """Append the session's current state; the previous record is garbage until the log is next compacted"""
+        if not self.enabled:
+            return
+        data = encode_session(chat_id, session)
+        with self._lock:
+            offset = self._log.tell()
+            self._log.write(data)
+            # The record must be in the log before an index entry points at it
+            self._log.flush()
+            # Message count covers the whole history, including messages moved to cold storage
+            message_count = (session.get("archiveDigest") or {}).get("messageCount", 0) + len(session.get("messages") or [])
+            entry = (session_key(chat_id), _timestamp(session.get("updated_at")), message_count, offset, len(data))
+            self._journal_file.write(INDEX_RECORD.pack(*entry))
+            self._journal_file.flush()
+            self._journal[entry[0]] = entry
+            if len(self._journal) >= self.checkpoint_records and self._checkpoint_thread is None:
+                self._checkpoint_thread = threading.Thread(target=self.checkpoint, name="session-index-checkpoint", daemon=True)
+                self._checkpoint_thread.start()
+
+    def checkpoint(self):
+        """Merge the journal into a new snapshot index; updates keep going to a fresh journal meanwhile"""
+        if not self.enabled:
+            return
+        with self._checkpoint_lock:
+            try:
+                with self._lock:
+                    if not self._journal:
+                        return
+                    merging = dict(self._journal)
+                    merging_path = self._journal_path + MERGING_SUFFIX
+                    self._journal_file.close()
+                    os.replace(self._journal_path, merging_path)
+                    self._journal_file = open(self._journal_path, "ab")
+                started = time.perf_counter()
+                # Only checkpoints replace the mapping, so it can be read here without the store lock
+                count, live_bytes = self._write_snapshot(merging)
+                with self._lock:
+                    if self._snapshot is not None:
+                        self._snapshot.close()
+                        self._snapshot = None
+                    os.replace(f"{self._path(INDEX_FILE)}.tmp", self._path(INDEX_FILE))
+                    self._map_snapshot()
+                    os.remove(merging_path)
+                    for key, entry in merging.items():
+                        # Sessions updated during the merge keep their newer journal entry
+                        if self._journal.get(key) == entry:
+                            del self._journal[key]
+                    self._live_bytes = live_bytes
+                    log_bytes = self._log.tell()
+                print(f"Session index checkpoint: {count} sessions in {(time.perf_counter() - started) * 1000:.1f} ms")
+                if (
+                    SESSION_LOG_COMPACT_RATIO > 0
+                    and log_bytes >= SESSION_LOG_COMPACT_MIN_BYTES
+                    and log_bytes > SESSION_LOG_COMPACT_RATIO * live_bytes
+                ):
+                    self._compact()
+            finally:
+                self._checkpoint_thread = None
+
+    def _write_snapshot(self, merging: Dict[bytes, IndexEntry]) -> Tuple[int, int]:
+        """
+        Write the snapshot entries merged with `merging` to a temporary index file;
+        returns the entry count and the bytes of the log records they point at
+        """
+        updated = sorted(merging.values())
+        kept = (entry for entry in self._snapshot_entries() if entry[0] not in merging)
+        count = live_bytes = 0
+        with open(f"{self._path(INDEX_FILE)}.tmp", "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, self.generation))
+            for entry in heapq.merge(kept, updated):
+                f.write(INDEX_RECORD.pack(*entry))
+                count += 1
+                live_bytes += entry[4]
+            f.seek(0)
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, count, self.generation))
+            f.flush()
+            os.fsync(f.fileno())
+        return count, live_bytes
+
+    def compact(self):
+        """Rewrite the log with only the latest record of each session, whatever its garbage ratio"""
+        if not self.enabled:
+            return
+        self.checkpoint()
+        with self._checkpoint_lock:
+            self._compact()
+
+    def _compact(self):
+        """
+        Copy each session's latest record to a new log generation and index it there. Runs with the
+        checkpoint lock held; updates keep going to the current log while records are copied, and
+        are carried over (with the store lock held) before the new index is committed.
+        """
+        started = time.perf_counter()
+        generation = self.generation + 1
+        log_path = self._path(generation_file(LOG_FILE, generation))
+        journal_path = self._path(generation_file(JOURNAL_FILE, generation))
+        index_path = f"{self._path(INDEX_FILE)}.tmp"
+        with self._lock:
+            copy_end = self._log.tell()
+            pending = dict(self._journal)
+        updated = sorted(pending.values())
+        kept = (entry for entry in self._snapshot_entries() if entry[0] not in pending)
+        count = live_bytes = 0
+        with open(self._log_path, "rb") as reader, open(log_path, "wb") as log, open(index_path, "wb") as index:
+            index.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, generation))
+            for key, updated_at, message_count, offset, length in heapq.merge(kept, updated):
+                reader.seek(offset)
+                index.write(INDEX_RECORD.pack(key, updated_at, message_count, log.tell(), length))
+                log.write(reader.read(length))
+                count += 1
+                live_bytes += length
+            index.seek(0)
+            index.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, count, generation))
+            for handle in (log, index):
+                handle.flush()
+                os.fsync(handle.fileno())
+            copied_end = log.tell()
+        with self._lock:
+            # Records appended while copying move over as they are, shifted to the end of the new log
+            shift = copied_end - copy_end
+            with open(self._log_path, "rb") as reader, open(log_path, "ab") as log:
+                reader.seek(copy_end)
+                log.write(reader.read(self._log.tell() - copy_end))
+                log.flush()
+                os.fsync(log.fileno())
+            journal = {
+                key: (key, updated_at, message_count, offset + shift, length)
+                for key, updated_at, message_count, offset, length in self._journal.values()
+                if offset >= copy_end
+            }
+            with open(journal_path, "wb") as f:
+                f.write(b"".join(INDEX_RECORD.pack(*entry) for entry in journal.values()))
+                f.flush()
+                os.fsync(f.fileno())
+            if self._snapshot is not None:
+                self._snapshot.close()
+                self._snapshot = None
+            # Commit point: the index now names the new generation
+            os.replace(index_path, self._path(INDEX_FILE))
+            for handle in (self._log, self._reader, self._journal_file):
+                handle.close()
+            old_bytes = copy_end
+            self._map_snapshot()
+            self._log = open(self._log_path, "ab")
+            self._reader = open(self._log_path, "rb")
+            self._journal_file = open(self._journal_path, "ab")
+            self._journal = journal
+            self._live_bytes = live_bytes
+            self.compactions += 1
+            self._remove_other_generations()
+        print(
+            f"Session log compacted to generation {generation}: {old_bytes} -> {copied_end} bytes "
+            f"({count} sessions) in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+    def close(self):
+        if not self.enabled or self._log is None:
+            return
+        self.checkpoint()
+        with self._lock:
+            for handle in (self._log, self._reader, self._journal_file):
+                handle.close()
+            if self._snapshot is not None:
+                self._snapshot.close()
+                self._snapshot = None
+            self._log = self._reader = self._journal_file = None
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            return {
+                "enabled": True,
+                "directory": self.directory,
+                "snapshot_sessions": self._snapshot_count,
+                "journal_entries": len(self._journal),
+                "log_bytes": self._log.tell() if self._log is not None else 0,
+                "live_bytes": self._live_bytes,
+                "log_generation": self.generation,
+                "compactions": self.compactions,
+                "open_ms": round(self.open_seconds * 1000, 2),
+            }
+
+session_store = SessionStore()
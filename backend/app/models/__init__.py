@@ -1,17 +1,23 @@
 from .request_models import (
     ChatMessage,
+    BatchMemoRequest,
     CreditRequest,
     CollateralInfo,
     BorrowerInfo,
     PricingInfo,
-    DetailedCreditRequest
+    DetailedCreditRequest,
+    MissingField,
+    CompletenessReport
 )
 
 __all__ = [
     "ChatMessage",
+    "BatchMemoRequest",
     "CreditRequest", 
     "CollateralInfo",
     "BorrowerInfo",
     "PricingInfo",
-    "DetailedCreditRequest"
+    "DetailedCreditRequest",
+    "MissingField",
+    "CompletenessReport"
 ]
\ No newline at end of file
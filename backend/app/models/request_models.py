@@ -5,6 +5,11 @@ class ChatMessage(BaseModel):
     message: str
     chatId: Optional[str] = None
 
+class BatchMemoRequest(BaseModel):
+    request_ids: List[str]
+    max_concurrency: Optional[int] = None
+    max_attempts: Optional[int] = None
+
 class CreditRequest(BaseModel):
     request_id: str
     borrower_name: str
@@ -28,6 +33,7 @@ class BorrowerInfo(BaseModel):
     liabilities: float
 
 class PricingInfo(BaseModel):
+    # Annual rate in percent (6.5 means 6.5%), unlike the fractional LTV and DTI ratios
     interest_rate: float
     loan_term_months: int
     monthly_payment: float
@@ -49,4 +55,18 @@ class DetailedCreditRequest(BaseModel):
     guarantors: List[str]
     regulatory_notes: str
     created_date: str
-    updated_date: str
\ No newline at end of file
+    updated_date: str
+
+class MissingField(BaseModel):
+    field: str
+    label: str
+    section: str
+    reason: str
+
+class CompletenessReport(BaseModel):
+    request_id: str
+    score: float
+    threshold: float
+    is_sufficient: bool
+    total_fields: int
+    missing_fields: List[MissingField]
@@ -0,0 +1,21 @@
+from .metrics import Counter, Gauge, Histogram, render_prometheus
+from .profiling import PROFILE_FORMATS, RequestProfilingMiddleware, request_profiler
+from .timing import RequestTimingMiddleware, current_endpoint, stage_timer
+from .token_usage import add_usage, extract_token_usage, get_agent_model_id, token_usage_store
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "render_prometheus",
+    "PROFILE_FORMATS",
+    "RequestProfilingMiddleware",
+    "request_profiler",
+    "RequestTimingMiddleware",
+    "current_endpoint",
+    "stage_timer",
+    "add_usage",
+    "extract_token_usage",
+    "get_agent_model_id",
+    "token_usage_store"
+]
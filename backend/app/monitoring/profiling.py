@@ -0,0 +1,325 @@
+import asyncio
+import cProfile
+import hmac
+import json
+import marshal
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .metrics import Counter
+
+# Profiling is off unless one of these is set; the middleware is then not even installed.
+# A request carrying `X-Profile: <PROFILE_ADMIN_TOKEN>` is profiled; the token also guards /admin/profiles
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+# Fraction of requests to PROFILE_PATHS profiled without the header
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_PATHS = {path.strip() for path in os.getenv(
+    "PROFILE_PATHS", "/chat,/generate-credit-memo,/generate-summary,/generate-credit-memos/batch"
+).split(",") if path.strip()}
+# "sampling" (default): wall-clock stacks of the request's task, including time spent awaiting,
+# saved as collapsed stacks for flamegraph tools; "cprofile": deterministic cProfile of the event
+# loop thread (concurrent requests on the loop show up too), saved as a pstats file
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sampling").lower()
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+# Sampling stops after this long even if the request is still running
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "300"))
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", "2"))
+# Profiles kept (oldest dropped first); written to PROFILE_DIR when set, else kept in memory
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "50"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+
+PROFILE_FORMATS = {"sampling": ("folded", "text/plain"), "cprofile": ("prof", "application/octet-stream")}
+
+PROFILES_CAPTURED = Counter(
+    "agentic_lender_request_profiles_total",
+    "Requests profiled, by trigger and profiler",
+    ["trigger", "mode"],
+)
+PROFILES_SKIPPED = Counter(
+    "agentic_lender_request_profiles_skipped_total",
+    "Requests selected for profiling but not profiled because PROFILE_MAX_CONCURRENT profiles (or a cProfile) were running",
+    ["trigger"],
+)
+
+_path_labels: Dict[str, str] = {}
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    path = _path_labels.get(code.co_filename)
+    if path is None:
+        path = code.co_filename.replace("\\", "/")
+        path = path.split("site-packages/")[-1] if "site-packages/" in path else "/".join(path.split("/")[-3:])
+        _path_labels[code.co_filename] = path
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({path}:{code.co_firstlineno})"
+
+def _await_chain(awaitable: Any) -> List[Any]:
+    """Frames of a suspended coroutine and everything it is awaiting, outermost first"""
+    frames = []
+    while awaitable is not None:
+        if isinstance(awaitable, asyncio.Task):
+            awaitable = awaitable.get_coro()
+            continue
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None) or getattr(awaitable, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None) or getattr(awaitable, "ag_await", None)
+    return frames
+
+class StackSampler(threading.Thread):
+    """
+    Samples the stack of one asyncio task from a background thread. While the task is running the
+    sample is the event loop thread's stack from the task's outermost frame down; while it is
+    suspended it is the chain of awaiting coroutines ending in "[waiting]", so time spent waiting
+    on the model or the credit API shows up in the flamegraph.
+    """
+
+    def __init__(self, task: asyncio.Task, thread_id: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.task = task
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Dict[str, int] = defaultdict(int)
+        self.samples = 0
+        self._done = threading.Event()
+
+    def _sample(self) -> Optional[List[str]]:
+        chain = _await_chain(self.task.get_coro())
+        if not chain:
+            return None
+        frame = sys._current_frames().get(self.thread_id)
+        running: List[Any] = []
+        while frame is not None:
+            running.append(frame)
+            frame = frame.f_back
+        running.reverse()
+        for index, frame in enumerate(running):
+            if frame is chain[0]:
+                return [_frame_label(frame) for frame in running[index:]]
+        return [_frame_label(frame) for frame in chain] + ["[waiting]"]
+
+    def run(self):
+        deadline = time.monotonic() + PROFILE_MAX_SECONDS
+        while not self._done.wait(self.interval) and time.monotonic() < deadline:
+            stack = self._sample()
+            if stack:
+                self.stacks[";".join(stack)] += 1
+                self.samples += 1
+
+    def finish(self) -> bytes:
+        """Stop sampling; returns the samples as collapsed stacks ("frame;frame;frame count" lines)"""
+        self._done.set()
+        self.join()
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items())).encode("utf-8")
+
+class ProfileCapture:
+    """One request being profiled"""
+
+    def __init__(self, trigger: str, mode: str):
+        self.id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.trigger = trigger
+        self.mode = mode
+        self.created_at = datetime.now().isoformat()
+        self.started = time.perf_counter()
+        self.sampler: Optional[StackSampler] = None
+        self.profiler: Optional[cProfile.Profile] = None
+
+class RequestProfiler:
+    """Selects requests to profile, runs the profiler around them and keeps the resulting profiles"""
+
+    def __init__(self, directory: str = PROFILE_DIR, max_stored: int = PROFILE_MAX_STORED):
+        self.directory = directory
+        self.max_stored = max(1, max_stored)
+        self._lock = threading.Lock()
+        self._active = 0
+        # Only one cProfile can be enabled at a time
+        self._cprofile_lock = threading.Lock()
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._data: Dict[str, bytes] = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".json"):
+                    with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                        metadata = json.load(f)
+                    self._profiles[metadata["id"]] = metadata
+
+    @property
+    def enabled(self) -> bool:
+        return bool(PROFILE_ADMIN_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+    def is_admin(self, token: Optional[str]) -> bool:
+        return bool(PROFILE_ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_ADMIN_TOKEN)
+
+    def select(self, scope: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """(trigger, mode) when this request should be profiled"""
+        token = mode = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-profile":
+                token = value.decode("latin-1")
+            elif name == b"x-profile-mode":
+                mode = value.decode("latin-1").lower()
+        mode = mode if mode in PROFILE_FORMATS else PROFILE_MODE
+        if token is not None and self.is_admin(token):
+            return "header", mode
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            return "sample", mode
+        return None
+
+    def start(self, trigger: str, mode: str) -> Optional[ProfileCapture]:
+        with self._lock:
+            if self._active >= PROFILE_MAX_CONCURRENT:
+                PROFILES_SKIPPED.inc(trigger=trigger)
+                return None
+            self._active += 1
+        capture = ProfileCapture(trigger, mode)
+        if mode == "cprofile":
+            if not self._cprofile_lock.acquire(blocking=False):
+                return self._skip(capture)
+            capture.profiler = cProfile.Profile()
+            try:
+                capture.profiler.enable()
+            except ValueError:
+                # Another profiler (e.g. a debugger or coverage) owns the interpreter hooks
+                self._cprofile_lock.release()
+                return self._skip(capture)
+        else:
+            capture.sampler = StackSampler(asyncio.current_task(), threading.get_ident(), PROFILE_SAMPLE_INTERVAL_MS / 1000)
+            capture.sampler.start()
+        return capture
+
+    def _skip(self, capture: ProfileCapture) -> None:
+        with self._lock:
+            self._active -= 1
+        PROFILES_SKIPPED.inc(trigger=capture.trigger)
+        return None
+
+    def finish(self, capture: ProfileCapture, scope: Dict[str, Any], status: int) -> Dict[str, Any]:
+        """Stop profiling a request and store its profile with the request metadata"""
+        duration = time.perf_counter() - capture.started
+        try:
+            if capture.profiler is not None:
+                capture.profiler.disable()
+                capture.profiler.create_stats()
+                # Same format as Profile.dump_stats, readable by pstats and snakeviz
+                data = marshal.dumps(capture.profiler.stats)
+                samples = None
+            else:
+                data = capture.sampler.finish()
+                samples = capture.sampler.samples
+        finally:
+            if capture.profiler is not None:
+                self._cprofile_lock.release()
+            with self._lock:
+                self._active -= 1
+        extension, _ = PROFILE_FORMATS[capture.mode]
+        route = scope.get("route")
+        metadata = {
+            "id": capture.id,
+            "created_at": capture.created_at,
+            "trigger": capture.trigger,
+            "mode": capture.mode,
+            "method": scope["method"],
+            "path": scope["path"],
+            "endpoint": getattr(route, "path", None) or "unmatched",
+            "status": status,
+            "duration_ms": round(1000 * duration, 2),
+            "samples": samples,
+            "format": extension,
+            "filename": f"profile-{capture.id}.{extension}",
+            "bytes": len(data),
+        }
+        self._store(metadata, data)
+        PROFILES_CAPTURED.inc(trigger=capture.trigger, mode=capture.mode)
+        return metadata
+
+    def _store(self, metadata: Dict[str, Any], data: bytes):
+        with self._lock:
+            if self.directory:
+                with open(os.path.join(self.directory, metadata["filename"]), "wb") as f:
+                    f.write(data)
+                with open(os.path.join(self.directory, f"{metadata['id']}.json"), "w", encoding="utf-8") as f:
+                    json.dump(metadata, f)
+            else:
+                self._data[metadata["id"]] = data
+            self._profiles[metadata["id"]] = metadata
+            while len(self._profiles) > self.max_stored:
+                _, dropped = self._profiles.popitem(last=False)
+                self._data.pop(dropped["id"], None)
+                if self.directory:
+                    for name in (dropped["filename"], f"{dropped['id']}.json"):
+                        try:
+                            os.remove(os.path.join(self.directory, name))
+                        except FileNotFoundError:
+                            pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Stored profiles, newest first"""
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+    def get(self, profile_id: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """Metadata and file contents of a stored profile"""
+        with self._lock:
+            metadata = self._profiles.get(profile_id)
+            if metadata is None:
+                return None
+            if not self.directory:
+                return metadata, self._data[profile_id]
+        try:
+            with open(os.path.join(self.directory, metadata["filename"]), "rb") as f:
+                return metadata, f.read()
+        except FileNotFoundError:
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "header_trigger": bool(PROFILE_ADMIN_TOKEN),
+                "sample_rate": PROFILE_SAMPLE_RATE,
+                "mode": PROFILE_MODE,
+                "paths": sorted(PROFILE_PATHS),
+                "active": self._active,
+                "stored": len(self._profiles),
+                "storage": self.directory or "memory",
+            }
+
+class RequestProfilingMiddleware:
+    """
+    ASGI middleware that profiles selected HTTP requests to PROFILE_PATHS (admin header or sample
+    rate) and returns the stored profile's ID in an X-Profile-Id header. Only installed when
+    profiling is enabled.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any):
+        selected = request_profiler.select(scope) if scope["type"] == "http" and scope["path"] in PROFILE_PATHS else None
+        capture = request_profiler.start(*selected) if selected else None
+        if capture is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_profile_id(message: Dict[str, Any]):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", capture.id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            request_profiler.finish(capture, scope, status["code"])
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,109 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .metrics import Counter, Histogram
+
+REQUEST_DURATION = Histogram(
+    "agentic_lender_request_duration_seconds",
+    "End-to-end HTTP request latency",
+    ["method", "endpoint", "status"],
+)
+REQUEST_COUNT = Counter(
+    "agentic_lender_requests_total",
+    "HTTP requests handled",
+    ["method", "endpoint", "status"],
+)
+STAGE_DURATION = Histogram(
+    "agentic_lender_stage_duration_seconds",
+    "Latency of individual request stages (credit fetch, LLM calls, post-processing)",
+    ["endpoint", "stage"],
+)
+
+class RequestTiming:
+    """Stage timings collected while serving one request"""
+
+    def __init__(self, scope: Dict[str, Any], keep_stages: bool = True):
+        self.scope = scope
+        self.keep_stages = keep_stages
+        self.stages: List[Tuple[str, float]] = []
+
+    @property
+    def endpoint(self) -> str:
+        # The matched route template keeps label cardinality bounded (no chat IDs in labels)
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+_current_request: ContextVar[Optional[RequestTiming]] = ContextVar("current_request_timing", default=None)
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Time a stage of the current request; recorded in metrics and the Server-Timing header"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timing = _current_request.get()
+        endpoint = timing.endpoint if timing is not None else "background"
+        STAGE_DURATION.observe(elapsed, endpoint=endpoint, stage=stage)
+        if timing is not None and timing.keep_stages:
+            timing.stages.append((stage, elapsed))
+
+def current_endpoint() -> str:
+    """Route template of the request being served, or 'background' outside a request"""
+    timing = _current_request.get()
+    return timing.endpoint if timing is not None else "background"
+
+def format_server_timing(stages: List[Tuple[str, float]], total: float) -> str:
+    """Server-Timing header value; repeated stages (e.g. several LLM calls) are summed"""
+    totals: Dict[str, float] = {}
+    for stage, elapsed in stages:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    entries = [f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in totals.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+class RequestTimingMiddleware:
+    """
+    ASGI middleware that times every HTTP request, exports per-endpoint latency
+    histograms and adds a Server-Timing header with the per-stage breakdown.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any):
+        if scope["type"] == "websocket":
+            # Long-lived connections: label stages and LLM calls with the route, keep no stage list
+            token = _current_request.set(RequestTiming(scope, keep_stages=False))
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _current_request.reset(token)
+            return
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming(scope)
+        token = _current_request.set(timing)
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_timing(message: Dict[str, Any]):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                header = format_server_timing(timing.stages, time.perf_counter() - started)
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_request.reset(token)
+            elapsed = time.perf_counter() - started
+            labels = {"method": scope["method"], "endpoint": timing.endpoint, "status": str(status["code"])}
+            REQUEST_DURATION.observe(elapsed, **labels)
+            REQUEST_COUNT.inc(**labels)
@@ -0,0 +1,156 @@
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from .metrics import Counter
+
+# USD per million tokens: (input, output, cache write, cache read)
+MODEL_PRICING: Dict[str, tuple] = {
+    "claude-3-5-sonnet": (3.00, 15.00, 3.75, 0.30),
+    "claude-3-7-sonnet": (3.00, 15.00, 3.75, 0.30),
+    "claude-sonnet-4": (3.00, 15.00, 3.75, 0.30),
+    "claude-3-5-haiku": (0.80, 4.00, 1.00, 0.08),
+    "claude-3-haiku": (0.25, 1.25, 0.30, 0.03),
+    "claude-3-opus": (15.00, 75.00, 18.75, 1.50),
+    "claude-opus-4": (15.00, 75.00, 18.75, 1.50),
+}
+
+# Sessions and request IDs kept in the in-memory aggregates before the oldest are dropped
+TOKEN_USAGE_MAX_KEYS = int(os.getenv("TOKEN_USAGE_MAX_KEYS", "50000"))
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens")
+
+LLM_TOKENS = Counter(
+    "agentic_lender_llm_tokens_total",
+    "LLM tokens used, by endpoint, agent and token kind",
+    ["endpoint", "agent", "kind"],
+)
+LLM_COST = Counter(
+    "agentic_lender_llm_cost_usd_total",
+    "Estimated LLM spend in USD, by endpoint and agent",
+    ["endpoint", "agent"],
+)
+
+def _total(value: Any) -> int:
+    """agno reports per-model-call lists on run responses; newer versions report plain numbers"""
+    if isinstance(value, list):
+        return int(sum(item or 0 for item in value))
+    return int(value or 0)
+
+def extract_token_usage(response: Any) -> Dict[str, int]:
+    """Input, output and prompt-cache token counts reported on an agent response"""
+    metrics = getattr(response, "metrics", None)
+    usage = {field: 0 for field in USAGE_FIELDS}
+    if not metrics:
+        return usage
+    if isinstance(metrics, dict):
+        get = metrics.get
+    else:
+        get = lambda name, default=None: getattr(metrics, name, default)
+    usage["input_tokens"] = _total(get("input_tokens", 0))
+    usage["output_tokens"] = _total(get("output_tokens", 0))
+    usage["cache_read_tokens"] = _total(get("cache_read_tokens", None) or get("cached_tokens", 0))
+    usage["cache_write_tokens"] = _total(get("cache_write_tokens", 0))
+    return usage
+
+def get_agent_model_id(agent: Any) -> str:
+    """Model ID behind an agno agent or a fake agent"""
+    model = getattr(agent, "model", None)
+    return getattr(model, "id", None) or getattr(agent, "model_id", None) or "unknown"
+
+def estimate_cost_usd(model_id: str, usage: Dict[str, int]) -> float:
+    """Estimated USD cost of one call; unknown models are priced at zero"""
+    # Backend prefixes such as "fake:" still price as the model they stand in for
+    base_model_id = model_id.split(":")[-1]
+    pricing = next((price for prefix, price in MODEL_PRICING.items() if base_model_id.startswith(prefix)), None)
+    if pricing is None:
+        return 0.0
+    input_price, output_price, cache_write_price, cache_read_price = pricing
+    return (
+        usage["input_tokens"] * input_price
+        + usage["output_tokens"] * output_price
+        + usage["cache_write_tokens"] * cache_write_price
+        + usage["cache_read_tokens"] * cache_read_price
+    ) / 1_000_000
+
+def empty_usage() -> Dict[str, Any]:
+    return {"calls": 0, **{field: 0 for field in USAGE_FIELDS}, "cost_usd": 0.0}
+
+def add_usage(totals: Dict[str, Any], usage: Dict[str, int], cost_usd: float) -> Dict[str, Any]:
+    """Accumulate one call's usage into a totals dict (as stored on sessions)"""
+    totals["calls"] = totals.get("calls", 0) + 1
+    for field in USAGE_FIELDS:
+        totals[field] = totals.get(field, 0) + usage[field]
+    totals["cost_usd"] = round(totals.get("cost_usd", 0.0) + cost_usd, 6)
+    return totals
+
+class TokenUsageStore:
+    """In-memory token and cost aggregates per endpoint, agent, model, session and credit request"""
+
+    def __init__(self, max_keys: int = TOKEN_USAGE_MAX_KEYS):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self.total: Dict[str, Any] = empty_usage()
+        self.by_endpoint: Dict[str, Dict[str, Any]] = {}
+        self.by_agent: Dict[str, Dict[str, Any]] = {}
+        self.by_model: Dict[str, Dict[str, Any]] = {}
+        self.by_session: Dict[str, Dict[str, Any]] = {}
+        self.by_request_id: Dict[str, Dict[str, Any]] = {}
+
+    def _add(self, table: Dict[str, Dict[str, Any]], key: str, usage: Dict[str, int], cost_usd: float, bounded: bool = False):
+        totals = table.get(key)
+        if totals is None:
+            if bounded and len(table) >= self.max_keys:
+                # Drop the oldest entry (dicts keep insertion order) to bound memory in O(1)
+                del table[next(iter(table))]
+            totals = table[key] = empty_usage()
+        add_usage(totals, usage, cost_usd)
+
+    def record(
+        self,
+        usage: Dict[str, int],
+        model_id: str,
+        endpoint: str,
+        agent_name: str,
+        chat_id: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ) -> float:
+        """Record one agent call; returns its estimated cost in USD"""
+        cost_usd = estimate_cost_usd(model_id, usage)
+        with self._lock:
+            add_usage(self.total, usage, cost_usd)
+            self._add(self.by_endpoint, endpoint, usage, cost_usd)
+            self._add(self.by_agent, agent_name, usage, cost_usd)
+            self._add(self.by_model, model_id, usage, cost_usd)
+            if chat_id:
+                self._add(self.by_session, chat_id, usage, cost_usd, bounded=True)
+            if request_id:
+                self._add(self.by_request_id, request_id, usage, cost_usd, bounded=True)
+        for field in USAGE_FIELDS:
+            if usage[field]:
+                LLM_TOKENS.inc(usage[field], endpoint=endpoint, agent=agent_name, kind=field.replace("_tokens", ""))
+        LLM_COST.inc(cost_usd, endpoint=endpoint, agent=agent_name)
+        return cost_usd
+
+    def _top(self, table: Dict[str, Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        ranked = sorted(table.items(), key=lambda item: item[1]["cost_usd"], reverse=True)[:limit]
+        return [{"id": key, **dict(totals)} for key, totals in ranked]
+
+    def snapshot(self, top: int = 20) -> Dict[str, Any]:
+        """Totals plus the most expensive sessions and credit requests"""
+        with self._lock:
+            return {
+                "total": dict(self.total),
+                "by_endpoint": {key: dict(value) for key, value in self.by_endpoint.items()},
+                "by_agent": {key: dict(value) for key, value in self.by_agent.items()},
+                "by_model": {key: dict(value) for key, value in self.by_model.items()},
+                "top_sessions": self._top(self.by_session, top),
+                "top_request_ids": self._top(self.by_request_id, top),
+            }
+
+    def get_request_usage(self, request_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            totals = self.by_request_id.get(request_id)
+            return dict(totals) if totals else None
+
+token_usage_store = TokenUsageStore()
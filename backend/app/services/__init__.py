@@ -3,13 +3,43 @@ from .credit_service import (
     get_covenants_for_borrower,
     get_guarantors_for_borrower,
     get_regulatory_notes_for_borrower,
-    fetch_credit_request_details
+    fetch_credit_request_details,
+    fetch_credit_request_data,
+    format_credit_request_details,
+    CreditRequestFetchError
 )
+from .memo_service import (
+    build_credit_memo_prompt,
+    build_memo_revision_prompt,
+    clean_html_content,
+    combine_memo_html,
+    find_reusable_memo,
+    index_memo_source,
+    load_credit_memo_inputs
+)
+from .near_duplicate import near_duplicate_index
+from .request_ids import extract_request_ids, gather_limited
+from .completeness_service import analyze_completeness, render_missing_data_checklist
 
 __all__ = [
     "get_conditions_for_borrower",
     "get_covenants_for_borrower", 
     "get_guarantors_for_borrower",
     "get_regulatory_notes_for_borrower",
-    "fetch_credit_request_details"
+    "fetch_credit_request_details",
+    "fetch_credit_request_data",
+    "format_credit_request_details",
+    "CreditRequestFetchError",
+    "build_credit_memo_prompt",
+    "build_memo_revision_prompt",
+    "clean_html_content",
+    "combine_memo_html",
+    "find_reusable_memo",
+    "index_memo_source",
+    "load_credit_memo_inputs",
+    "near_duplicate_index",
+    "extract_request_ids",
+    "gather_limited",
+    "analyze_completeness",
+    "render_missing_data_checklist"
 ]
\ No newline at end of file
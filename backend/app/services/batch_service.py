@@ -0,0 +1,245 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from ..agents import summary_generation_agent
+from ..agents.admission import PRIORITY_BATCH, AdmissionRejected
+from ..agents.resilience import CircuitOpenError, is_retryable
+from ..agents.runner import run_agent
+from ..memory import memo_archive
+from ..monitoring import extract_token_usage, stage_timer
+from .completeness_service import analyze_credit_request_data, render_missing_data_checklist
+from .credit_service import fetch_credit_request_data, format_credit_request_details
+from .memo_service import (
+    build_credit_memo_prompt,
+    build_memo_revision_prompt,
+    clean_html_content,
+    find_reusable_memo,
+    index_memo_source,
+)
+
+# Provider limits shared by every batch running in this worker
+BATCH_REQUESTS_PER_MINUTE = int(os.getenv("BATCH_MEMO_REQUESTS_PER_MINUTE", "50"))
+BATCH_TOKENS_PER_MINUTE = int(os.getenv("BATCH_MEMO_TOKENS_PER_MINUTE", "80000"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MEMO_MAX_CONCURRENCY", "4"))
+BATCH_MAX_ATTEMPTS = int(os.getenv("BATCH_MEMO_MAX_ATTEMPTS", "3"))
+BATCH_RETRY_BACKOFF_SECONDS = float(os.getenv("BATCH_MEMO_RETRY_BACKOFF_SECONDS", "2.0"))
+# Expected completion size of an 8-section HTML memo, used before real usage is known
+BATCH_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("BATCH_MEMO_OUTPUT_TOKEN_ESTIMATE", "4000"))
+
+WINDOW_SECONDS = 60.0
+
+def estimate_prompt_tokens(prompt: str) -> int:
+    """Rough token estimate for a prompt (about 4 characters per token)"""
+    return max(1, len(prompt) // 4)
+
+class RateLimitScheduler:
+    """
+    Sliding-window scheduler for provider requests-per-minute and tokens-per-minute limits.
+    Callers reserve an estimated token budget before calling the model and settle it with
+    the real usage afterwards, so the window tracks what the provider actually counts.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._events: Deque[List[Any]] = deque()  # [timestamp, tokens]
+        self._lock = asyncio.Lock()
+
+    def _prune(self, now: float):
+        while self._events and now - self._events[0][0] >= WINDOW_SECONDS:
+            self._events.popleft()
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        """Seconds until a request of `tokens` fits inside both limits"""
+        waits = [0.0]
+        if len(self._events) >= self.requests_per_minute:
+            oldest = self._events[len(self._events) - self.requests_per_minute]
+            waits.append(oldest[0] + WINDOW_SECONDS - now)
+        used = sum(event[1] for event in self._events)
+        if used and tokens >= self.tokens_per_minute:
+            # A single oversized request never fits beside others: it waits for an empty window
+            # and runs alone rather than blocking forever
+            waits.append(self._events[-1][0] + WINDOW_SECONDS - now)
+        elif used and used + tokens > self.tokens_per_minute:
+            excess = used + tokens - self.tokens_per_minute
+            for timestamp, event_tokens in self._events:
+                excess -= event_tokens
+                if excess <= 0:
+                    waits.append(timestamp + WINDOW_SECONDS - now)
+                    break
+        return max(waits)
+
+    async def acquire(self, estimated_tokens: int) -> List[Any]:
+        """Wait until the request fits in the window and record it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+                wait = self._wait_time(now, estimated_tokens)
+                if wait <= 0:
+                    event = [now, estimated_tokens]
+                    self._events.append(event)
+                    return event
+                await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def reserve(self, estimated_tokens: int) -> AsyncIterator[Dict[str, Optional[int]]]:
+        """Reserve window capacity; set `actual_tokens` on the yielded dict to settle the reservation"""
+        event = await self.acquire(estimated_tokens)
+        reservation: Dict[str, Optional[int]] = {"actual_tokens": None}
+        try:
+            yield reservation
+        finally:
+            if reservation["actual_tokens"] is not None:
+                event[1] = reservation["actual_tokens"]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current window usage"""
+        now = time.monotonic()
+        self._prune(now)
+        return {
+            "requests_in_window": len(self._events),
+            "tokens_in_window": sum(event[1] for event in self._events),
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+        }
+
+memo_rate_limiter = RateLimitScheduler(BATCH_REQUESTS_PER_MINUTE, BATCH_TOKENS_PER_MINUTE)
+
+async def generate_scheduled_memo(request_id: str, scheduler: RateLimitScheduler = memo_rate_limiter) -> Dict[str, Any]:
+    """
+    Fetch a credit file and generate its HTML memo under the provider rate limits.
+    Files below the completeness threshold get a missing-data checklist without using the scheduler.
+    """
+    data = await fetch_credit_request_data(request_id)
+    completeness = analyze_credit_request_data(data)
+    if not completeness.is_sufficient:
+        return {
+            "html_summary": render_missing_data_checklist(completeness),
+            "memo_type": "missing_data_checklist",
+            "completeness_score": completeness.score,
+        }
+
+    reuse = find_reusable_memo(request_id, data)
+    if reuse is not None and reuse.reusable:
+        # An equivalent file already has a memo: no provider call, so no rate-limit reservation
+        memo_ref = memo_archive.put(request_id, reuse.html, source="near-duplicate")
+        index_memo_source(request_id, data, reuse.html)
+        return {
+            "html_summary": reuse.html,
+            "memo_type": "comprehensive_credit_analysis",
+            "memo_version": memo_ref["version"],
+            "completeness_score": completeness.score,
+            "memo_reuse": reuse.to_dict(),
+        }
+
+    credit_details = format_credit_request_details(request_id, data)
+    if reuse is not None:
+        prompt = build_memo_revision_prompt(request_id, credit_details, reuse)
+    else:
+        prompt = build_credit_memo_prompt(request_id, credit_details)
+    estimated_tokens = estimate_prompt_tokens(prompt) + BATCH_OUTPUT_TOKEN_ESTIMATE
+    async with scheduler.reserve(estimated_tokens) as reservation:
+        with stage_timer("summary_llm"):
+            response = await run_agent(
+                summary_generation_agent, prompt, request_id=request_id, priority=PRIORITY_BATCH, allow_fallback=False
+            )
+        usage = extract_token_usage(response)
+        reservation["actual_tokens"] = (usage["input_tokens"] + usage["output_tokens"]) or None
+    html_content = clean_html_content(response.content)
+    memo_ref = memo_archive.put(request_id, html_content, source="batch")
+    index_memo_source(request_id, data, html_content)
+    return {
+        "html_summary": html_content,
+        "memo_type": "comprehensive_credit_analysis",
+        "memo_version": memo_ref["version"],
+        "completeness_score": completeness.score,
+        "memo_reuse": reuse.to_dict() if reuse is not None else None,
+    }
+
+async def _generate_with_retries(request_id: str, max_attempts: int) -> Dict[str, Any]:
+    """
+    Generate one memo, retrying only this item with jittered exponential backoff.
+    Only transient failures are retried (see resilience.is_retryable, plus admission and circuit
+    rejections, which say when to come back); anything else fails the item at once.
+    """
+    started = time.perf_counter()
+    last_error = ""
+    for attempt in range(1, max_attempts + 1):
+        try:
+            memo = await generate_scheduled_memo(request_id)
+            return {
+                "event": "memo",
+                "credit_request_id": request_id,
+                **memo,
+                "attempts": attempt,
+                "elapsed_seconds": round(time.perf_counter() - started, 3),
+            }
+        except Exception as e:
+            last_error = str(e) or e.__class__.__name__
+            print(f"Batch memo attempt {attempt}/{max_attempts} failed for {request_id}: {last_error}")
+            if not (is_retryable(e) or isinstance(e, (AdmissionRejected, CircuitOpenError))):
+                break
+            if attempt < max_attempts:
+                backoff = BATCH_RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1))
+                if isinstance(e, (AdmissionRejected, CircuitOpenError)):
+                    backoff = max(backoff, e.retry_after)
+                await asyncio.sleep(backoff + random.uniform(0, backoff))
+    return {
+        "event": "failed",
+        "credit_request_id": request_id,
+        "error": last_error,
+        "attempts": attempt,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+async def run_memo_batch(
+    request_ids: List[str],
+    max_concurrency: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Generate memos for many credit requests concurrently.
+    Yields a `memo` or `failed` event as each item finishes, each carrying running progress,
+    followed by a final `done` event.
+    """
+    # Preserve order while dropping duplicate IDs
+    unique_ids = list(dict.fromkeys(request_ids))
+    # Clients may lower the concurrency, never raise it past the worker's limit
+    concurrency = max(1, min(max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY, len(unique_ids) or 1))
+    attempts = max(1, max_attempts or BATCH_MAX_ATTEMPTS)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(request_id: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await _generate_with_retries(request_id, attempts)
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(worker(request_id)) for request_id in unique_ids]
+    completed = 0
+    failed: List[str] = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            completed += 1
+            if result["event"] == "failed":
+                failed.append(result["credit_request_id"])
+            result["progress"] = {"completed": completed, "total": len(unique_ids)}
+            yield result
+    finally:
+        # Client went away or the batch was cancelled: stop outstanding generations
+        for task in tasks:
+            task.cancel()
+
+    yield {
+        "event": "done",
+        "total": len(unique_ids),
+        "succeeded": completed - len(failed),
+        "failed": failed,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
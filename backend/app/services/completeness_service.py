@@ -0,0 +1,131 @@
+import os
+import re
+from functools import lru_cache
+from html import escape
+from string import Template
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models import CompletenessReport, DetailedCreditRequest, MissingField
+
+# Files scoring below this share of populated fields get a checklist instead of an LLM memo
+MEMO_COMPLETENESS_THRESHOLD = float(os.getenv("MEMO_COMPLETENESS_THRESHOLD", "0.5"))
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "templates", "missing_data_checklist.html")
+
+PLACEHOLDER_PATTERN = re.compile(r"not provided|not specified|to be determined|\bpending\b|\btbd\b|\bn/?a\b", re.IGNORECASE)
+
+# (attribute path, label, memo section) for every field the memo depends on
+SCORED_FIELDS: List[Tuple[str, str, str]] = [
+    ("borrower.name", "Borrower name", "Client Background"),
+    ("borrower.credit_score", "Credit score", "Credit Summary"),
+    ("borrower.annual_income", "Annual income", "Credit Summary"),
+    ("borrower.debt_to_income_ratio", "Debt-to-income ratio", "Credit Summary"),
+    ("borrower.employment_history", "Employment history", "Client Background"),
+    ("borrower.assets", "Assets", "Credit Summary"),
+    ("borrower.liabilities", "Liabilities", "Credit Summary"),
+    ("collateral.property_type", "Property type", "Collateral Analysis"),
+    ("collateral.property_value", "Property value", "Collateral Analysis"),
+    ("collateral.ltv_ratio", "LTV ratio", "Collateral Analysis"),
+    ("collateral.appraisal_date", "Appraisal date", "Collateral Analysis"),
+    ("collateral.address", "Property address", "Collateral Analysis"),
+    ("pricing.interest_rate", "Interest rate", "Pricing & Fees"),
+    ("pricing.loan_term_months", "Loan term", "Pricing & Fees"),
+    ("pricing.monthly_payment", "Monthly payment", "Pricing & Fees"),
+    ("pricing.origination_fee", "Origination fee", "Pricing & Fees"),
+    ("pricing.processing_fee", "Processing fee", "Pricing & Fees"),
+    ("pricing.total_fees", "Total fees", "Pricing & Fees"),
+    ("loan_amount", "Loan amount", "Credit Summary"),
+    ("loan_purpose", "Loan purpose", "Credit Summary"),
+    ("risk_rating", "Risk rating", "Risk Assessment"),
+]
+
+def _missing_reason(value: Any) -> Optional[str]:
+    """Why a field value counts as missing, or None when it is populated"""
+    if value is None:
+        return "empty"
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return "zero" if value == 0 else None
+    if isinstance(value, str):
+        if not value.strip():
+            return "empty"
+        if PLACEHOLDER_PATTERN.search(value):
+            return "placeholder"
+    return None
+
+def is_missing_value(value: Any) -> bool:
+    """Whether a field value is empty, zero or a placeholder such as Pending or Not Provided"""
+    return _missing_reason(value) is not None
+
+def _resolve(credit_request: DetailedCreditRequest, path: str) -> Any:
+    value: Any = credit_request
+    for attribute in path.split("."):
+        value = getattr(value, attribute)
+    return value
+
+def analyze_completeness(credit_request: DetailedCreditRequest, threshold: Optional[float] = None) -> CompletenessReport:
+    """Score how much of a credit file is populated, without calling any model"""
+    threshold = MEMO_COMPLETENESS_THRESHOLD if threshold is None else threshold
+    missing_fields = []
+    for path, label, section in SCORED_FIELDS:
+        reason = _missing_reason(_resolve(credit_request, path))
+        if reason:
+            missing_fields.append(MissingField(field=path, label=label, section=section, reason=reason))
+
+    score = 1 - len(missing_fields) / len(SCORED_FIELDS)
+    return CompletenessReport(
+        request_id=credit_request.request_id,
+        score=round(score, 3),
+        threshold=threshold,
+        is_sufficient=score >= threshold,
+        total_fields=len(SCORED_FIELDS),
+        missing_fields=missing_fields,
+    )
+
+def analyze_credit_request_data(data: Dict[str, Any], threshold: Optional[float] = None) -> CompletenessReport:
+    """Score a raw credit request API payload"""
+    return analyze_completeness(DetailedCreditRequest(**data), threshold)
+
+@lru_cache(maxsize=1)
+def _load_checklist_template() -> Optional[Template]:
+    try:
+        with open(TEMPLATE_PATH, "r", encoding="utf-8") as f:
+            return Template(f.read())
+    except FileNotFoundError:
+        return None
+
+CHECKLIST_ITEM_HTML = (
+    '<div class="clickable-section" data-section="$section" style="display: flex; align-items: center; '
+    'justify-content: space-between; padding: 12px; background: #fef3c7; border-radius: 6px; '
+    'border-left: 4px solid #f59e0b; cursor: pointer; transition: all 0.2s ease; user-select: none;" '
+    "onmouseover=\"this.style.background='#fde68a'; this.style.transform='translateX(4px)'\" "
+    "onmouseout=\"this.style.background='#fef3c7'; this.style.transform='translateX(0)'\">"
+    '<span style="color: #92400e; font-size: 14px; pointer-events: none;">📋 $section</span>'
+    '<span style="color: #b45309; font-size: 13px; pointer-events: none;">$fields</span>'
+    "</div>"
+)
+
+def render_missing_data_checklist(report: CompletenessReport) -> str:
+    """Render the missing-data checklist HTML for an incomplete credit file"""
+    template = _load_checklist_template()
+    if template is None:
+        return "<div>Insufficient data for credit memo generation</div>"
+
+    # Group missing fields by memo section, keeping section order stable
+    sections: Dict[str, List[str]] = {}
+    for missing in report.missing_fields:
+        sections.setdefault(missing.section, []).append(missing.label)
+
+    items = "\n".join(
+        Template(CHECKLIST_ITEM_HTML).substitute(section=escape(section), fields=escape(", ".join(labels)))
+        for section, labels in sections.items()
+    )
+    return template.safe_substitute(
+        request_id=escape(report.request_id),
+        score_percent=f"{report.score:.0%}",
+        threshold_percent=f"{report.threshold:.0%}",
+        missing_count=len(report.missing_fields),
+        total_fields=report.total_fields,
+        checklist_items=items,
+    )
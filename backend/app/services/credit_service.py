@@ -1,6 +1,9 @@
-from typing import List
+from typing import Any, Dict, List, Optional
+import os
 import httpx
 from ..models import BorrowerInfo, CollateralInfo, PricingInfo, DetailedCreditRequest
+from ..monitoring import stage_timer
+from .prompt_encoder import CREDIT_PROMPT_FORMAT, encode_credit_request_compact
 import random
 
 def get_conditions_for_borrower(borrower_key: str) -> List[str]:
@@ -125,21 +128,39 @@ def get_sample_borrowers():
         ),
     }
 
-async def fetch_credit_request_details(request_id: str) -> str:
+class CreditRequestFetchError(Exception):
+    """Raised when the credit request API cannot return a credit file"""
+
+def get_credit_api_base_url() -> str:
+    """Get the base URL of the credit request API"""
+    return os.getenv("CREDIT_API_BASE_URL", "http://localhost:8000").rstrip("/")
+
+async def fetch_credit_request_data(request_id: str) -> Dict[str, Any]:
     """
-    Fetch detailed credit request information from the external API.
-    This function is called by the Agent when it needs credit request details.
+    Fetch the raw credit request payload from the external API.
+    Raises CreditRequestFetchError when the API is unreachable or returns an error.
     """
     try:
         # In a real implementation, this would call an external API
         # For now, we'll call our own mock API endpoint
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"http://localhost:8000/credit-requests/{request_id}")
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Format the data for the Agent
-                formatted_data = f"""
+        with stage_timer("credit_fetch"):
+            async with httpx.AsyncClient() as client:
+                response = await client.get(f"{get_credit_api_base_url()}/credit-requests/{request_id}")
+    except httpx.HTTPError as e:
+        raise CreditRequestFetchError(str(e)) from e
+    if response.status_code != 200:
+        raise CreditRequestFetchError(f"API returned status {response.status_code}")
+    return response.json()
+
+def format_credit_request_details(request_id: str, data: Dict[str, Any], prompt_format: Optional[str] = None) -> str:
+    """Format a credit request payload for the Agent (compact encoding unless CREDIT_PROMPT_FORMAT=verbose)"""
+    with stage_timer("credit_format"):
+        if (prompt_format or CREDIT_PROMPT_FORMAT) == "compact":
+            return encode_credit_request_compact(request_id, data)
+        return _format_credit_request_details(request_id, data)
+
+def _format_credit_request_details(request_id: str, data: Dict[str, Any]) -> str:
+    return f"""
 CREDIT REQUEST DETAILS FOR {request_id}:
 
 BORROWER INFORMATION:
@@ -159,7 +180,7 @@ COLLATERAL INFORMATION:
 - Address: {data['collateral']['address']}
 
 PRICING & FEES:
-- Interest Rate: {data['pricing']['interest_rate']:.2%}
+- Interest Rate: {data['pricing']['interest_rate']:.2f}%
 - Loan Term: {data['pricing']['loan_term_months']} months
 - Monthly Payment: ${data['pricing']['monthly_payment']:,.2f}
 - Origination Fee: ${data['pricing']['origination_fee']:,.2f}
@@ -185,8 +206,14 @@ DATES:
 - Created: {data['created_date']}
 - Updated: {data['updated_date']}
 """
-                return formatted_data
-            else:
-                return f"Error fetching credit request details: API returned status {response.status_code}"
+
+async def fetch_credit_request_details(request_id: str) -> str:
+    """
+    Fetch detailed credit request information from the external API.
+    This function is called by the Agent when it needs credit request details.
+    """
+    try:
+        data = await fetch_credit_request_data(request_id)
+        return format_credit_request_details(request_id, data)
     except Exception as e:
         return f"Error fetching credit request details: {str(e)}"
\ No newline at end of file
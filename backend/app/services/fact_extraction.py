@@ -0,0 +1,224 @@
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+# Minimum memo sections and facts the conversation must cover before the LLM writes a memo
+SUMMARY_MIN_COVERED_SECTIONS = int(os.getenv("SUMMARY_MIN_COVERED_SECTIONS", "2"))
+SUMMARY_MIN_FACTS = int(os.getenv("SUMMARY_MIN_FACTS", "3"))
+
+# Memo sections and the facts that give each one something concrete to say
+SECTION_FACTS: Dict[str, List[str]] = {
+    "Credit Summary": ["credit_score", "annual_income", "debt_to_income_ratio", "loan_amount", "assets", "liabilities"],
+    "Client Background": ["borrower_name", "employment", "guarantors"],
+    "Collateral Analysis": ["collateral_value", "collateral_type", "ltv_ratio"],
+    "Pricing & Fees": ["interest_rate", "loan_term_months", "fees"],
+    "Conditions & Covenants": ["conditions", "covenants"],
+    "Risk Assessment": ["risk_rating"],
+}
+
+MONEY = r"\$?\s*(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)\s*(k|m|mm|million|thousand|bn|billion)?\b"
+PERCENT = r"(\d{1,3}(?:\.\d+)?)\s*(%|percent\b)"
+RATIO = r"(\d{1,3}(?:\.\d+)?)\s*(%|percent\b)?"
+# Filler allowed between a label and its value, e.g. "credit score of", "LTV will be", "income: "
+LINK = r"[\s:=~-]*(?:(?:is|of|at|will be|would be|around|about|approximately|roughly|approx\.?|near|was|=)\s*)*"
+
+COLLATERAL_TYPES = (
+    r"blue[- ]chip stocks?|stocks?|etfs?|bonds?|securities|real estate|single[- ]family (?:residence|home)|"
+    r"commercial property|residential property|equipment|inventory|receivables|cash deposits?|vehicles?"
+)
+
+# Facts where every distinct mention is kept rather than only the latest one
+MULTI_VALUE_FACTS = {"collateral_type"}
+
+MULTIPLIERS = {"k": 1e3, "thousand": 1e3, "m": 1e6, "mm": 1e6, "million": 1e6, "bn": 1e9, "billion": 1e9}
+
+def _parse_money(number: str, suffix: Optional[str]) -> float:
+    value = float(number.replace(",", ""))
+    return value * MULTIPLIERS.get((suffix or "").lower(), 1)
+
+def _parse_ratio(number: str, percent_sign: Optional[str]) -> float:
+    value = float(number)
+    # "50%" and "50" both mean 0.50; "0.28" is already a ratio
+    return value / 100 if percent_sign or value > 1 else value
+
+def _labelled(label: str, value: str) -> Tuple[Pattern[str], Pattern[str]]:
+    """Patterns for '<label> ... <value>' and '<value> <label>' phrasings"""
+    return (
+        re.compile(rf"(?:{label}){LINK}{value}", re.IGNORECASE),
+        re.compile(rf"{value}\s*(?:in\s+)?(?:{label})", re.IGNORECASE),
+    )
+
+# fact name -> (patterns, converter from the match, validity check)
+FACT_RULES: List[Tuple[str, Tuple[Pattern[str], ...], Callable[[re.Match], Any], Callable[[Any], bool]]] = [
+    (
+        "credit_score",
+        _labelled(r"credit score|fico(?: score)?|credit rating", r"(\d{3})\b"),
+        lambda m: int(m.group(1)),
+        lambda v: 300 <= v <= 850,
+    ),
+    (
+        "annual_income",
+        _labelled(r"(?:annual |yearly |gross )?(?:income|salary)|earns|making|makes", MONEY),
+        lambda m: _parse_money(m.group(1), m.group(2)),
+        lambda v: v >= 1000,
+    ),
+    (
+        "loan_amount",
+        _labelled(r"loan amount|loan (?:request )?(?:for|size)|borrow(?:ing)?|requesting|financing of|(?:term )?loan", MONEY),
+        lambda m: _parse_money(m.group(1), m.group(2)),
+        lambda v: v >= 1000,
+    ),
+    (
+        "ltv_ratio",
+        _labelled(r"ltv(?: ratio)?|loan[- ]to[- ]value(?: ratio)?", RATIO),
+        lambda m: _parse_ratio(m.group(1), m.group(2)),
+        lambda v: 0 < v <= 1.5,
+    ),
+    (
+        "debt_to_income_ratio",
+        _labelled(r"dti(?: ratio)?|debt[- ]to[- ]income(?: ratio)?", RATIO),
+        lambda m: _parse_ratio(m.group(1), m.group(2)),
+        lambda v: 0 < v <= 1.5,
+    ),
+    (
+        "collateral_value",
+        _labelled(r"collateral(?: value)?|property value|appraised (?:value|at)|valued at|worth", MONEY)
+        + (re.compile(rf"{MONEY}\s+(?:in|of)\s+(?:{COLLATERAL_TYPES})", re.IGNORECASE),),
+        lambda m: _parse_money(m.group(1), m.group(2)),
+        lambda v: v >= 1000,
+    ),
+    (
+        "assets",
+        _labelled(r"(?:total |liquid )?assets", MONEY),
+        lambda m: _parse_money(m.group(1), m.group(2)),
+        lambda v: v > 0,
+    ),
+    (
+        "liabilities",
+        _labelled(r"(?:total )?liabilities|existing debt", MONEY),
+        lambda m: _parse_money(m.group(1), m.group(2)),
+        lambda v: v > 0,
+    ),
+    (
+        "interest_rate",
+        _labelled(r"interest rate|rate|coupon|apr", PERCENT),
+        lambda m: _parse_ratio(m.group(1), m.group(2)),
+        lambda v: 0 < v < 0.5,
+    ),
+    (
+        "loan_term_months",
+        (
+            # A bare duration ("worked there for 5 years") is not a loan term: the context word is required
+            re.compile(r"(\d{1,3})[- ]?(year|yr|month|mo)s?[- ](?:term|loan|fixed|amortization|mortgage)\b", re.IGNORECASE),
+            re.compile(r"term(?: of|:)?\s*(\d{1,3})\s*(year|yr|month|mo)s?\b", re.IGNORECASE),
+        ),
+        lambda m: int(m.group(1)) * (12 if m.group(2).lower() in ("year", "yr") else 1),
+        lambda v: 1 <= v <= 480,
+    ),
+    (
+        "fees",
+        _labelled(r"(?:origination|processing|closing|underwriting)? ?fees?", rf"(?:{PERCENT}|{MONEY})"),
+        lambda m: m.group(0).strip(),
+        lambda v: True,
+    ),
+    (
+        "borrower_name",
+        (re.compile(r"(?i:borrower(?:'s name)?(?: name)?\s*(?:is|:|=))\s*((?:[A-Z][a-z'-]+\s?){1,3})"),),
+        lambda m: m.group(1).strip(),
+        lambda v: True,
+    ),
+    (
+        "employment",
+        (re.compile(r"\b(?:employed (?:at|by|as)|works? (?:at|for|as)|self[- ]employed|employment:?)[^.;\n]*", re.IGNORECASE),),
+        lambda m: m.group(0).strip(),
+        lambda v: True,
+    ),
+    (
+        "collateral_type",
+        (re.compile(rf"\b({COLLATERAL_TYPES})\b", re.IGNORECASE),),
+        lambda m: m.group(1).lower(),
+        lambda v: True,
+    ),
+    (
+        "guarantors",
+        (re.compile(r"\b(?:personal )?guarant(?:or|ee)s?\b[^.]*", re.IGNORECASE),),
+        lambda m: m.group(0).strip(),
+        lambda v: True,
+    ),
+    (
+        "conditions",
+        (re.compile(r"\b(?:pre-?funding |closing )?conditions?\b[^.]*", re.IGNORECASE),),
+        lambda m: m.group(0).strip(),
+        lambda v: True,
+    ),
+    (
+        "covenants",
+        (re.compile(r"\bcovenants?\b[^.]*", re.IGNORECASE),),
+        lambda m: m.group(0).strip(),
+        lambda v: True,
+    ),
+    (
+        "risk_rating",
+        (re.compile(r"\b(low|moderate|medium(?:-high)?|high)\s+risk\b|\brisk (?:rating|grade)\s*(?:is|of|:)?\s*(\w[\w-]*)", re.IGNORECASE),),
+        lambda m: (m.group(1) or m.group(2)).lower(),
+        lambda v: True,
+    ),
+]
+
+def extract_lending_facts(text: str) -> Dict[str, Any]:
+    """
+    Pull lending facts out of free conversation text with deterministic rules (no model).
+    When a fact is mentioned several times, the latest mention wins so corrections are honored.
+    """
+    facts: Dict[str, Any] = {}
+    for name, patterns, convert, is_valid in FACT_RULES:
+        found: List[Tuple[int, Any]] = []
+        for pattern in patterns:
+            for match in pattern.finditer(text):
+                try:
+                    value = convert(match)
+                except (TypeError, ValueError):
+                    continue
+                if is_valid(value):
+                    found.append((match.start(), value))
+        if not found:
+            continue
+        found.sort(key=lambda item: item[0])
+        if name in MULTI_VALUE_FACTS:
+            facts[name] = ", ".join(dict.fromkeys(value for _, value in found))
+        else:
+            facts[name] = found[-1][1]
+    # A collateral value is only meaningful together with a loan amount when LTV was not stated
+    if "ltv_ratio" not in facts and facts.get("collateral_value") and facts.get("loan_amount"):
+        facts["ltv_ratio"] = round(facts["loan_amount"] / facts["collateral_value"], 4)
+    return facts
+
+def memo_section_coverage(facts: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Facts available for each memo section (empty list when the section is uncovered)"""
+    return {section: [name for name in names if name in facts] for section, names in SECTION_FACTS.items()}
+
+def has_sufficient_memo_coverage(
+    facts: Dict[str, Any],
+    min_sections: Optional[int] = None,
+    min_facts: Optional[int] = None,
+) -> bool:
+    """Whether enough memo sections are backed by extracted facts to justify an LLM memo"""
+    min_sections = SUMMARY_MIN_COVERED_SECTIONS if min_sections is None else min_sections
+    min_facts = SUMMARY_MIN_FACTS if min_facts is None else min_facts
+    covered = sum(1 for names in memo_section_coverage(facts).values() if names)
+    return covered >= min_sections and len(facts) >= min_facts
+
+def format_facts_for_prompt(facts: Dict[str, Any]) -> str:
+    """Compact one-line-per-section rendering of extracted facts for the memo prompt"""
+    def render(name: str, value: Any) -> str:
+        if name in ("ltv_ratio", "debt_to_income_ratio", "interest_rate"):
+            return f"{name}={value:.2%}"
+        if isinstance(value, float):
+            return f"{name}=${value:,.0f}"
+        return f"{name}={value}"
+
+    lines = []
+    for section, names in memo_section_coverage(facts).items():
+        rendered = "; ".join(render(name, facts[name]) for name in names)
+        lines.append(f"{section}: {rendered or 'NOT PROVIDED'}")
+    return "\n".join(lines)
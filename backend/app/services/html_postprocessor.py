@@ -0,0 +1,194 @@
+import hashlib
+import os
+import re
+from typing import Dict, Optional, Set, Tuple
+
+from ..monitoring import Counter
+
+# Set to "false" to keep every inline style (fence stripping and whitespace cleanup still apply)
+MEMO_HOIST_STYLES = os.getenv("MEMO_HOIST_STYLES", "true").lower() != "false"
+# Prefix of generated class names; hashed names stay stable across memos, so several memos on a page never clash
+MEMO_STYLE_CLASS_PREFIX = "lm-"
+
+OPENING_FENCE = re.compile(r"^```[ \t]*[\w-]*[ \t]*\r?\n")
+CLOSING_FENCE = re.compile(r"\s*```\s*$")
+TAG_PATTERN = re.compile(r"<([a-zA-Z][\w:-]*)(\s[^<>]*?)?(\s*/?)>")
+STYLE_ATTR = re.compile(r"""\sstyle\s*=\s*(?:"([^"]*)"|'([^']*)')""", re.IGNORECASE)
+CLASS_ATTR = re.compile(r"""(\sclass\s*=\s*)(?:"([^"]*)"|'([^']*)')""", re.IGNORECASE)
+
+POSTPROCESS_BYTES = Counter(
+    "agentic_lender_memo_postprocess_bytes_total",
+    "Memo HTML bytes before and after post-processing",
+    ["form"],
+)
+
+class PostprocessResult:
+    """Post-processed memo HTML and what the post-processor saved"""
+
+    def __init__(self, html: str, input_bytes: int, hoisted_styles: int, fences_stripped: int):
+        self.html = html
+        self.input_bytes = input_bytes
+        self.output_bytes = len(html.encode("utf-8"))
+        self.hoisted_styles = hoisted_styles
+        self.fences_stripped = fences_stripped
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.input_bytes - self.output_bytes
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "saved_bytes": self.saved_bytes,
+            "hoisted_styles": self.hoisted_styles,
+            "fences_stripped": self.fences_stripped,
+        }
+
+def _normalize_style(style: str) -> str:
+    declarations = [" ".join(part.split()) for part in style.split(";")]
+    return "; ".join(declaration for declaration in declarations if declaration)
+
+def _style_class(style: str) -> str:
+    return MEMO_STYLE_CLASS_PREFIX + hashlib.sha1(style.encode("utf-8")).hexdigest()[:6]
+
+def _tag_style(attrs: Optional[str]) -> Tuple[Optional["re.Match[str]"], str]:
+    """The tag's style attribute and its normalized declarations ("" when it has none)"""
+    style_match = STYLE_ATTR.search(attrs) if attrs else None
+    if style_match is None:
+        return None, ""
+    return style_match, _normalize_style(style_match.group(1) if style_match.group(1) is not None else style_match.group(2))
+
+def plan_hoisted_styles(html_content: str) -> Set[str]:
+    """
+    Styles of a complete memo worth hoisting: those whose inline copies are longer than the
+    <style> rule plus the class attributes replacing them (and only if the block pays for itself)
+    """
+    savings: Dict[str, int] = {}
+    for match in TAG_PATTERN.finditer(html_content):
+        style_match, style = _tag_style(match.group(2))
+        if not style:
+            continue
+        class_name = _style_class(style)
+        added = len(f" {class_name}") if CLASS_ATTR.search(match.group(2)) else len(f' class="{class_name}"')
+        if style not in savings:
+            savings[style] = -len(f".{class_name}{{{style}}}")
+        savings[style] += len(style_match.group(0)) - added
+    hoisted = {style for style, saving in savings.items() if saving > 0}
+    if sum(savings[style] for style in hoisted) <= len("<style></style>"):
+        return set()
+    return hoisted
+
+class MemoHTMLPostProcessor:
+    """
+    Single-pass, streaming-capable normalizer for LLM memo HTML.
+    Strips a leading ```/```html fence (any language tag, leading whitespace) and a trailing fence,
+    and moves inline styles into one generated <style> block as short hashed classes merged into the
+    element's existing classes. Given `planned_styles` (see plan_hoisted_styles) every use of those
+    styles is hoisted; streamed output is not known in advance, so without a plan a style's first use
+    stays inline and later uses are hoisted. Only `style`
+    and `class` are touched, so attributes such as `data-section` and classes such as
+    `clickable-section` are preserved.
+    Feed chunks with feed() as they arrive and call finish() once; each returns the HTML ready so far.
+    """
+
+    def __init__(self, hoist_styles: bool = MEMO_HOIST_STYLES, planned_styles: Optional[Set[str]] = None):
+        self.hoist_styles = hoist_styles
+        self.planned_styles = planned_styles
+        self._pending = ""
+        self._started = False
+        self._seen_styles: Dict[str, int] = {}
+        self._hoisted: Dict[str, str] = {}
+        self.input_bytes = 0
+        self.fences_stripped = 0
+
+    def _rewrite_tag(self, match: "re.Match[str]") -> str:
+        attrs = match.group(2)
+        style_match, style = _tag_style(attrs)
+        if not style:
+            return match.group(0)
+        if self.planned_styles is not None:
+            if style not in self.planned_styles:
+                return match.group(0)
+        else:
+            self._seen_styles[style] = self._seen_styles.get(style, 0) + 1
+            if self._seen_styles[style] < 2:
+                return match.group(0)
+
+        class_name = self._hoisted.setdefault(style, _style_class(style))
+        attrs = attrs[:style_match.start()] + attrs[style_match.end():]
+        class_match = CLASS_ATTR.search(attrs)
+        if class_match is None:
+            attrs = f' class="{class_name}"' + attrs
+        else:
+            existing = class_match.group(2) if class_match.group(2) is not None else class_match.group(3)
+            merged = f"{existing} {class_name}".strip()
+            attrs = attrs[:class_match.start()] + f'{class_match.group(1)}"{merged}"' + attrs[class_match.end():]
+        return f"<{match.group(1)}{attrs}{match.group(3)}>"
+
+    def _process(self, text: str) -> str:
+        if not self.hoist_styles:
+            return text
+        return TAG_PATTERN.sub(self._rewrite_tag, text)
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk of raw model output; returns the processed HTML that can be emitted so far"""
+        self.input_bytes += len(chunk.encode("utf-8"))
+        self._pending += chunk
+        if not self._started:
+            stripped = self._pending.lstrip()
+            if not stripped or (stripped.startswith("`") and "\n" not in stripped and len(stripped) < 32):
+                # Wait until we know whether the output opens with a fence
+                return ""
+            fence = OPENING_FENCE.match(stripped)
+            if fence:
+                stripped = stripped[fence.end():].lstrip()
+                self.fences_stripped += 1
+            self._pending = stripped
+            self._started = True
+
+        # Everything up to the last complete tag is final; the rest may be a split tag or a closing fence
+        cut = self._pending.rfind(">") + 1
+        ready, self._pending = self._pending[:cut], self._pending[cut:]
+        return self._process(ready)
+
+    def finish(self) -> str:
+        """Flush the remaining output, drop a closing fence and append the generated <style> block"""
+        if not self._started:
+            self._pending = self._pending.lstrip()
+            fence = OPENING_FENCE.match(self._pending + "\n")
+            if fence:
+                self._pending = ""
+                self.fences_stripped += 1
+        tail, fences = CLOSING_FENCE.subn("", self._pending)
+        self.fences_stripped += fences
+        self._pending = ""
+        return self._process(tail.rstrip()) + self.style_block()
+
+    def style_block(self) -> str:
+        if not self._hoisted:
+            return ""
+        rules = "".join(f".{class_name}{{{style}}}" for style, class_name in self._hoisted.items())
+        return f"<style>{rules}</style>"
+
+    @property
+    def hoisted_styles(self) -> int:
+        return len(self._hoisted)
+
+def postprocess_memo_html(html_content: Optional[str], hoist_styles: Optional[bool] = None) -> PostprocessResult:
+    """
+    Normalize a complete memo; the generated <style> block is placed first. Styles are hoisted
+    only where that makes the memo smaller, so the output is never larger than the input.
+    """
+    hoist_styles = MEMO_HOIST_STYLES if hoist_styles is None else hoist_styles
+    planned_styles = plan_hoisted_styles(html_content or "") if hoist_styles else None
+    processor = MemoHTMLPostProcessor(hoist_styles, planned_styles)
+    body = processor.feed(html_content or "")
+    body += processor.finish()
+    style_block = processor.style_block()
+    if style_block:
+        body = style_block + body[: len(body) - len(style_block)]
+    result = PostprocessResult(body.strip(), processor.input_bytes, processor.hoisted_styles, processor.fences_stripped)
+    POSTPROCESS_BYTES.inc(result.input_bytes, form="input")
+    POSTPROCESS_BYTES.inc(result.output_bytes, form="output")
+    return result
@@ -0,0 +1,154 @@
+import os
+from html import escape
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..memory import memo_archive
+from ..memory.memo_archive import content_hash
+from ..models import CompletenessReport
+from ..monitoring import stage_timer
+from .completeness_service import analyze_credit_request_data
+from .credit_service import CreditRequestFetchError, fetch_credit_request_data, format_credit_request_details
+from .html_postprocessor import postprocess_memo_html
+from .prompt_encoder import CREDIT_PROMPT_FORMAT
+from .near_duplicate import NEAR_DUPLICATE_LOOKUPS, NearDuplicateMatch, near_duplicate_index
+
+# "revise": serve the earlier memo of an equivalent file, and have the agent update only the changed
+# sections of a near-duplicate's memo; "reuse": only serve equivalent files' memos; "off": always generate
+MEMO_REUSE_MODE = os.getenv("MEMO_REUSE_MODE", "revise").lower()
+
+def build_credit_memo_prompt(request_id: str, credit_details: str, prompt_format: Optional[str] = None) -> str:
+    """
+    Build the Credit Memo Specialist prompt for a single credit request.
+    The compact prompt leaves sections and styling to the agent's instructions instead of repeating them.
+    """
+    if (prompt_format or CREDIT_PROMPT_FORMAT) == "compact":
+        return f"""
+Generate the HTML credit memo for credit request {request_id} with the sections, layout and styling
+set out in your instructions. Fields listed under MISSING are absent from the file: mark their
+sections incomplete (clickable-section with data-section) rather than inventing values.
+Return only HTML starting with <div> and ending with </div>, with no markdown or code fences.
+
+{credit_details}
+"""
+    return f"""
+Generate a comprehensive HTML credit memo for credit request {request_id}.
+
+CREDIT REQUEST DATA:
+{credit_details}
+
+Generate a comprehensive HTML credit memo with these sections:
+- EXECUTIVE SUMMARY - Key metrics, recommendation summary, loan overview
+- CREDIT SUMMARY - Borrower financial profile, risk assessment, creditworthiness
+- CLIENT BACKGROUND - Borrower details, employment history, guarantors
+- COLLATERAL ANALYSIS - Property valuation, LTV analysis, market conditions
+- PRICING & FEES - Interest rate justification, fee structure, payment analysis
+- CONDITIONS & COVENANTS - Pre-funding conditions, ongoing requirements
+- RISK ASSESSMENT - Key risks, mitigating factors, overall risk rating
+- RECOMMENDATION - Final lending decision with supporting rationale
+
+CRITICAL HTML FORMATTING REQUIREMENTS:
+- Generate ONLY HTML content with inline CSS styling
+- Use professional banking memo design with clean sections
+- Include data tables for financial information
+- Use color-coded risk indicators (green=low, yellow=medium, red=high)
+- Add progress bars for LTV ratios and key metrics
+- Professional color scheme (blues, grays, whites)
+- Card-based layout with proper spacing and borders
+- Consistent typography: font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif
+- Main container background: #f8fafc
+- Card styling: white background, border-radius: 12px, box-shadow: 0 2px 10px rgba(0,0,0,0.1)
+- For incomplete sections: add clickable-section class with data-section attribute and hover effects
+- Make it visually appealing and easy to read
+- Do NOT include any markdown, code blocks, or ```html tags
+- Start with <div> and end with </div>
+- Ready for React dangerouslySetInnerHTML injection
+
+Focus on creating a professional, comprehensive, and visually appealing credit memo.
+"""
+
+def build_memo_revision_prompt(request_id: str, credit_details: str, match: NearDuplicateMatch) -> str:
+    """Prompt to update a near-duplicate file's memo rather than write a new one"""
+    changes = "\n".join(
+        f"- {change['field']}: {change['previous'] or '(empty)'} -> {change['current'] or '(empty)'}"
+        for change in match.changed_fields
+    )
+    return f"""
+Update an existing HTML credit memo for credit request {request_id}.
+
+The memo below was written for credit request {match.request_id}, whose file is almost identical.
+Only these fields differ:
+{changes}
+
+Rewrite only these sections to reflect the new values: {", ".join(match.changed_sections)}.
+Copy every other section, the layout and all styling exactly as they are, and refer to
+credit request {request_id} throughout.
+
+CREDIT REQUEST DATA:
+{credit_details}
+
+EXISTING MEMO:
+{match.html}
+
+Return ONLY the complete updated HTML memo. Do NOT include any markdown, code blocks, or ```html tags.
+"""
+
+def find_reusable_memo(request_id: str, data: Optional[Dict[str, Any]]) -> Optional[NearDuplicateMatch]:
+    """
+    Earlier memo of an identical or near-identical credit file, with its HTML rewritten for
+    `request_id`. The match is `reusable` when nothing the memo reports differs; otherwise its
+    memo should be revised with build_memo_revision_prompt. None when there is nothing to reuse.
+    """
+    if MEMO_REUSE_MODE not in ("reuse", "revise") or data is None:
+        return None
+    with stage_timer("memo_reuse_lookup"):
+        match = near_duplicate_index.find(data)
+    html = memo_archive.get_html(match.memo_hash) if match is not None else None
+    if match is None or html is None or (not match.reusable and MEMO_REUSE_MODE != "revise"):
+        NEAR_DUPLICATE_LOOKUPS.inc(result="miss")
+        return None
+    match.html = html.replace(match.request_id, request_id)
+    NEAR_DUPLICATE_LOOKUPS.inc(result="reused" if match.reusable else "revised")
+    print(f"Memo for {request_id} {'reused' if match.reusable else 'revised'} from {match.request_id} ({match.similarity:.0%} similar)")
+    return match
+
+def index_memo_source(request_id: str, data: Optional[Dict[str, Any]], html_content: str):
+    """Make an archived memo available for reuse by later near-duplicate files"""
+    if data is not None and MEMO_REUSE_MODE in ("reuse", "revise"):
+        near_duplicate_index.add(request_id, data, content_hash(html_content))
+
+def combine_memo_html(memos: List[Tuple[str, str]]) -> str:
+    """One summary-section HTML for several credit requests: each (request ID, memo HTML) under its own heading"""
+    sections = "\n".join(
+        f'<section data-credit-request-id="{escape(request_id)}" style="margin-bottom: 32px;">'
+        f'<h2 style="font-family: \'Segoe UI\', Tahoma, Geneva, Verdana, sans-serif; color: #1e3a8a; '
+        f'border-bottom: 2px solid #cbd5e1; padding-bottom: 8px;">Credit request {escape(request_id)}</h2>'
+        f"{html}</section>"
+        for request_id, html in memos
+    )
+    return f"<div>{sections}</div>"
+
+def clean_html_content(html_content: str) -> str:
+    """Strip the markdown fences the agent wraps around its HTML and hoist repeated inline styles"""
+    result = postprocess_memo_html(html_content)
+    if result.hoisted_styles:
+        print(f"Memo HTML post-processed: {result.input_bytes} -> {result.output_bytes} bytes ({result.hoisted_styles} styles hoisted)")
+    return result.html
+
+async def load_credit_memo_inputs(request_id: str) -> Tuple[str, Optional[CompletenessReport], Optional[Dict[str, Any]]]:
+    """
+    Fetch a credit file for memo generation.
+    Returns the formatted credit details for the prompt, the file's completeness report
+    (None when the file could not be fetched or scored) and the raw payload (None when not fetched).
+    """
+    try:
+        data = await fetch_credit_request_data(request_id)
+    except CreditRequestFetchError as e:
+        return f"Error fetching credit request details: {str(e)}", None, None
+    credit_details = format_credit_request_details(request_id, data)
+    try:
+        with stage_timer("completeness_check"):
+            report = analyze_credit_request_data(data)
+    except ValueError as e:
+        print(f"Skipping completeness check for {request_id}: {e}")
+        report = None
+    return credit_details, report, data
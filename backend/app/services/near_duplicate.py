@@ -0,0 +1,198 @@
+import hashlib
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..monitoring import Counter, Histogram
+from .completeness_service import SCORED_FIELDS
+
+# Estimated Jaccard similarity of two credit files above which the earlier memo is reused
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("MEMO_NEAR_DUPLICATE_THRESHOLD", "0.85"))
+MINHASH_PERMUTATIONS = int(os.getenv("MEMO_MINHASH_PERMUTATIONS", "128"))
+# LSH bands (permutations / bands rows each); 16 x 8 finds pairs above ~0.8 almost always
+# and rarely returns pairs below ~0.5 as candidates
+MINHASH_BANDS = int(os.getenv("MEMO_MINHASH_BANDS", "16"))
+
+# Identifiers and bookkeeping dates do not change what a memo says
+IGNORED_FIELDS = {"request_id", "created_date", "updated_date"}
+# Memo section affected by each field; fields not scored for completeness are listed here
+FIELD_SECTIONS: Dict[str, str] = {
+    **{path: section for path, _, section in SCORED_FIELDS},
+    "status": "Executive Summary",
+    "conditions": "Conditions & Covenants",
+    "covenants": "Conditions & Covenants",
+    "guarantors": "Client Background",
+    "regulatory_notes": "Risk Assessment",
+}
+SHINGLE_WORDS = 3
+
+# Each "permutation" XORs the 64-bit shingle hashes with a fixed random mask: the minimum still lands
+# on a uniformly random shingle of the union, at a quarter of the cost of affine permutations in Python
+_PERMUTATIONS = [random.Random(20240115 + i).getrandbits(64) for i in range(MINHASH_PERMUTATIONS)]
+_EMPTY_HASH = (1 << 64) - 1
+
+NEAR_DUPLICATE_LOOKUPS = Counter(
+    "agentic_lender_memo_near_duplicate_lookups_total",
+    "Near-duplicate credit file lookups, by outcome",
+    ["result"],
+)
+NEAR_DUPLICATE_LOOKUP_DURATION = Histogram(
+    "agentic_lender_memo_near_duplicate_lookup_seconds",
+    "Near-duplicate credit file lookup latency",
+)
+
+def _normalize_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, (int, float)):
+        return f"{float(value):.6g}"
+    if isinstance(value, (list, tuple)):
+        return " | ".join(sorted(_normalize_value(item) for item in value))
+    return " ".join(str(value).lower().split())
+
+def credit_file_fields(data: Dict[str, Any], prefix: str = "") -> Dict[str, str]:
+    """Flatten a credit request payload into normalized "section.field" -> value pairs"""
+    fields: Dict[str, str] = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if path in IGNORED_FIELDS:
+            continue
+        if isinstance(value, dict):
+            fields.update(credit_file_fields(value, f"{path}."))
+        else:
+            fields[path] = _normalize_value(value)
+    return fields
+
+def credit_file_shingles(fields: Dict[str, str]) -> Set[str]:
+    """
+    Features compared between files: one per field value, a coarse bucket per number (so a
+    slightly different fee still shares a feature) and word shingles of the text fields
+    """
+    shingles: Set[str] = set()
+    for path, value in fields.items():
+        shingles.add(f"{path}={value}")
+        try:
+            shingles.add(f"{path}~{float(value):.2g}")
+            continue
+        except ValueError:
+            pass
+        words = value.split()
+        for start in range(max(1, len(words) - SHINGLE_WORDS + 1)):
+            shingles.add(f"{path}:{' '.join(words[start:start + SHINGLE_WORDS])}")
+    return shingles
+
+def minhash_signature(shingles: Set[str]) -> Tuple[int, ...]:
+    hashes = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big") for shingle in shingles]
+    if not hashes:
+        return tuple(_EMPTY_HASH for _ in _PERMUTATIONS)
+    return tuple(min([value ^ mask for value in hashes]) for mask in _PERMUTATIONS)
+
+def estimate_similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+class NearDuplicateMatch:
+    """An earlier memo'd credit file similar to the one being processed, and how it differs"""
+
+    def __init__(self, request_id: str, similarity: float, memo_hash: str, changed_fields: List[Dict[str, str]]):
+        self.request_id = request_id
+        self.similarity = similarity
+        self.memo_hash = memo_hash
+        self.changed_fields = changed_fields
+        # Set by the memo service once the earlier memo has been loaded
+        self.html: Optional[str] = None
+
+    @property
+    def reusable(self) -> bool:
+        """Nothing a memo reports differs, so the earlier memo can be served as is"""
+        return not self.changed_fields
+
+    @property
+    def changed_sections(self) -> List[str]:
+        return list(dict.fromkeys(FIELD_SECTIONS.get(change["field"], "Executive Summary") for change in self.changed_fields))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "matched_request_id": self.request_id,
+            "similarity": round(self.similarity, 3),
+            "memo_hash": self.memo_hash,
+            "changed_fields": self.changed_fields,
+            "changed_sections": self.changed_sections,
+        }
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of memo'd credit files. Each file is reduced to a MinHash signature over its
+    normalized fields and text shingles; signatures are split into bands and files sharing any band
+    become candidates, so a lookup only compares a handful of signatures however large the portfolio.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUPLICATE_THRESHOLD, bands: int = MINHASH_BANDS):
+        self.threshold = threshold
+        self.bands = max(1, min(bands, len(_PERMUTATIONS)))
+        self.rows = len(_PERMUTATIONS) // self.bands
+        self._buckets: List[Dict[Tuple[int, ...], Set[str]]] = [{} for _ in range(self.bands)]
+        # request ID -> (signature, normalized fields, memo hash)
+        self._entries: Dict[str, Tuple[Tuple[int, ...], Dict[str, str], str]] = {}
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        return [signature[band * self.rows:(band + 1) * self.rows] for band in range(self.bands)]
+
+    def add(self, request_id: str, data: Dict[str, Any], memo_hash: str):
+        """Index the credit file a memo was generated from (replacing the request's earlier entry)"""
+        self.remove(request_id)
+        fields = credit_file_fields(data)
+        signature = minhash_signature(credit_file_shingles(fields))
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(key, set()).add(request_id)
+        self._entries[request_id] = (signature, fields, memo_hash)
+
+    def remove(self, request_id: str):
+        entry = self._entries.pop(request_id, None)
+        if entry is None:
+            return
+        for bucket, key in zip(self._buckets, self._band_keys(entry[0])):
+            members = bucket.get(key)
+            if members is not None:
+                members.discard(request_id)
+                if not members:
+                    del bucket[key]
+
+    def find(self, data: Dict[str, Any], threshold: Optional[float] = None) -> Optional[NearDuplicateMatch]:
+        """Most similar indexed file at or above the threshold, or None"""
+        started = time.perf_counter()
+        fields = credit_file_fields(data)
+        signature = minhash_signature(credit_file_shingles(fields))
+        candidates: Set[str] = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+
+        best: Optional[Tuple[float, str]] = None
+        for candidate in candidates:
+            similarity = estimate_similarity(signature, self._entries[candidate][0])
+            if best is None or similarity > best[0]:
+                best = (similarity, candidate)
+        NEAR_DUPLICATE_LOOKUP_DURATION.observe(time.perf_counter() - started)
+
+        if best is None or best[0] < (self.threshold if threshold is None else threshold):
+            return None
+        similarity, request_id = best
+        _, matched_fields, memo_hash = self._entries[request_id]
+        changed = [
+            {"field": path, "previous": matched_fields.get(path, ""), "current": fields.get(path, "")}
+            for path in sorted(set(fields) | set(matched_fields))
+            if fields.get(path) != matched_fields.get(path)
+        ]
+        return NearDuplicateMatch(request_id, similarity, memo_hash, changed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "indexed_files": len(self._entries),
+            "threshold": self.threshold,
+            "permutations": len(_PERMUTATIONS),
+            "bands": self.bands,
+            "rows_per_band": self.rows,
+            "buckets": sum(len(bucket) for bucket in self._buckets),
+        }
+
+near_duplicate_index = NearDuplicateIndex()
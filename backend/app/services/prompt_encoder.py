@@ -0,0 +1,93 @@
+import os
+from typing import Any, Callable, Dict, List, Tuple
+
+from .completeness_service import is_missing_value
+
+# "compact" (default) encodes credit files with encode_credit_request_compact and keeps styling rules
+# in the memo agent's instructions; "verbose" restores the labelled text block and in-prompt styling
+CREDIT_PROMPT_FORMAT = os.getenv("CREDIT_PROMPT_FORMAT", "compact").lower()
+# Bump when the layout changes, so prompts (and their token counts) can be told apart
+COMPACT_FORMAT_VERSION = "compact-v1"
+
+def _amount(value: float) -> str:
+    return f"{value:.0f}"
+
+def _ratio(value: float) -> str:
+    return f"{value * 100:.1f}%"
+
+def _percent(value: float) -> str:
+    return f"{value:.2f}%"
+
+def _text(value: Any) -> str:
+    return " ".join(str(value).split())
+
+# (section, [(field path, label, formatter)]) in prompt order; the formatter carries the field's unit
+# from the credit file schema (ratios are fractions, interest_rate is already in percent)
+COMPACT_SECTIONS: List[Tuple[str, List[Tuple[str, str, Callable[[Any], str]]]]] = [
+    ("BORROWER", [
+        ("borrower.name", "name", _text),
+        ("borrower.credit_score", "credit score", str),
+        ("borrower.annual_income", "income", _amount),
+        ("borrower.debt_to_income_ratio", "DTI", _ratio),
+        ("borrower.employment_history", "employment", _text),
+        ("borrower.assets", "assets", _amount),
+        ("borrower.liabilities", "liabilities", _amount),
+    ]),
+    ("COLLATERAL", [
+        ("collateral.property_type", "type", _text),
+        ("collateral.property_value", "value", _amount),
+        ("collateral.ltv_ratio", "LTV", _ratio),
+        ("collateral.appraisal_date", "appraised", _text),
+        ("collateral.address", "address", _text),
+    ]),
+    ("PRICING", [
+        ("pricing.interest_rate", "rate", _percent),
+        ("pricing.loan_term_months", "term months", str),
+        ("pricing.monthly_payment", "payment", _amount),
+        ("pricing.origination_fee", "origination fee", _amount),
+        ("pricing.processing_fee", "processing fee", _amount),
+        ("pricing.total_fees", "total fees", _amount),
+    ]),
+    ("LOAN", [
+        ("loan_amount", "amount", _amount),
+        ("loan_purpose", "purpose", _text),
+        ("status", "status", _text),
+        ("risk_rating", "risk rating", _text),
+    ]),
+]
+# Fields whose values legitimately read like placeholders (a "pending" loan status is not missing data)
+LITERAL_FIELDS = {"status"}
+LIST_SECTIONS = [("CONDITIONS", "conditions"), ("COVENANTS", "covenants"), ("GUARANTORS", "guarantors")]
+
+def _get(data: Dict[str, Any], path: str) -> Any:
+    value: Any = data
+    for key in path.split("."):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+def encode_credit_request_compact(request_id: str, data: Dict[str, Any]) -> str:
+    """
+    Dense, versioned prompt encoding of a credit file: one line per section with short labels,
+    whole-dollar amounts, and missing values (zero, empty or placeholder) left out of their
+    section and listed once under MISSING so the model cannot mistake them for real zeros
+    """
+    lines = [f"CREDIT FILE {request_id} ({COMPACT_FORMAT_VERSION}; amounts USD; MISSING fields are unknown, not zero)"]
+    missing: List[str] = []
+    for section, fields in COMPACT_SECTIONS:
+        values = []
+        for path, label, formatter in fields:
+            value = _get(data, path)
+            if value in (None, "") or (path not in LITERAL_FIELDS and is_missing_value(value)):
+                missing.append(f"{section.lower()} {label}")
+            else:
+                values.append(f"{label} {formatter(value)}")
+        lines.append(f"{section}: {'; '.join(values) or '-'}")
+    for section, key in LIST_SECTIONS:
+        items = [_text(item) for item in data.get(key) or [] if not is_missing_value(item)]
+        lines.append(f"{section}: {' | '.join(items) or 'none'}")
+    if not is_missing_value(data.get("regulatory_notes")):
+        lines.append(f"REGULATORY: {_text(data['regulatory_notes'])}")
+    lines.append(f"DATES: created {data.get('created_date') or '-'}; updated {data.get('updated_date') or '-'}")
+    if missing:
+        lines.append(f"MISSING: {', '.join(missing)}")
+    return "\n".join(lines)
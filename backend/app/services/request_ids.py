@@ -0,0 +1,37 @@
+import asyncio
+import os
+import re
+from typing import Awaitable, Callable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Credit request ID formats recognised in messages; add a pattern here to accept another format
+REQUEST_ID_FORMATS: List[str] = [
+    r"US-\d{6}-\d{4}",
+]
+# Credit requests handled for one chat message; further IDs are reported as skipped
+MAX_REQUEST_IDS_PER_MESSAGE = int(os.getenv("CHAT_MAX_REQUEST_IDS", "5"))
+# Credit file fetches and memo generations run at once for one chat message
+REQUEST_ID_CONCURRENCY = int(os.getenv("CHAT_REQUEST_ID_CONCURRENCY", "3"))
+
+# All formats in one alternation, so a message is scanned once whatever the number of formats
+REQUEST_ID_SCANNER = re.compile(r"\b(?:" + "|".join(f"(?:{pattern})" for pattern in REQUEST_ID_FORMATS) + r")\b")
+
+def extract_request_ids(text: str) -> List[str]:
+    """Every credit request ID in a message, in order of first mention, without duplicates"""
+    return list(dict.fromkeys(match.group(0) for match in REQUEST_ID_SCANNER.finditer(text)))
+
+async def gather_limited(
+    items: Sequence[T],
+    worker: Callable[[T], Awaitable[R]],
+    limit: Optional[int] = None,
+) -> List[R]:
+    """Run `worker` over `items` with at most `limit` running at once; results keep the item order"""
+    semaphore = asyncio.Semaphore(max(1, limit or REQUEST_ID_CONCURRENCY))
+
+    async def run(item: T) -> R:
+        async with semaphore:
+            return await worker(item)
+
+    return list(await asyncio.gather(*(run(item) for item in items)))
@@ -0,0 +1,107 @@
+"""
+Prompt and response shapes from an LLM cassette.
+
+Summarizes the exchanges recorded with LLM_CASSETTE_MODE=record per route and agent: calls, errors,
+prompt and response size, token counts and model latency. Pass --compare with a cassette recorded
+on another commit to see how a code change moved prompt size and token usage.
+
+    uv run python -m benchmarks.cassette_report cassettes/llm_exchanges.jsonl
+    uv run python -m benchmarks.cassette_report cassettes/after.jsonl --compare cassettes/before.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.load_test import git_commit, latency_summary, percentile  # noqa: E402
+
+def read_cassette(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def size_summary(values: List[int]) -> Dict[str, Any]:
+    return {
+        "mean": round(sum(values) / len(values), 1) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "max": max(values) if values else 0,
+    }
+
+def summarize(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per 'endpoint agent' group: calls, errors, sizes, tokens and latency"""
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for entry in entries:
+        groups[f"{entry.get('endpoint', 'background')} {entry['agent']}"].append(entry)
+    summary = {}
+    for name, group in sorted(groups.items()):
+        answered = [entry for entry in group if "error" not in entry]
+        summary[name] = {
+            "calls": len(group),
+            "errors": len(group) - len(answered),
+            "models": sorted({entry.get("model", "unknown") for entry in group}),
+            "prompt_chars": size_summary([entry["prompt_chars"] for entry in group]),
+            "response_chars": size_summary([entry.get("content_chars", 0) for entry in answered]),
+            "input_tokens": size_summary([entry["usage"]["input_tokens"] for entry in answered]),
+            "output_tokens": size_summary([entry["usage"]["output_tokens"] for entry in answered]),
+            "latency": latency_summary([entry["latency_s"] for entry in answered], len(group) - len(answered)),
+        }
+    return summary
+
+def print_summary(summary: Dict[str, Any]):
+    print(f"{'route / agent':<48}{'calls':>7}{'errors':>8}{'prompt p50':>12}{'in tok p50':>12}{'out tok p50':>12}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, group in summary.items():
+        print(
+            f"{name:<48}{group['calls']:>7}{group['errors']:>8}{group['prompt_chars']['p50']:>12}"
+            f"{group['input_tokens']['p50']:>12}{group['output_tokens']['p50']:>12}"
+            f"{group['latency']['p50_ms']:>10.0f}{group['latency']['p95_ms']:>10.0f}"
+        )
+
+def print_comparison(current: Dict[str, Any], baseline: Dict[str, Any]):
+    print(f"\n{'route / agent':<48}{'metric':<16}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, group in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ("prompt_chars", "input_tokens", "output_tokens"):
+            old, new = base[metric]["mean"], group[metric]["mean"]
+            change = (new - old) / old if old else 0.0
+            print(f"{name:<48}{metric:<16}{old:>12.1f}{new:>12.1f}{change:>+10.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt and response shapes from an LLM cassette")
+    parser.add_argument("cassette", help="Cassette recorded with LLM_CASSETTE_MODE=record")
+    parser.add_argument("--compare", default=None, help="Cassette from another commit to compare prompt size and tokens against")
+    parser.add_argument("--output", default=None, help="Results JSON path (default: benchmarks/results/cassette_<timestamp>.json)")
+    args = parser.parse_args()
+
+    entries = read_cassette(args.cassette)
+    results: Dict[str, Any] = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "cassette": args.cassette,
+            "exchanges": len(entries),
+            "baseline": args.compare,
+        },
+        "groups": summarize(entries),
+    }
+    print_summary(results["groups"])
+    if args.compare:
+        print_comparison(results["groups"], summarize(read_cassette(args.compare)))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"cassette_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Load-test and latency benchmark for the API.
+
+Runs mixed workloads against /chat, /generate-summary, /generate-credit-memo and /chat-history
+and reports throughput, p50/p95/p99 latency and memory growth per scenario.
+
+    # App started in this process on a loopback port, stubbed model (LLM_BACKEND=fake)
+    uv run python -m benchmarks.load_test --scenarios mixed,chat --concurrency 20 --duration 30
+
+    # Against an already running server
+    uv run python -m benchmarks.load_test --target http://localhost:8000
+
+    # Record real model exchanges once, then replay them offline with the recorded latency
+    LLM_BACKEND=anthropic uv run python -m benchmarks.load_test --cassette cassettes/baseline.jsonl --cassette-mode record
+    uv run python -m benchmarks.load_test --cassette cassettes/baseline.jsonl --cassette-mode replay
+
+    # Compare with an earlier run; exits non-zero on a regression beyond --fail-threshold
+    uv run python -m benchmarks.load_test --compare benchmarks/results/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+FOLLOW_UP_MESSAGES = [
+    "Thanks!",
+    "Where is my memo?",
+    "What are the biggest risks on this file?",
+    "Can you explain the LTV calculation?",
+    "hello",
+    "Should we ask for a guarantor given the DTI?",
+    "Is the collateral valuation recent enough?",
+    "thank you",
+]
+
+CONVERSATION_FACTS = [
+    "The borrower is John Smith, credit score 750, income $85,000.",
+    "Collateral is a single family residence valued at $400k, LTV will be 75%.",
+    "Interest rate of 6.5% on a 30-year term, origination fee 1%.",
+    "Employed at TechCorp for 5 years. Covenant: maintain property insurance.",
+    "DTI is 28%, total assets $150,000 and liabilities $45,000.",
+]
+
+Recorder = Callable[[str, float, bool], None]
+
+def random_request_id(rng: random.Random) -> str:
+    return f"US-{rng.randint(100000, 999999)}-{rng.randint(1000, 9999)}"
+
+def session_length(rng: random.Random, mean_messages: float) -> int:
+    """Follow-up messages in a session: geometric, so most sessions are short and a few run long"""
+    p = 1 / max(mean_messages, 1)
+    return min(50, int(math.log(1 - rng.random()) / math.log(1 - p)) if p < 1 else 1)
+
+async def timed(client: httpx.AsyncClient, record: Recorder, label: str, method: str, url: str, **kwargs: Any) -> Optional[httpx.Response]:
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        record(label, time.perf_counter() - started, response.status_code < 400)
+        return response
+    except httpx.HTTPError:
+        record(label, time.perf_counter() - started, False)
+        return None
+
+async def chat_session(client: httpx.AsyncClient, rng: random.Random, record: Recorder, mean_messages: float):
+    """General conversation without a credit request"""
+    chat_id = f"bench_{uuid.uuid4().hex[:12]}"
+    for _ in range(1 + session_length(rng, mean_messages)):
+        await timed(client, record, "POST /chat", "POST", "/chat", json={"message": rng.choice(FOLLOW_UP_MESSAGES), "chatId": chat_id})
+
+async def memo_session(client: httpx.AsyncClient, rng: random.Random, record: Recorder, mean_messages: float):
+    """One-shot memo generation for a credit request ID"""
+    await timed(client, record, "POST /generate-credit-memo", "POST", "/generate-credit-memo", json={"message": random_request_id(rng)})
+
+async def mixed_session(client: httpx.AsyncClient, rng: random.Random, record: Recorder, mean_messages: float):
+    """Underwriter session: open a file, follow up, sometimes summarize, then reload history"""
+    chat_id = f"bench_{uuid.uuid4().hex[:12]}"
+    message = f"Continue the work for the credit request ID: {random_request_id(rng)}"
+    await timed(client, record, "POST /chat (request id)", "POST", "/chat", json={"message": message, "chatId": chat_id})
+    for _ in range(session_length(rng, mean_messages)):
+        await timed(client, record, "POST /chat", "POST", "/chat", json={"message": rng.choice(FOLLOW_UP_MESSAGES), "chatId": chat_id})
+    if rng.random() < 0.3:
+        conversation = " ".join(rng.sample(CONVERSATION_FACTS, k=rng.randint(1, len(CONVERSATION_FACTS))))
+        await timed(client, record, "POST /generate-summary", "POST", "/generate-summary", json={"message": conversation})
+    await timed(client, record, "GET /chat-history", "GET", f"/chat-history/{chat_id}")
+
+async def history_session(client: httpx.AsyncClient, rng: random.Random, record: Recorder, mean_messages: float):
+    """Read-heavy: one chat turn, then repeated history reloads"""
+    chat_id = f"bench_{uuid.uuid4().hex[:12]}"
+    await timed(client, record, "POST /chat", "POST", "/chat", json={"message": "hello", "chatId": chat_id})
+    for _ in range(5):
+        await timed(client, record, "GET /chat-history", "GET", f"/chat-history/{chat_id}")
+
+SCENARIOS: Dict[str, Callable[..., Awaitable[None]]] = {
+    "chat": chat_session,
+    "memo": memo_session,
+    "mixed": mixed_session,
+    "history": history_session,
+}
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+def latency_summary(values: List[float], errors: int) -> Dict[str, Any]:
+    return {
+        "count": len(values),
+        "errors": errors,
+        "mean_ms": round(1000 * sum(values) / len(values), 2) if values else 0.0,
+        "p50_ms": round(1000 * percentile(values, 50), 2),
+        "p95_ms": round(1000 * percentile(values, 95), 2),
+        "p99_ms": round(1000 * percentile(values, 99), 2),
+        "max_ms": round(1000 * max(values), 2) if values else 0.0,
+    }
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB (Linux /proc, falling back to peak RSS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 2)
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+        except ImportError:
+            return None
+
+async def run_scenario(
+    name: str,
+    base_url: str,
+    concurrency: int,
+    duration: Optional[float],
+    sessions: Optional[int],
+    mean_messages: float,
+    seed: int,
+    in_process: bool,
+) -> Dict[str, Any]:
+    """Run one scenario with `concurrency` virtual users until the duration or session budget runs out"""
+    script = SCENARIOS[name]
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+
+    def record(label: str, seconds: float, ok: bool):
+        latencies.setdefault(label, []).append(seconds)
+        errors.setdefault(label, 0)
+        if not ok:
+            errors[label] += 1
+
+    remaining = {"sessions": sessions}
+    rss_start = current_rss_mb() if in_process else None
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        async def virtual_user(index: int):
+            rng = random.Random(f"{seed}:{name}:{index}")
+            while True:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                if remaining["sessions"] is not None:
+                    if remaining["sessions"] <= 0:
+                        return
+                    remaining["sessions"] -= 1
+                await script(client, rng, record, mean_messages)
+
+        await asyncio.gather(*(virtual_user(index) for index in range(concurrency)))
+
+    elapsed = time.perf_counter() - started
+    all_latencies = [value for values in latencies.values() for value in values]
+    total_errors = sum(errors.values())
+    rss_end = current_rss_mb() if in_process else None
+    result: Dict[str, Any] = {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "requests": len(all_latencies),
+        "errors": total_errors,
+        "throughput_rps": round(len(all_latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency": latency_summary(all_latencies, total_errors),
+        "endpoints": {label: latency_summary(values, errors[label]) for label, values in sorted(latencies.items())},
+    }
+    if in_process:
+        from app.memory import chat_sessions
+
+        result["memory"] = {
+            "rss_start_mb": rss_start,
+            "rss_end_mb": rss_end,
+            "rss_growth_mb": round(rss_end - rss_start, 2) if rss_start is not None and rss_end is not None else None,
+            "sessions_in_memory": len(chat_sessions),
+        }
+    return result
+
+def start_in_process_server() -> str:
+    """Start the app with the stubbed model on a free loopback port and return its base URL"""
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    # /chat and /generate-credit-memo fetch credit files from the API itself
+    os.environ["CREDIT_API_BASE_URL"] = base_url
+
+    from main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return base_url
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], fail_threshold: float) -> bool:
+    """Print per-scenario deltas against a baseline run; returns False when a regression exceeds the threshold"""
+    ok = True
+    print(f"\nComparison with baseline {baseline.get('meta', {}).get('commit')} (fail threshold {fail_threshold:.0%}):")
+    print(f"{'scenario':<12}{'metric':<16}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        checks = [
+            ("throughput_rps", base["throughput_rps"], result["throughput_rps"], True),
+            ("p50_ms", base["latency"]["p50_ms"], result["latency"]["p50_ms"], False),
+            ("p95_ms", base["latency"]["p95_ms"], result["latency"]["p95_ms"], False),
+            ("p99_ms", base["latency"]["p99_ms"], result["latency"]["p99_ms"], False),
+        ]
+        for metric, old, new, higher_is_better in checks:
+            change = (new - old) / old if old else 0.0
+            regressed = (change < -fail_threshold) if higher_is_better else (change > fail_threshold)
+            ok = ok and not regressed
+            marker = "  REGRESSION" if regressed else ""
+            print(f"{name:<12}{metric:<16}{old:>12.2f}{new:>12.2f}{change:>+10.1%}{marker}")
+    return ok
+
+def print_summary(results: Dict[str, Any]):
+    print(f"\n{'scenario':<12}{'reqs':>8}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rss +MB':>10}")
+    for name, result in results["scenarios"].items():
+        latency = result["latency"]
+        growth = (result.get("memory") or {}).get("rss_growth_mb")
+        print(
+            f"{name:<12}{result['requests']:>8}{result['errors']:>8}{result['throughput_rps']:>10.2f}"
+            f"{latency['p50_ms']:>10.1f}{latency['p95_ms']:>10.1f}{latency['p99_ms']:>10.1f}"
+            f"{(growth if growth is not None else float('nan')):>10.2f}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test and latency benchmark for the Agentic Lender API")
+    parser.add_argument("--target", default="inprocess", help="'inprocess' (default) or the base URL of a running server")
+    parser.add_argument("--scenarios", default="mixed,chat,memo,history", help=f"Comma-separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=10, help="Virtual users per scenario")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds per scenario (default: run --sessions)")
+    parser.add_argument("--sessions", type=int, default=200, help="Sessions per scenario when --duration is not set")
+    parser.add_argument("--mean-messages", type=float, default=6.0, help="Mean follow-up messages per chat session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Results JSON path (default: benchmarks/results/load_<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to compare against")
+    parser.add_argument("--fail-threshold", type=float, default=0.2, help="Relative regression that fails --compare")
+    parser.add_argument("--cassette", default=None, help="LLM cassette file for --cassette-mode (in-process target only)")
+    parser.add_argument("--cassette-mode", choices=["record", "replay"], default=None, help="Record model exchanges to, or replay them from, --cassette")
+    parser.add_argument("--cassette-latency-scale", type=float, default=None, help="Replayed latency multiplier (default 1: as recorded)")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+
+    in_process = args.target == "inprocess"
+    if args.cassette_mode:
+        if not in_process:
+            parser.error("--cassette-mode needs the in-process target; set LLM_CASSETTE_* on the server instead")
+        os.environ["LLM_CASSETTE_MODE"] = args.cassette_mode
+        if args.cassette:
+            os.environ["LLM_CASSETTE_PATH"] = args.cassette
+        if args.cassette_latency_scale is not None:
+            os.environ["LLM_CASSETTE_LATENCY_SCALE"] = str(args.cassette_latency_scale)
+    base_url = start_in_process_server() if in_process else args.target.rstrip("/")
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "target": args.target,
+            "llm_backend": os.getenv("LLM_BACKEND", "anthropic") if in_process else None,
+            "llm_cassette": {
+                "mode": args.cassette_mode,
+                "path": os.getenv("LLM_CASSETTE_PATH"),
+                "latency_scale": float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1")),
+            } if args.cassette_mode else None,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "sessions": None if args.duration else args.sessions,
+            "mean_messages": args.mean_messages,
+            "seed": args.seed,
+        },
+        "scenarios": {},
+    }
+    for name in names:
+        print(f"Running scenario '{name}' ...")
+        results["scenarios"][name] = asyncio.run(run_scenario(
+            name,
+            base_url,
+            args.concurrency,
+            args.duration,
+            None if args.duration else args.sessions,
+            args.mean_messages,
+            args.seed,
+            in_process,
+        ))
+
+    print_summary(results)
+    output = args.output or os.path.join(RESULTS_DIR, f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare_results(results, baseline, args.fail_threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
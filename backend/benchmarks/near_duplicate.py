@@ -0,0 +1,161 @@
+"""
+Benchmark for near-duplicate credit file detection (MinHash/LSH memo reuse).
+
+Indexes a synthetic portfolio of credit files, then looks up trivially changed copies of indexed
+files (refreshed dates, a different processing fee) and unrelated new files. Reports index and
+lookup latency, how many changed copies were matched (recall) and how many new files were wrongly
+matched, as JSON under benchmarks/results.
+
+    uv run python -m benchmarks.near_duplicate --portfolio 50000 --lookups 2000
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from app.services.credit_service import get_conditions_for_borrower, get_covenants_for_borrower, get_guarantors_for_borrower, get_regulatory_notes_for_borrower  # noqa: E402
+from app.services.near_duplicate import NearDuplicateIndex  # noqa: E402
+from benchmarks.load_test import git_commit, latency_summary  # noqa: E402
+
+FIRST_NAMES = ["John", "Sarah", "Michael", "Emily", "Robert", "Maria", "David", "Aisha", "Wei", "Carlos", "Priya", "Olga"]
+LAST_NAMES = ["Smith", "Johnson", "Brown", "Davis", "Wilson", "Garcia", "Chen", "Patel", "Nguyen", "Kowalski", "Okafor"]
+CITIES = ["Denver, CO 80202", "Austin, TX 78701", "Seattle, WA 98101", "Boston, MA 02108", "Phoenix, AZ 85004"]
+PROPERTY_TYPES = ["Single Family Residence", "Condominium", "Townhouse", "Multi-Family (2-4 units)"]
+PURPOSES = ["Home Purchase", "Refinance", "Cash-Out Refinance", "Construction"]
+TEMPLATE_KEYS = ["john", "sarah", "michael", "emily"]
+
+def random_credit_file(rng: random.Random, index: int) -> Dict[str, Any]:
+    """A complete credit request payload, varied enough that unrelated files share little"""
+    key = rng.choice(TEMPLATE_KEYS)
+    income = rng.randrange(40_000, 400_000, 500)
+    value = rng.randrange(150_000, 2_500_000, 1_000)
+    ltv = rng.choice([0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9])
+    loan_amount = value * ltv
+    return {
+        "request_id": f"US-{100000 + index % 900000:06d}-{index % 10000:04d}",
+        "borrower": {
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "credit_score": rng.randint(580, 820),
+            "annual_income": float(income),
+            "debt_to_income_ratio": round(rng.uniform(0.1, 0.45), 3),
+            "employment_history": f"{rng.randint(1, 25)} years at {rng.choice(LAST_NAMES)} {rng.choice(['Corp', 'LLC', 'Group', 'Partners'])}",
+            "assets": float(rng.randrange(10_000, 2_000_000, 1_000)),
+            "liabilities": float(rng.randrange(0, 800_000, 1_000)),
+        },
+        "collateral": {
+            "property_type": rng.choice(PROPERTY_TYPES),
+            "property_value": float(value),
+            "ltv_ratio": ltv,
+            "appraisal_date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "address": f"{rng.randint(1, 9999)} {rng.choice(LAST_NAMES)} St, {rng.choice(CITIES)}",
+        },
+        "pricing": {
+            "interest_rate": round(rng.uniform(5.0, 9.0), 3),
+            "loan_term_months": rng.choice([180, 240, 360]),
+            "monthly_payment": round(loan_amount * rng.uniform(0.005, 0.008), 2),
+            "origination_fee": round(loan_amount * 0.01, 2),
+            "processing_fee": float(rng.choice([995, 1200, 1500, 1750])),
+            "total_fees": round(loan_amount * 0.01 + 1500, 2),
+        },
+        "loan_amount": loan_amount,
+        "loan_purpose": rng.choice(PURPOSES),
+        "status": rng.choice(["pending", "under_review"]),
+        "risk_rating": rng.choice(["Low", "Medium", "Medium-High", "High"]),
+        "conditions": get_conditions_for_borrower(key),
+        "covenants": get_covenants_for_borrower(key),
+        "guarantors": get_guarantors_for_borrower(key),
+        "regulatory_notes": get_regulatory_notes_for_borrower(key),
+        "created_date": "2024-01-10",
+        "updated_date": "2024-01-15",
+    }
+
+def trivially_changed(rng: random.Random, data: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """Copy of a file under a new request ID with a refreshed date and, half the time, a new processing fee"""
+    changed = copy.deepcopy(data)
+    changed["request_id"] = f"US-{999999 - index % 900000:06d}-{index % 10000:04d}"
+    changed["updated_date"] = f"2024-{rng.randint(2, 12):02d}-{rng.randint(1, 28):02d}"
+    if rng.random() < 0.5:
+        changed["pricing"]["processing_fee"] += rng.choice([-250.0, 100.0, 250.0])
+    return changed
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate credit file detection benchmark")
+    parser.add_argument("--portfolio", type=int, default=20000, help="Credit files indexed before lookups")
+    parser.add_argument("--lookups", type=int, default=1000, help="Lookups of changed copies, and as many of new files")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Results JSON path (default: benchmarks/results/near_duplicate_<timestamp>.json)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = NearDuplicateIndex()
+    portfolio = [random_credit_file(rng, i) for i in range(args.portfolio)]
+
+    add_latencies: List[float] = []
+    for data in portfolio:
+        started = time.perf_counter()
+        index.add(data["request_id"], data, f"hash-{data['request_id']}")
+        add_latencies.append(time.perf_counter() - started)
+
+    duplicate_latencies: List[float] = []
+    matched = 0
+    reusable = 0
+    for i in range(args.lookups):
+        original = rng.choice(portfolio)
+        query = trivially_changed(rng, original, i)
+        started = time.perf_counter()
+        match = index.find(query)
+        duplicate_latencies.append(time.perf_counter() - started)
+        if match is not None and match.request_id == original["request_id"]:
+            matched += 1
+            reusable += match.reusable
+
+    new_latencies: List[float] = []
+    false_matches = 0
+    for i in range(args.lookups):
+        query = random_credit_file(rng, args.portfolio + i)
+        started = time.perf_counter()
+        match = index.find(query)
+        new_latencies.append(time.perf_counter() - started)
+        false_matches += match is not None
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "portfolio": args.portfolio,
+            "lookups": args.lookups,
+            "seed": args.seed,
+            **index.stats(),
+        },
+        "index_add": latency_summary(add_latencies, 0),
+        "lookup_near_duplicate": latency_summary(duplicate_latencies, 0),
+        "lookup_new_file": latency_summary(new_latencies, 0),
+        "recall": round(matched / max(1, args.lookups), 4),
+        "reusable_without_llm": round(reusable / max(1, args.lookups), 4),
+        "false_match_rate": round(false_matches / max(1, args.lookups), 4),
+    }
+
+    print(f"Portfolio of {args.portfolio} files, {args.lookups} lookups of each kind")
+    for label in ("index_add", "lookup_near_duplicate", "lookup_new_file"):
+        summary = results[label]
+        print(f"  {label:<22} p50 {summary['p50_ms']:>7.2f} ms  p95 {summary['p95_ms']:>7.2f} ms  p99 {summary['p99_ms']:>7.2f} ms")
+    print(f"  recall {results['recall']:.1%}, served without an LLM call {results['reusable_without_llm']:.1%}, false matches {results['false_match_rate']:.1%}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"near_duplicate_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+if __name__ == "__main__":
+    main()
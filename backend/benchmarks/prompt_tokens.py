@@ -0,0 +1,109 @@
+"""
+Prompt token benchmark: compact credit file encoding vs the verbose text block.
+
+Encodes the mock credit files and a synthetic portfolio in both formats and reports tokens per
+credit file and per memo call (memo agent instructions plus memo prompt). Tokens are estimated at
+about 4 characters per token, the same estimate the batch scheduler uses; pass --anthropic to count
+them with the Anthropic token counting API instead (needs ANTHROPIC_API_KEY).
+
+    uv run python -m benchmarks.prompt_tokens --files 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from app.agents import summary_generation_agent  # noqa: E402
+from app.agents.model_backend import AGENT_SPECS  # noqa: E402
+from app.agents.model_tiers import resolve_model_id  # noqa: E402
+from app.services.batch_service import estimate_prompt_tokens  # noqa: E402
+from app.services.credit_service import format_credit_request_details  # noqa: E402
+from app.services.memo_service import build_credit_memo_prompt  # noqa: E402
+from app.services.mock_data_service import get_mock_detailed_credit_request  # noqa: E402
+from app.services.prompt_encoder import COMPACT_FORMAT_VERSION  # noqa: E402
+from benchmarks.load_test import git_commit  # noqa: E402
+from benchmarks.near_duplicate import random_credit_file  # noqa: E402
+
+FORMATS = ["verbose", "compact"]
+MOCK_BORROWERS = ["john", "sarah", "michael", "emily", "robert"]
+
+def anthropic_counter() -> Callable[[str], int]:
+    import anthropic
+
+    client = anthropic.Anthropic()
+    model = resolve_model_id(AGENT_SPECS[summary_generation_agent.name]["tier"])
+
+    def count(text: str) -> int:
+        return client.messages.count_tokens(model=model, messages=[{"role": "user", "content": text}]).input_tokens
+
+    return count
+
+def summarize(values: List[int]) -> Dict[str, float]:
+    return {"mean": round(sum(values) / len(values), 1), "min": min(values), "max": max(values), "total": sum(values)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt token benchmark for credit file encodings")
+    parser.add_argument("--files", type=int, default=200, help="Synthetic credit files in addition to the mock borrowers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--anthropic", action="store_true", help="Count tokens with the Anthropic API instead of estimating")
+    parser.add_argument("--output", default=None, help="Results JSON path (default: benchmarks/results/prompt_tokens_<timestamp>.json)")
+    args = parser.parse_args()
+
+    count = anthropic_counter() if args.anthropic else estimate_prompt_tokens
+    rng = random.Random(args.seed)
+    files: List[Dict[str, Any]] = [
+        get_mock_detailed_credit_request(f"US-{100000 + index}-0001-{key}").model_dump() for index, key in enumerate(MOCK_BORROWERS)
+    ]
+    files += [random_credit_file(rng, index) for index in range(args.files)]
+
+    instructions_tokens = count("\n".join(AGENT_SPECS[summary_generation_agent.name]["instructions"]))
+    per_file: Dict[str, List[int]] = {name: [] for name in FORMATS}
+    per_memo: Dict[str, List[int]] = {name: [] for name in FORMATS}
+    for data in files:
+        request_id = data["request_id"]
+        for name in FORMATS:
+            details = format_credit_request_details(request_id, data, name)
+            per_file[name].append(count(details))
+            per_memo[name].append(instructions_tokens + count(build_credit_memo_prompt(request_id, details, name)))
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "compact_format": COMPACT_FORMAT_VERSION,
+            "files": len(files),
+            "seed": args.seed,
+            "counter": "anthropic" if args.anthropic else "estimate (4 chars/token)",
+            "memo_instructions_tokens": instructions_tokens,
+        },
+        "credit_file_tokens": {name: summarize(per_file[name]) for name in FORMATS},
+        "memo_input_tokens": {name: summarize(per_memo[name]) for name in FORMATS},
+    }
+    for key in ("credit_file_tokens", "memo_input_tokens"):
+        verbose, compact = results[key]["verbose"]["total"], results[key]["compact"]["total"]
+        results[key]["saved_percent"] = round(100 * (verbose - compact) / verbose, 1)
+
+    print(f"{len(files)} credit files, tokens counted by {results['meta']['counter']}")
+    for key, label in (("credit_file_tokens", "per credit file"), ("memo_input_tokens", "per memo call")):
+        row = results[key]
+        print(
+            f"  {label:<16} verbose {row['verbose']['mean']:>7.1f}  compact {row['compact']['mean']:>7.1f}  "
+            f"saved {row['saved_percent']}%"
+        )
+
+    output = args.output or os.path.join(RESULTS_DIR, f"prompt_tokens_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Warm restart benchmark for the on-disk session store.
+
+Writes a synthetic session history into a session store, then starts fresh worker processes
+against it and reports, per worker, how long opening the store and `import main` take, and the
+latency of the first and later accesses to stored sessions (which read them from disk).
+
+    uv run python -m benchmarks.session_restart --sessions 1000000 --workers 3
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.load_test import git_commit, latency_summary  # noqa: E402
+
+# Runs in each fresh worker process against SESSION_STORE_DIR; prints one JSON line of timings
+WORKER_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from app.memory import chat_sessions, get_chat_session, session_store
+chat_ids = json.loads(sys.argv[1])
+latencies = []
+for chat_id in chat_ids:
+    before = time.perf_counter()
+    assert chat_id in chat_sessions
+    session = get_chat_session(chat_id)
+    latencies.append(time.perf_counter() - before)
+    assert session["messages"]
+print(json.dumps({
+    "import_s": imported - started,
+    "store_open_s": session_store.open_seconds,
+    "access_s": latencies,
+    "sessions_loaded": len(chat_sessions),
+}))
+"""
+
+def synthetic_session(rng: random.Random, index: int, started: datetime) -> Dict[str, Any]:
+    created = started + timedelta(seconds=index)
+    messages = []
+    for turn in range(rng.randint(1, 6)):
+        messages.append({
+            "id": f"msg_{index}_{turn}_u",
+            "text": f"Please review credit request US-{100000 + index % 900000:06d}-{turn:04d}",
+            "sender": "user",
+            "timestamp": created.isoformat(),
+        })
+        messages.append({
+            "id": f"msg_{index}_{turn}_a",
+            "text": "Got it! The memo is in the summary section.",
+            "sender": "agent",
+            "timestamp": created.isoformat(),
+        })
+    return {
+        "messages": messages,
+        "summaryData": {"lastQuery": messages[-2]["text"], "lastResponse": messages[-1]["text"], "summaryGenerated": False},
+        "selectedRequestId": "",
+        "created_at": created.isoformat(),
+        "updated_at": created.isoformat(),
+    }
+
+def write_history(directory: str, sessions: int, seed: int) -> float:
+    from app.memory.session_store import SessionStore
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    # One checkpoint at the end rather than one per journal batch
+    store = SessionStore(directory, checkpoint_records=sessions + 1)
+    base = datetime(2024, 1, 1)
+    for index in range(sessions):
+        store.save(f"chat_{index}", synthetic_session(rng, index, base))
+    store.close()
+    return time.perf_counter() - started
+
+def run_worker(directory: str, chat_ids: List[str]) -> Dict[str, Any]:
+    completed = subprocess.run(
+        [sys.executable, "-c", WORKER_SCRIPT, json.dumps(chat_ids)],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "SESSION_STORE_DIR": directory},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm restart benchmark for the on-disk session store")
+    parser.add_argument("--sessions", type=int, default=200000, help="Stored sessions to restart against")
+    parser.add_argument("--workers", type=int, default=3, help="Fresh worker processes to start, one after another")
+    parser.add_argument("--accesses", type=int, default=200, help="Stored sessions each worker accesses after starting")
+    parser.add_argument("--directory", default=None, help="Session store directory to reuse (default: a temporary one)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Results JSON path (default: benchmarks/results/session_restart_<timestamp>.json)")
+    args = parser.parse_args()
+
+    directory = args.directory or tempfile.mkdtemp(prefix="session_store_")
+    try:
+        write_seconds = 0.0
+        if not os.path.exists(os.path.join(directory, "sessions.idx")):
+            print(f"Writing {args.sessions} sessions to {directory} ...")
+            write_seconds = write_history(directory, args.sessions, args.seed)
+            print(f"  written in {write_seconds:.1f} s")
+        disk_bytes = {name: os.path.getsize(os.path.join(directory, name)) for name in sorted(os.listdir(directory))}
+
+        rng = random.Random(args.seed + 1)
+        workers = []
+        for index in range(args.workers):
+            chat_ids = [f"chat_{rng.randrange(args.sessions)}" for _ in range(args.accesses)]
+            result = run_worker(directory, chat_ids)
+            workers.append(result)
+            print(
+                f"worker {index + 1}: store open {1000 * result['store_open_s']:.2f} ms, import {1000 * result['import_s']:.0f} ms, "
+                f"first access {1000 * result['access_s'][0]:.2f} ms, {result['sessions_loaded']} sessions loaded"
+            )
+
+        results = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.now().isoformat(),
+                "sessions": args.sessions,
+                "workers": args.workers,
+                "accesses_per_worker": args.accesses,
+                "history_write_seconds": round(write_seconds, 2),
+                "disk_bytes": disk_bytes,
+            },
+            "store_open": latency_summary([worker["store_open_s"] for worker in workers], 0),
+            "import": latency_summary([worker["import_s"] for worker in workers], 0),
+            "first_access": latency_summary([worker["access_s"][0] for worker in workers], 0),
+            "session_access": latency_summary([latency for worker in workers for latency in worker["access_s"]], 0),
+        }
+        print(
+            f"\n{args.sessions} stored sessions: store open p50 {results['store_open']['p50_ms']:.2f} ms, "
+            f"import p50 {results['import']['p50_ms']:.0f} ms, session access p50 {results['session_access']['p50_ms']:.3f} ms "
+            f"p99 {results['session_access']['p99_ms']:.3f} ms"
+        )
+    finally:
+        if args.directory is None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"session_restart_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
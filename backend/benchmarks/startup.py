@@ -0,0 +1,114 @@
+"""
+Worker startup benchmark.
+
+Starts fresh interpreters the way a server worker boots and reports, per worker, how long
+`import main` takes, whether the LLM stack (agno/anthropic) was imported on the way, the
+time to the first served request, and how long building the agents takes on first use.
+
+    uv run python -m benchmarks.startup --workers 5
+    LLM_BACKEND=fake uv run python -m benchmarks.startup --workers 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.load_test import git_commit  # noqa: E402
+
+# Runs in each fresh worker process; prints one JSON line of timings
+WORKER_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+llm_stack_at_import = any(name in sys.modules for name in ("agno", "anthropic"))
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    client.get("/")
+    first_response = time.perf_counter()
+    from app.agents.model_backend import preload_agents
+    preload_agents()
+    agents_built = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - started,
+    "first_request_s": first_response - started,
+    "agent_build_s": agents_built - first_response,
+    "llm_stack_at_import": llm_stack_at_import,
+}))
+"""
+
+def run_worker() -> Dict[str, Any]:
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", WORKER_SCRIPT],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - started
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    # Wall time from spawning the process (interpreter startup included) to the first response
+    result["process_to_first_request_s"] = elapsed - result["agent_build_s"]
+    return result
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "mean_ms": round(1000 * sum(ordered) / len(ordered), 1),
+        "p50_ms": round(1000 * ordered[len(ordered) // 2], 1),
+        "max_ms": round(1000 * ordered[-1], 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker startup benchmark for the Agentic Lender API")
+    parser.add_argument("--workers", type=int, default=5, help="Fresh worker processes to start, one after another")
+    parser.add_argument("--output", default=None, help="Results JSON path (default: benchmarks/results/startup_<timestamp>.json)")
+    args = parser.parse_args()
+
+    workers = []
+    for index in range(args.workers):
+        result = run_worker()
+        workers.append(result)
+        print(
+            f"worker {index + 1}: import {1000 * result['import_s']:.0f} ms, "
+            f"first request {1000 * result['process_to_first_request_s']:.0f} ms after spawn, "
+            f"agent build {1000 * result['agent_build_s']:.0f} ms"
+            f"{' (LLM stack imported at startup)' if result['llm_stack_at_import'] else ''}"
+        )
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "llm_backend": os.getenv("LLM_BACKEND", "anthropic"),
+            "workers": args.workers,
+        },
+        "import": summarize([worker["import_s"] for worker in workers]),
+        "time_to_first_request": summarize([worker["process_to_first_request_s"] for worker in workers]),
+        "agent_build_on_first_use": summarize([worker["agent_build_s"] for worker in workers]),
+        "llm_stack_imported_at_startup": any(worker["llm_stack_at_import"] for worker in workers),
+        "per_worker": workers,
+    }
+    print(
+        f"\nimport p50 {results['import']['p50_ms']} ms, time to first request p50 "
+        f"{results['time_to_first_request']['p50_ms']} ms, agent build p50 {results['agent_build_on_first_use']['p50_ms']} ms"
+    )
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,36 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 
-from app.api import router
-
-# Load environment variables
+# Load environment variables before importing the app so module-level settings see them
 BASEDIR = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(BASEDIR, ".env"))
 
+from app.api import router
+from app.agents.admission import AdmissionRejected
+from app.agents.model_backend import LLM_AGENT_PRELOAD, preload_agents
+from app.agents.resilience import CircuitOpenError
+from app.memory import session_store
+from app.monitoring import RequestProfilingMiddleware, RequestTimingMiddleware, request_profiler
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Agents are built on first use; optionally warm them up without holding up startup
+    if LLM_AGENT_PRELOAD == "background":
+        asyncio.get_running_loop().run_in_executor(None, preload_agents)
+    yield
+    # Fold the session journal into the snapshot index so the next start reads only the mapping
+    session_store.close()
+
 # Create FastAPI app
-app = FastAPI(title="Agentic Lender Memo", version="0.1.0")
+app = FastAPI(title="Agentic Lender Memo", version="0.1.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -20,8 +39,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "Retry-After", "X-Profile-Id"],
 )
 
+# Compress responses above the size threshold for clients that accept gzip (memo HTML compresses well)
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024")),
+    compresslevel=int(os.getenv("RESPONSE_COMPRESSION_LEVEL", "6")),
+)
+
+# Time every request: per-endpoint/stage histograms on /metrics and a Server-Timing header
+app.add_middleware(RequestTimingMiddleware)
+
+# On-demand profiling of chat/memo requests (admin header or sample rate); not installed when disabled
+if request_profiler.enabled:
+    app.add_middleware(RequestProfilingMiddleware)
+
+# Back-pressure: LLM calls that could not be admitted become 429s the client can retry
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "reason": exc.reason, "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+# Model outage with no cached or template answer: fail fast until the circuit's probe succeeds
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 # Include API routes
 app.include_router(router)
 
@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+from app.agents.admission import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_MEMO,
+    AdmissionController,
+    AdmissionRejected,
+    _Waiter,
+)
+
+def test_full_queue_and_wait_timeout_are_rejected():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+        async with admission.admit("/chat"):
+            waiting = asyncio.ensure_future(admission.admit("/chat").__aenter__())
+            await asyncio.sleep(0)
+            assert admission.waiting == 1
+            try:
+                async with admission.admit("/chat"):
+                    pass
+            except AdmissionRejected as e:
+                assert e.reason == "queue_full" and e.retry_after >= 1
+            else:
+                raise AssertionError("expected queue_full")
+            try:
+                await waiting
+            except AdmissionRejected as e:
+                assert e.reason == "timeout"
+        assert admission.in_flight == 0 and admission.waiting == 0
+        assert admission.stats["rejected_queue_full"] == 1 and admission.stats["rejected_timeout"] == 1
+
+    asyncio.run(scenario())
+
+def test_released_slot_goes_to_the_waiter():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=5)
+        order = []
+
+        async def call(name, hold):
+            async with admission.admit("/chat"):
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        await asyncio.gather(call("first", 0.01), call("second", 0), call("third", 0))
+        assert order == ["first", "second", "third"]
+        assert admission.in_flight == 0 and admission.stats["queued"] == 2
+
+    asyncio.run(scenario())
+
+def test_rejection_becomes_429_with_retry_after():
+    from main import admission_rejected_handler
+
+    response = asyncio.run(admission_rejected_handler(None, AdmissionRejected("queue_full", 7)))
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "7"
+    assert json.loads(response.body)["reason"] == "queue_full"
+
+def test_free_slots_go_to_the_most_urgent_class():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queue=8, queue_timeout=5, aging_seconds=0)
+        order = []
+
+        async def call(name, priority):
+            async with admission.admit("/test", priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        holder = asyncio.ensure_future(call("holder", PRIORITY_MEMO))
+        await asyncio.sleep(0)
+        queued = [call("batch", PRIORITY_BATCH), call("memo", PRIORITY_MEMO), call("chat", PRIORITY_INTERACTIVE)]
+        await asyncio.gather(holder, *queued)
+        assert order == ["holder", "chat", "memo", "batch"]
+        assert admission.admitted_by_priority == {PRIORITY_INTERACTIVE: 1, PRIORITY_MEMO: 2, PRIORITY_BATCH: 1}
+
+    asyncio.run(scenario())
+
+def test_aging_promotes_long_waiting_batch_work():
+    admission = AdmissionController(max_in_flight=1, max_queue=8, queue_timeout=5, aging_seconds=1)
+    now = 100.0
+    batch = _Waiter(PRIORITY_BATCH, 0, None)
+    chat = _Waiter(PRIORITY_INTERACTIVE, 1, None)
+    batch.queued_at = now - 3
+    chat.queued_at = now
+    assert admission._effective_rank(batch, now) < admission._effective_rank(chat, now)
+
+def test_unknown_priority_is_refused():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=1)
+        async with admission.admit("/test", "urgent"):
+            pass
+
+    try:
+        asyncio.run(scenario())
+    except ValueError as e:
+        assert "urgent" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
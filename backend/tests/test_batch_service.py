@@ -0,0 +1,52 @@
+import asyncio
+
+from app.services import batch_service
+from app.services.batch_service import WINDOW_SECONDS, RateLimitScheduler
+
+def test_oversized_request_waits_for_an_empty_window():
+    scheduler = RateLimitScheduler(requests_per_minute=100, tokens_per_minute=1000)
+    scheduler._events.extend([[0.0, 100], [10.0, 100]])
+    assert scheduler._wait_time(20.0, 5000) == 10.0 + WINDOW_SECONDS - 20.0
+    scheduler._events.clear()
+    assert scheduler._wait_time(20.0, 5000) == 0.0
+
+def test_only_transient_errors_are_retried(monkeypatch):
+    calls = []
+
+    async def generate(request_id):
+        calls.append(request_id)
+        raise ValueError("malformed credit file")
+
+    monkeypatch.setattr(batch_service, "generate_scheduled_memo", generate)
+    result = asyncio.run(batch_service._generate_with_retries("US-1", max_attempts=3))
+    assert result["event"] == "failed" and result["attempts"] == 1 and len(calls) == 1
+
+    calls.clear()
+    monkeypatch.setattr(batch_service, "BATCH_RETRY_BACKOFF_SECONDS", 0.0)
+
+    async def time_out(request_id):
+        calls.append(request_id)
+        raise asyncio.TimeoutError()
+
+    monkeypatch.setattr(batch_service, "generate_scheduled_memo", time_out)
+    result = asyncio.run(batch_service._generate_with_retries("US-1", max_attempts=3))
+    assert result["attempts"] == 3 and len(calls) == 3
+
+def test_client_concurrency_is_capped(monkeypatch):
+    running = peak = 0
+
+    async def generate(request_id, max_attempts):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"event": "memo", "credit_request_id": request_id}
+
+    async def run():
+        return [event async for event in batch_service.run_memo_batch([f"US-{i}" for i in range(20)], max_concurrency=50)]
+
+    monkeypatch.setattr(batch_service, "_generate_with_retries", generate)
+    events = asyncio.run(run())
+    assert events[-1]["succeeded"] == 20
+    assert peak == batch_service.BATCH_MAX_CONCURRENCY
@@ -0,0 +1,23 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from main import app
+
+async def _batch(request_ids, max_concurrency=None, max_attempts=None):
+    for request_id in request_ids:
+        yield {"event": "memo", "credit_request_id": request_id, "html_summary": "<p>memo</p>" * 200}
+    yield {"event": "done", "total": len(request_ids)}
+
+def test_batch_stream_is_not_gzipped(monkeypatch):
+    monkeypatch.setattr(routes, "run_memo_batch", _batch)
+    with TestClient(app) as client:
+        response = client.post(
+            "/generate-credit-memos/batch",
+            json={"request_ids": ["US-123456-0001", "US-123456-0002"]},
+            headers={"Accept-Encoding": "gzip"},
+        )
+    assert response.headers["content-encoding"] == "identity"
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["event"] for event in events] == ["memo", "memo", "done"]
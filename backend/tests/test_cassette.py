@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from app.agents import cassette as cassette_module
+from app.agents.cassette import Cassette, RecordingAgent, ReplayAgent
+from app.agents.fake_agent import FakeAgent, FakeModelError
+from app.agents.resilience import is_retryable
+from app.monitoring import extract_token_usage
+
+class OverloadedAgent:
+    name = "overloaded"
+
+    async def arun(self, prompt, **kwargs):
+        raise FakeModelError(529, "Overloaded")
+
+def test_record_then_replay_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(cassette_module, "LLM_CASSETTE_LATENCY_SCALE", 0.0)
+    path = str(tmp_path / "exchanges.jsonl")
+    recorder = Cassette(path, mode="record")
+    agent = RecordingAgent(FakeAgent("chat", latency="fixed:0", tokens_per_second=0, error_rate=0.0), recorder)
+    recorded = [asyncio.run(agent.arun("What is the DSCR?")), agent.run("Summarize the covenants")]
+    with pytest.raises(FakeModelError):
+        asyncio.run(RecordingAgent(OverloadedAgent(), recorder).arun("Anything"))
+    assert recorder.stats()["exchanges"] == {"chat": 2, "overloaded": 1}
+
+    replayer = Cassette(path, mode="replay", match="strict")
+    replay = ReplayAgent("chat", "fake", replayer)
+    replayed = [asyncio.run(replay.arun("What is the DSCR?")), replay.run("Summarize the covenants")]
+    assert [response.content for response in replayed] == [response.content for response in recorded]
+    assert [extract_token_usage(response)["output_tokens"] for response in replayed] == [
+        extract_token_usage(response)["output_tokens"] for response in recorded
+    ]
+
+    with pytest.raises(Exception) as error:
+        asyncio.run(ReplayAgent("overloaded", "fake", replayer).arun("Anything"))
+    assert type(error.value).__name__ == "FakeModelError" and error.value.status_code == 529
+    assert is_retryable(error.value)
+    with pytest.raises(cassette_module.CassetteMissError):
+        replay.run("Never recorded")
@@ -0,0 +1,49 @@
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from main import app
+
+async def _inputs(request_id):
+    return f"details for {request_id}", None, {}
+
+async def _reply(message, chat_id, session, request_ids, memo_ready):
+    return "memo_request", "Generating the memos."
+
+async def _fail(*args, **kwargs):
+    raise RuntimeError("provider returned malformed output")
+
+def test_memo_failures_send_an_error_frame(monkeypatch):
+    monkeypatch.setattr(routes, "load_credit_memo_inputs", _inputs)
+    monkeypatch.setattr(routes, "_reply_to_message", _reply)
+    monkeypatch.setattr(routes, "_generate_chat_memos", _fail)
+    monkeypatch.setattr(routes, "_generate_chat_memo", _fail)
+    with TestClient(app) as client, client.websocket_connect("/ws/chat/socket-test") as socket:
+        for message, request_ids in [
+            ("memos for US-123456-0001 and US-123456-0002", ["US-123456-0001", "US-123456-0002"]),
+            ("memo for US-123456-0003", ["US-123456-0003"]),
+        ]:
+            socket.send_json({"message": message, "clientId": "c1"})
+            events = [socket.receive_json() for _ in range(3)]
+            error = next(event for event in events if event["type"] == "error")
+            assert error["credit_request_ids"] == request_ids
+            assert error["detail"] == "Memo generation failed"
+
+def test_malformed_frame_keeps_the_connection(monkeypatch):
+    monkeypatch.setattr(routes, "_reply_to_message", _reply)
+    with TestClient(app) as client, client.websocket_connect("/ws/chat/socket-test") as socket:
+        socket.send_text("not json")
+        assert socket.receive_json() == {"type": "error", "detail": "invalid JSON"}
+        socket.send_json({"message": "hello", "clientId": "c2"})
+        events = [socket.receive_json() for _ in range(2)]
+        assert [event["type"] for event in events] == ["ack", "reply"]
+
+def test_failing_reply_sends_an_error_frame(monkeypatch):
+    monkeypatch.setattr(routes, "_reply_to_message", _fail)
+    with TestClient(app) as client, client.websocket_connect("/ws/chat/socket-test") as socket:
+        socket.send_json({"message": "hello", "clientId": "c3"})
+        ack, error = socket.receive_json(), socket.receive_json()
+        assert ack["type"] == "ack"
+        assert error == {"type": "error", "clientId": "c3", "detail": "Chat reply failed"}
+        monkeypatch.setattr(routes, "_reply_to_message", _reply)
+        socket.send_json({"message": "hello again", "clientId": "c4"})
+        assert [socket.receive_json()["type"] for _ in range(2)] == ["ack", "reply"]
@@ -0,0 +1,21 @@
+import asyncio
+
+from app.agents.fake_agent import FakeRunResponse
+from app.api import routes
+from app.memory import chat_sessions
+
+async def _inputs(request_id):
+    return f"details for {request_id}", None, {}
+
+def test_memo_token_usage_goes_to_the_chat_session(monkeypatch):
+    async def run_agent(agent, prompt, chat_id=None, request_id=None, session=None, **kwargs):
+        session["tokenUsage"] = {"input_tokens": 1200, "output_tokens": 3400}
+        return FakeRunResponse("<div>memo</div>", input_tokens=1200, output_tokens=3400)
+
+    monkeypatch.setattr(routes, "load_credit_memo_inputs", _inputs)
+    monkeypatch.setattr(routes, "find_reusable_memo", lambda request_id, data: None)
+    monkeypatch.setattr(routes, "index_memo_source", lambda request_id, data, html: None)
+    monkeypatch.setattr(routes, "run_agent", run_agent)
+    result = asyncio.run(routes._generate_credit_memo_for("US-123456-0042", "memo-usage-chat"))
+    assert result["memo_version"] == 1
+    assert chat_sessions["memo-usage-chat"]["tokenUsage"]["output_tokens"] == 3400
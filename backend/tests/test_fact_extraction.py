@@ -0,0 +1,15 @@
+from app.services.fact_extraction import extract_lending_facts
+
+def test_loan_term_needs_loan_context():
+    assert "loan_term_months" not in extract_lending_facts("She has worked there for 5 years.")
+    assert extract_lending_facts("Interest rate of 6.5% on a 30-year term.")["loan_term_months"] == 360
+    assert extract_lending_facts("Requested a term of 84 months.")["loan_term_months"] == 84
+
+def test_borrower_name_at_sentence_start():
+    assert extract_lending_facts("Borrower is John Smith, credit score 750.")["borrower_name"] == "John Smith"
+
+def test_borrower_name_with_upper_case_label():
+    assert extract_lending_facts("BORROWER: Maria Lopez")["borrower_name"] == "Maria Lopez"
+
+def test_borrower_name_in_sentence():
+    assert extract_lending_facts("The borrower is John Smith, income $85,000.")["borrower_name"] == "John Smith"
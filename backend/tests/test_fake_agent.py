@@ -0,0 +1,61 @@
+import asyncio
+import random
+
+import pytest
+
+from app.agents.fake_agent import FakeAgent, FakeModelError, _memo_rows, _render_memo, parse_latency_spec
+from app.services.credit_service import format_credit_request_details
+from app.services.memo_service import build_credit_memo_prompt
+from app.services.mock_data_service import get_mock_detailed_credit_request
+
+REQUEST_ID = "US-123456-7890"
+
+def memo_prompt(prompt_format: str) -> str:
+    data = get_mock_detailed_credit_request(f"{REQUEST_ID}-john").model_dump()
+    details = format_credit_request_details(REQUEST_ID, data, prompt_format)
+    return build_credit_memo_prompt(REQUEST_ID, details, prompt_format)
+
+def test_both_prompt_formats_render_the_same_fields():
+    verbose = _memo_rows(memo_prompt("verbose"))
+    compact = _memo_rows(memo_prompt("compact"))
+    assert [label for label, _ in compact] == [label for label, _ in verbose]
+    assert ("Name", "John Smith") in compact
+    assert len(compact) >= 20
+
+def test_compact_prompt_renders_a_full_memo():
+    html = _render_memo(memo_prompt("compact"))
+    assert "No data provided" not in html
+    assert f"Credit Memo {REQUEST_ID}" in html
+    assert "John Smith" in html
+
+def test_latency_specs():
+    rng = random.Random(1)
+    assert parse_latency_spec("fixed:0.4")(rng) == 0.4
+    assert all(0.2 <= parse_latency_spec("uniform:0.2,1.5")(rng) <= 1.5 for _ in range(100))
+    assert all(parse_latency_spec("normal:0.1,1")(rng) >= 0 for _ in range(100))
+    with pytest.raises(ValueError):
+        parse_latency_spec("pareto:1")
+
+def test_same_seed_gives_the_same_run():
+    def replies(seed):
+        agent = FakeAgent("chat", latency="uniform:0,0.001", error_rate=0.3, seed=seed)
+        outcomes = []
+        for _ in range(20):
+            try:
+                outcomes.append(agent.run("hello").content)
+            except FakeModelError as e:
+                outcomes.append(e.status_code)
+        return outcomes
+
+    assert replies(7) == replies(7)
+    assert any(isinstance(outcome, int) for outcome in replies(7))
+
+def test_streamed_memo_matches_the_full_response():
+    agent = FakeAgent("memo", response_kind="memo", latency="fixed:0")
+    prompt = memo_prompt("compact")
+    full = agent.run(prompt).content
+
+    async def stream():
+        return "".join([chunk.content async for chunk in await agent.arun(prompt, stream=True)])
+
+    assert asyncio.run(stream()) == full == "".join(chunk.content for chunk in agent.run(prompt, stream=True))
@@ -0,0 +1,29 @@
+import random
+
+from app.services.html_postprocessor import postprocess_memo_html
+
+STYLES = ["color: #1a365d; font-weight: 600", "margin: 0 0 8px", "padding: 4px 8px; border: 1px solid #e2e8f0", "color: red"]
+
+def test_style_used_twice_does_not_grow_the_memo():
+    html = '<div style="color: #1a365d; font-weight: 600">A</div><p style="color: #1a365d; font-weight: 600">B</p>'
+    result = postprocess_memo_html(html)
+    assert result.saved_bytes >= 0
+    assert 'style="' not in result.html or result.hoisted_styles == 0
+
+def test_repeated_styles_are_hoisted_everywhere():
+    html = "".join(f'<td class="cell" style="{STYLES[2]}">{i}</td>' for i in range(10))
+    result = postprocess_memo_html(f"```html\n<table><tr>{html}</tr></table>\n```")
+    assert result.hoisted_styles == 1 and result.fences_stripped == 2
+    assert "style=\"padding" not in result.html and result.html.count('class="cell lm-') == 10
+    assert result.saved_bytes > 0
+
+def test_output_is_never_larger_than_input():
+    rng = random.Random(7)
+    for _ in range(200):
+        tags = []
+        for _ in range(rng.randint(1, 12)):
+            style = rng.choice(STYLES)
+            class_attr = ' class="clickable-section"' if rng.random() < 0.5 else ""
+            tags.append(f'<span{class_attr} style="{style}" data-section="x">t</span>')
+        html = "<div>" + "".join(tags) + "</div>"
+        assert postprocess_memo_html(html).output_bytes <= len(html.encode("utf-8")), html
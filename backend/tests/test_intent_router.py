@@ -0,0 +1,27 @@
+from app.agents.intent_router import classify_intent, route_chat_message
+
+REQUEST_ID = "US-123456-7890"
+
+def test_memo_status_questions():
+    for message in ["Where is my memo?", "is the memo ready yet?", "has the summary been generated?", "did you generate the memo?"]:
+        assert classify_intent(message) == "memo_status", message
+
+def test_questions_about_memo_content_go_to_the_agent():
+    for message in [
+        "is the memo missing the collateral analysis?",
+        "has the summary considered the DSCR covenant",
+        "where is the risk section in the memo",
+    ]:
+        assert classify_intent(message) == "open_ended", message
+
+def test_memo_ready_only_when_the_session_has_the_memo():
+    with_memo = {"summaryData": {"creditRequestId": REQUEST_ID, "htmlSummary": "<div>memo</div>"}, "selectedRequestId": REQUEST_ID}
+    _, reply = route_chat_message("where is my memo?", with_memo)
+    assert "is ready" in reply
+
+    overwritten = {"summaryData": {"lastQuery": "thanks", "summaryGenerated": False}, "selectedRequestId": REQUEST_ID}
+    _, reply = route_chat_message("where is my memo?", overwritten)
+    assert "is ready" not in reply and REQUEST_ID in reply
+
+    _, reply = route_chat_message("where is my memo?", {"summaryData": {}})
+    assert "no memo" in reply
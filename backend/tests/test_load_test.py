@@ -0,0 +1,26 @@
+import random
+
+from benchmarks.load_test import compare_results, latency_summary, percentile, session_length
+
+def test_percentiles_use_the_nearest_rank():
+    values = [float(n) for n in range(1, 101)]
+    assert [percentile(values, pct) for pct in (50, 95, 99, 100)] == [50.0, 95.0, 99.0, 100.0]
+    assert percentile([], 50) == 0.0
+    summary = latency_summary([0.1, 0.2, 0.3], errors=1)
+    assert summary["count"] == 3 and summary["errors"] == 1 and summary["p50_ms"] == 200.0 and summary["max_ms"] == 300.0
+
+def test_session_lengths_are_capped_and_average_near_the_mean():
+    rng = random.Random(4)
+    lengths = [session_length(rng, 4) for _ in range(5000)]
+    assert max(lengths) <= 50
+    assert 2.5 < sum(lengths) / len(lengths) < 4.5
+
+def _run(rps: float, p95: float):
+    latency = {"p50_ms": 100.0, "p95_ms": p95, "p99_ms": 400.0}
+    return {"meta": {"commit": "abc"}, "scenarios": {"mixed": {"throughput_rps": rps, "latency": latency}}}
+
+def test_compare_flags_regressions_beyond_the_threshold():
+    baseline = _run(50.0, 200.0)
+    assert compare_results(_run(48.0, 210.0), baseline, fail_threshold=0.1)
+    assert not compare_results(_run(50.0, 260.0), baseline, fail_threshold=0.1)
+    assert not compare_results(_run(40.0, 200.0), baseline, fail_threshold=0.1)
@@ -0,0 +1,53 @@
+import random
+
+from app.memory.memo_archive import LOG_FILE, MemoArchive, apply_delta, make_delta
+
+def _memo(rng: random.Random, sections: int) -> str:
+    words = ["revenue", "DSCR", "collateral", "guarantor", "covenant", "LTV", "1.25x", "$4,200,000"]
+    return "".join(
+        f'<div class="section" data-section="s{i}"><h2>Section {i}</h2><p>{" ".join(rng.choice(words) for _ in range(12))}</p></div>'
+        for i in range(sections)
+    )
+
+def _edit(rng: random.Random, html: str) -> str:
+    position = rng.randrange(len(html))
+    return html[:position] + rng.choice(["", "<b>new</b>", "changed text"]) + html[position + rng.randint(0, 40):]
+
+def test_delta_round_trip():
+    rng = random.Random(3)
+    for _ in range(100):
+        base = _memo(rng, rng.randint(1, 6))
+        target = _edit(rng, _edit(rng, base))
+        assert apply_delta(base, make_delta(base, target)) == target
+    assert apply_delta("<p>a</p>", make_delta("<p>a</p>", "")) == ""
+
+def _versions(rng: random.Random, archive: MemoArchive):
+    html = _memo(rng, 8)
+    for version in range(6):
+        archive.put("US-123456-0001", html, chat_id="c1" if version == 1 else None)
+        html = _edit(rng, html)
+    archive.put("US-123456-0002", _memo(rng, 3))
+
+def test_compact_keeps_every_version_readable():
+    archive = MemoArchive(keep_full_versions=2)
+    _versions(random.Random(5), archive)
+    before = {entry["version"]: archive.get_version("US-123456-0001", entry["version"])["html"] for entry in archive.versions("US-123456-0001")}
+    stats = archive.compact()
+    # Six versions, the newest two and chat c1's memo stay full
+    assert stats["compacted_versions"] == 3 and stats["bytes_saved"] > 0
+    assert {version: archive.get_version("US-123456-0001", version)["html"] for version in before} == before
+
+def test_archive_survives_a_restart(tmp_path):
+    archive = MemoArchive(directory=str(tmp_path))
+    _versions(random.Random(9), archive)
+    archive.compact()
+    archive.put("US-123456-0002", "<p>revised</p>")
+    expected = {request_id: archive.versions(request_id) for request_id in ("US-123456-0001", "US-123456-0002")}
+    htmls = {entry["hash"]: archive.get_html(entry["hash"]) for history in expected.values() for entry in history}
+
+    with open(tmp_path / LOG_FILE, "ab") as f:
+        f.write(b"\x01\xff\xff")  # torn record from a crash mid-append
+    reopened = MemoArchive(directory=str(tmp_path))
+    assert {request_id: reopened.versions(request_id) for request_id in expected} == expected
+    assert {digest: reopened.get_html(digest) for digest in htmls} == htmls
+    assert reopened.size_stats()["delta_blobs"] == archive.size_stats()["delta_blobs"] > 0
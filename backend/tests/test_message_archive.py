@@ -0,0 +1,50 @@
+import importlib
+
+from app.memory import session_manager
+from app.memory.session_manager import archived_message_count, compact_session, get_session_messages
+
+archive_module = importlib.import_module("app.memory.message_archive")
+
+def _messages(count, start=0):
+    return [
+        {"id": f"m{i}", "sender": "user" if i % 2 == 0 else "agent", "text": f"message {i} about US-123456-{i:04d}", "timestamp": f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}"}
+        for i in range(start, start + count)
+    ]
+
+def _limits(monkeypatch, hot, min_batch, after_days=0):
+    monkeypatch.setattr(archive_module, "SESSION_HOT_MESSAGES", hot)
+    monkeypatch.setattr(archive_module, "SESSION_ARCHIVE_MIN_BATCH", min_batch)
+    monkeypatch.setattr(archive_module, "SESSION_ARCHIVE_AFTER_DAYS", after_days)
+
+def test_policy_waits_for_a_full_batch(monkeypatch):
+    _limits(monkeypatch, hot=10, min_batch=5)
+    assert archive_module.messages_to_archive(_messages(14)) == 0
+    assert archive_module.messages_to_archive(_messages(15)) == 5
+    _limits(monkeypatch, hot=100, min_batch=1, after_days=1)
+    assert archive_module.messages_to_archive(_messages(3)) == 3
+
+def test_paging_reads_back_across_the_cold_boundary(monkeypatch, tmp_path):
+    _limits(monkeypatch, hot=4, min_batch=3)
+    monkeypatch.setattr(session_manager, "message_archive", archive_module.MessageArchive(str(tmp_path)))
+    session = {"messages": _messages(8)}
+    assert compact_session(session) == 4
+    session["messages"].extend(_messages(3, start=8))
+    assert compact_session(session) == 3
+
+    assert archived_message_count(session) == 7 and len(session["messages"]) == 4
+    assert [ref["first"] for ref in session["archivedMessages"]] == [0, 4]
+    digest = session["archiveDigest"]
+    assert (digest["userMessages"], digest["agentMessages"]) == (4, 3)
+    assert digest["requestIds"][0] == "US-123456-0000"
+
+    page, first = get_session_messages(session, before=9, limit=6)
+    assert first == 3
+    assert [message["id"] for message in page] == [f"m{i}" for i in range(3, 9)]
+    page, first = get_session_messages(session)
+    assert first == 0 and [message["id"] for message in page] == [f"m{i}" for i in range(11)]
+    assert (tmp_path / archive_module.COLD_FILE).stat().st_size > 0
+
+def test_stored_chunks_survive_a_new_archive(tmp_path):
+    ref = archive_module.MessageArchive(str(tmp_path)).put(_messages(5), 0)
+    reopened = archive_module.MessageArchive(str(tmp_path))
+    assert [message["id"] for message in reopened.get(ref)] == [f"m{i}" for i in range(5)]
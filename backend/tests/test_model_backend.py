@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+from app.agents import model_backend
+from app.agents.fake_agent import FakeAgent
+from app.agents.model_backend import LazyAgent, create_agent, get_agent_variant
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_agent_is_built_once_on_first_use(monkeypatch):
+    monkeypatch.setattr(model_backend, "LLM_BACKEND", "fake")
+    agent = create_agent("test-lazy-agent", "Tester", ["Answer briefly"], tier="fast")
+    assert isinstance(agent, LazyAgent) and agent.name == "test-lazy-agent"
+    assert not any(name == "test-lazy-agent" for name, _ in model_backend._agent_variants)
+
+    assert agent.model_id.startswith("fake:")
+    built = get_agent_variant(agent, "fast")
+    assert isinstance(built, FakeAgent)
+    assert get_agent_variant(agent, "fast") is built
+    assert get_agent_variant(agent, "strong") is not built
+    assert set(model_backend.get_agent_registry_stats()["agents"]["test-lazy-agent"]["built"]) == {
+        built.model_id.split(":", 1)[1],
+        get_agent_variant(agent, "strong").model_id.split(":", 1)[1],
+    }
+
+def test_importing_the_app_does_not_load_the_llm_client():
+    code = "import sys, main; print('agno' in sys.modules, 'anthropic' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == "False False"
@@ -0,0 +1,39 @@
+from app.agents import model_tiers
+from app.agents.model_tiers import TierRouter, faster_tier, lookup_route, parse_route_table
+
+def test_most_specific_route_wins():
+    table = parse_route_table("memo=strong, /generate-summary=fast,/chat:memo=claude-x,broken")
+    assert lookup_route(table, "/chat", "memo") == "claude-x"
+    assert lookup_route(table, "/generate-summary", "memo") == "fast"
+    assert lookup_route(table, "/other", "memo") == "strong"
+    assert lookup_route(table, "/other", "chat") is None
+    assert faster_tier("strong") == "fast"
+    assert faster_tier("fast") is None
+    assert faster_tier("claude-x") == "fast"
+
+def test_slo_breach_falls_back_then_recovers(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(model_tiers.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(model_tiers, "LLM_LATENCY_SLOS", {"memo": "60"})
+    monkeypatch.setattr(model_tiers, "LLM_TIER_ROUTES", {})
+    monkeypatch.setattr(model_tiers, "LLM_SLO_MIN_SAMPLES", 3)
+    monkeypatch.setattr(model_tiers, "LLM_SLO_FALLBACK_SECONDS", 300)
+    router = TierRouter()
+
+    for seconds in (30, 90, 90):
+        assert router.select("/chat", "summary", "memo", "strong") == "strong"
+        router.observe("/chat", "summary", "memo", "strong", seconds)
+    assert router.select("/chat", "summary", "memo", "strong") == "fast"
+    assert router.select("/generate-summary", "summary", "memo", "strong") == "strong"
+    assert router.snapshot()["active_fallbacks"][0]["serving_tier"] == "fast"
+
+    now[0] += 300
+    assert router.select("/chat", "summary", "memo", "strong") == "strong"
+    assert router.snapshot()["active_fallbacks"] == []
+
+def test_fastest_tier_has_nowhere_to_fall_back(monkeypatch):
+    monkeypatch.setattr(model_tiers, "LLM_LATENCY_SLOS", {"chat": "1"})
+    monkeypatch.setattr(model_tiers, "LLM_SLO_MIN_SAMPLES", 1)
+    router = TierRouter()
+    router.observe("/chat", "chat", "chat", "fast", 5)
+    assert router.select("/chat", "chat", "chat", "fast") == "fast"
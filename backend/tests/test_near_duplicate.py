@@ -0,0 +1,53 @@
+import copy
+
+from app.services.near_duplicate import NearDuplicateIndex, credit_file_fields
+
+CREDIT_FILE = {
+    "request_id": "US-123456-0001",
+    "created_date": "2024-01-15",
+    "status": "Under Review",
+    "client": {"name": "Northwind Traders", "industry": "Wholesale distribution", "annual_revenue": 48000000},
+    "facility": {"type": "Revolving credit facility", "amount": 5000000, "term_months": 36, "interest_rate": 7.25},
+    "purpose": "Working capital to fund seasonal inventory build ahead of the holiday season",
+    "collateral": ["Accounts receivable", "Inventory"],
+    "covenants": ["Minimum DSCR of 1.25x", "Maximum leverage of 3.0x"],
+    "guarantors": ["Jane Smith"],
+}
+
+def test_identifiers_and_dates_are_ignored():
+    fields = credit_file_fields(CREDIT_FILE)
+    assert "request_id" not in fields and "created_date" not in fields
+    assert fields["facility.amount"] == "5e+06"
+    assert fields["collateral"] == "accounts receivable | inventory"
+
+def test_same_file_under_a_new_id_is_reusable():
+    index = NearDuplicateIndex()
+    index.add("US-123456-0001", CREDIT_FILE, "hash-1")
+    resubmitted = {**copy.deepcopy(CREDIT_FILE), "request_id": "US-123456-0002", "created_date": "2024-03-01"}
+    match = index.find(resubmitted)
+    assert match.request_id == "US-123456-0001" and match.memo_hash == "hash-1"
+    assert match.similarity == 1.0 and match.reusable
+
+def test_small_change_reports_the_affected_field():
+    index = NearDuplicateIndex(threshold=0.5)
+    index.add("US-123456-0001", CREDIT_FILE, "hash-1")
+    changed = copy.deepcopy(CREDIT_FILE)
+    changed["guarantors"] = ["John Doe"]
+    match = index.find(changed)
+    assert not match.reusable
+    assert [change["field"] for change in match.changed_fields] == ["guarantors"]
+    assert match.changed_sections == ["Client Background"]
+
+def test_unrelated_file_and_removed_entries_do_not_match():
+    index = NearDuplicateIndex()
+    index.add("US-123456-0001", CREDIT_FILE, "hash-1")
+    unrelated = {
+        "status": "Approved",
+        "client": {"name": "Contoso Dairy", "industry": "Agriculture", "annual_revenue": 2100000},
+        "facility": {"type": "Equipment loan", "amount": 350000, "term_months": 84, "interest_rate": 9.1},
+        "purpose": "Purchase of milking equipment",
+    }
+    assert index.find(unrelated) is None
+    index.remove("US-123456-0001")
+    assert index.find(CREDIT_FILE) is None
+    assert index.stats()["indexed_files"] == 0 and index.stats()["buckets"] == 0
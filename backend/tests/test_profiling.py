@@ -0,0 +1,59 @@
+import asyncio
+import importlib
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+profiling = importlib.import_module("app.monitoring.profiling")
+
+TOKEN = "test-profile-token"
+
+def _headers(*pairs):
+    return {"headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in pairs]}
+
+def test_only_the_admin_token_selects_a_request(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_ADMIN_TOKEN", TOKEN)
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0)
+    profiler = profiling.RequestProfiler()
+    assert profiler.select(_headers(("x-profile", TOKEN))) == ("header", "sampling")
+    assert profiler.select(_headers(("x-profile", TOKEN), ("x-profile-mode", "cProfile"))) == ("header", "cprofile")
+    assert profiler.select(_headers(("x-profile", "wrong"))) is None
+    assert profiler.select(_headers()) is None
+    monkeypatch.setattr(profiling, "PROFILE_ADMIN_TOKEN", "")
+    assert not profiler.is_admin("")
+
+def test_profiled_request_stores_collapsed_stacks(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_ADMIN_TOKEN", TOKEN)
+    monkeypatch.setattr(profiling, "PROFILE_PATHS", {"/slow"})
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_INTERVAL_MS", 1)
+    monkeypatch.setattr(profiling, "request_profiler", profiling.RequestProfiler(str(tmp_path)))
+
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    app.add_middleware(profiling.RequestProfilingMiddleware)
+    client = TestClient(app)
+    assert "x-profile-id" not in client.get("/slow").headers
+    response = client.get("/slow", headers={"X-Profile": TOKEN})
+    profile_id = response.headers["x-profile-id"]
+
+    reopened = profiling.RequestProfiler(str(tmp_path))
+    metadata, data = reopened.get(profile_id)
+    assert (metadata["endpoint"], metadata["status"], metadata["format"]) == ("/slow", 200, "folded")
+    assert metadata["samples"] > 0
+    assert b"[waiting]" in data
+
+def test_admin_endpoints_need_the_token(monkeypatch):
+    from main import app
+
+    client = TestClient(app)
+    monkeypatch.setattr(profiling, "PROFILE_ADMIN_TOKEN", "")
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": ""}).status_code == 403
+    monkeypatch.setattr(profiling, "PROFILE_ADMIN_TOKEN", TOKEN)
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": TOKEN}).status_code == 200
+    assert client.get("/admin/profiles/missing", headers={"X-Admin-Token": TOKEN}).status_code == 404
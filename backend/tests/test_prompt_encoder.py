@@ -0,0 +1,19 @@
+from app.services.credit_service import format_credit_request_details
+from app.services.mock_data_service import get_mock_detailed_credit_request
+from app.services.prompt_encoder import encode_credit_request_compact
+
+REQUEST_ID = "US-123456-7890"
+
+def _data(interest_rate: float):
+    data = get_mock_detailed_credit_request(f"{REQUEST_ID}-john").model_dump()
+    data["pricing"]["interest_rate"] = interest_rate
+    return data
+
+def test_interest_rate_is_read_in_percent_whatever_its_size():
+    assert "rate 0.75%" in encode_credit_request_compact(REQUEST_ID, _data(0.75))
+    assert "rate 6.50%" in encode_credit_request_compact(REQUEST_ID, _data(6.5))
+
+def test_both_formats_state_the_same_rate():
+    data = _data(6.5)
+    assert "Interest Rate: 6.50%" in format_credit_request_details(REQUEST_ID, data, "verbose")
+    assert "rate 6.50%" in format_credit_request_details(REQUEST_ID, data, "compact")
@@ -0,0 +1,23 @@
+import asyncio
+
+from app.services.request_ids import extract_request_ids, gather_limited
+
+def test_ids_in_order_of_first_mention_without_duplicates():
+    text = "Compare US-123456-0002 with US-123456-0001, then US-123456-0002 again; ignore XUS-123456-00031"
+    assert extract_request_ids(text) == ["US-123456-0002", "US-123456-0001"]
+    assert extract_request_ids("no ids here") == []
+
+def test_gather_limited_caps_concurrency_and_keeps_order():
+    running = []
+    peak = []
+
+    async def worker(item):
+        running.append(item)
+        peak.append(len(running))
+        await asyncio.sleep(0.01 * (5 - item))
+        running.remove(item)
+        return item * 10
+
+    results = asyncio.run(gather_limited([1, 2, 3, 4], worker, limit=2))
+    assert results == [10, 20, 30, 40]
+    assert max(peak) == 2
@@ -0,0 +1,114 @@
+import asyncio
+
+from app.agents import resilience
+from app.agents.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    FallbackResponse,
+    call_with_resilience,
+    hedged_call,
+    is_retryable,
+)
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+class _Response:
+    def __init__(self, content):
+        self.content = content
+
+def test_only_transient_errors_are_retryable():
+    assert is_retryable(asyncio.TimeoutError())
+    assert is_retryable(_StatusError(529))
+    assert is_retryable(type("APIConnectionError", (Exception,), {})())
+    assert not is_retryable(_StatusError(400))
+    assert not is_retryable(ValueError("bad prompt"))
+
+def test_circuit_opens_then_lets_one_probe_through(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test-breaker", failure_threshold=2, reset_seconds=10)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    now[0] += 10
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+def test_retries_then_serves_the_cached_answer(monkeypatch):
+    monkeypatch.setattr(resilience, "LLM_RETRY_BACKOFF_SECONDS", 0)
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) == 2:
+            return _Response("fresh answer")
+        raise _StatusError(503)
+
+    async def down():
+        raise _StatusError(503)
+
+    async def scenario():
+        response = await call_with_resilience("test-cache-agent", "prompt", flaky, max_attempts=3)
+        assert response.content == "fresh answer" and len(calls) == 2
+        fallback = await call_with_resilience("test-cache-agent", "prompt", down, max_attempts=2)
+        assert isinstance(fallback, FallbackResponse)
+        assert (fallback.source, fallback.content) == ("cache", "fresh answer")
+
+    asyncio.run(scenario())
+
+def test_open_circuit_serves_the_template_without_calling(monkeypatch):
+    monkeypatch.setattr(resilience, "LLM_RETRY_BACKOFF_SECONDS", 0)
+    breaker = resilience.get_circuit_breaker("test-open-agent")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    async def never():
+        raise AssertionError("the model should not be called while the circuit is open")
+
+    async def scenario():
+        fallback = await call_with_resilience("test-open-agent", "prompt", never, fallback_content="template")
+        assert fallback.source == "template"
+        try:
+            await call_with_resilience("test-open-agent", "prompt", never)
+        except CircuitOpenError as e:
+            assert e.retry_after >= 1
+        else:
+            raise AssertionError("expected CircuitOpenError")
+
+    asyncio.run(scenario())
+
+def test_non_retryable_errors_are_raised_at_once():
+    calls = []
+
+    async def bad_request():
+        calls.append(1)
+        raise _StatusError(400)
+
+    try:
+        asyncio.run(call_with_resilience("test-bad-request-agent", "prompt", bad_request, fallback_content="template"))
+    except _StatusError:
+        pass
+    else:
+        raise AssertionError("expected the 400 to propagate")
+    assert len(calls) == 1
+
+def test_hedge_answers_when_the_primary_stalls():
+    started = []
+    released = []
+
+    async def call():
+        started.append(1)
+        await asyncio.sleep(1 if len(started) == 1 else 0)
+        return _Response(f"call {len(started)}")
+
+    response = asyncio.run(
+        hedged_call(call, timeout=2, hedge_after=0.01, try_reserve_hedge=lambda: True, release_hedge=lambda: released.append(1))
+    )
+    assert response.content == "call 2"
+    assert released == [1]
@@ -0,0 +1,107 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAVE = """
+from app.memory import update_chat_session
+update_chat_session("c1", [{"id": "m1", "role": "user", "text": "Borrower relocating to Denver", "timestamp": "2026-01-01T00:00:00"}])
+"""
+SEARCH = """
+from app.memory import chat_sessions, search_index
+print("c1" in chat_sessions, search_index.search("Denver")["total"])
+"""
+
+def _run(code: str, store_dir: str) -> str:
+    env = {**os.environ, "SESSION_STORE_DIR": store_dir, "PYTHONPATH": BACKEND_DIR}
+    env.pop("SEARCH_INDEX_PATH", None)
+    return subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True).stdout
+
+def test_sessions_stay_searchable_after_a_restart(tmp_path):
+    _run(SAVE, str(tmp_path))
+    assert _run(SEARCH, str(tmp_path)).strip().splitlines()[-1] == "True 1"
+
+def test_combined_memo_is_indexed_with_every_request_id():
+    from app.memory import search_index, update_chat_session
+
+    update_chat_session("combined-memo", [], {
+        "htmlSummary": "<h2>US-123456-0001</h2><p>Kestrel Orchards</p><h2>US-123456-0002</h2><p>Harbor Freight</p>",
+        "creditRequestIds": ["US-123456-0001", "US-123456-0002"],
+    })
+    results = search_index.search("Kestrel", kind="memo")["results"]
+    assert [result["chatId"] for result in results] == ["combined-memo"]
+    assert results[0]["credit_request_ids"] == ["US-123456-0001", "US-123456-0002"]
+
+def test_added_request_id_formats_are_indexed(monkeypatch):
+    import re
+
+    from app.memory import search_index, update_chat_session
+    from app.services import request_ids
+
+    monkeypatch.setattr(request_ids, "REQUEST_ID_SCANNER", re.compile(r"\b(?:US-\d{6}-\d{4}|CA-\d{8})\b"))
+    update_chat_session("new-format", [{"id": "m1", "role": "user", "text": "Status of CA-20260001?", "timestamp": ""}])
+    results = search_index.search("CA-20260001", kind="message")["results"]
+    assert [(result["chatId"], result["credit_request_ids"]) for result in results] == [("new-format", ["CA-20260001"])]
+
+def _message(number: int, text: str):
+    return {"id": f"m{number}", "role": "user", "text": text, "timestamp": f"2026-01-01T00:00:{number:02d}"}
+
+def _rows(index, chat_id: str, kind: str):
+    return index._db.execute("SELECT ref, body FROM documents WHERE chat_id = ? AND kind = ? ORDER BY rowid", (chat_id, kind)).fetchall()
+
+def test_only_new_messages_are_indexed():
+    from app.memory.search_index import SearchIndex
+
+    index = SearchIndex(":memory:")
+    session = {"messages": [_message(1, "Appraisal for the Denver warehouse")]}
+    index.index_session("c1", session)
+    session["messages"].append(_message(2, "Updated rent roll"))
+    index.index_session("c1", session)
+    index.index_session("c1", session)
+    assert [ref for ref, _ in _rows(index, "c1", "message")] == ["m1", "m2"]
+
+    # A history that shrank was replaced, not appended to: it is reindexed
+    index.index_session("c1", {"messages": [_message(3, "Fresh start")]})
+    assert [ref for ref, _ in _rows(index, "c1", "message")] == ["m3"]
+
+def test_memo_is_replaced_only_when_its_key_changes():
+    from app.memory.search_index import SearchIndex
+
+    index = SearchIndex(":memory:")
+    loads = []
+
+    def loader(text):
+        return lambda: loads.append(text) or text
+
+    session = {"messages": [], "summaryData": {"creditRequestId": "US-123456-0001", "borrowerName": "Kestrel Orchards"}}
+    index.index_session("c1", session, "hash-1", loader("first memo"))
+    index.index_session("c1", session, "hash-1", loader("never loaded"))
+    index.index_session("c1", session, "hash-2", loader("second memo"))
+    assert loads == ["first memo", "second memo"]
+    assert _rows(index, "c1", "memo") == [("hash-2", "second memo")]
+    result = index.search("US-123456-0001")["results"][0]
+    assert result["credit_request_ids"] == ["US-123456-0001"] and result["borrower"] == "Kestrel Orchards"
+
+def test_match_query_quotes_request_ids_and_punctuation():
+    from app.memory.search_index import build_match_query
+
+    assert build_match_query("US-123456-7890") == '"US-123456-7890"*'
+    assert build_match_query('DSCR: 1.25x "covenant" OR (NOT)') == '"DSCR" "1" "25x" "covenant" "OR" "NOT"*'
+    assert build_match_query("?!") is None
+
+def test_search_pages_through_ranked_results():
+    from app.memory.search_index import SearchIndex
+
+    index = SearchIndex(":memory:")
+    for chat in range(5):
+        index.index_session(f"c{chat}", {"messages": [_message(n, f"collateral review {n}") for n in range(chat + 1)]})
+    first = index.search("collateral", limit=10)
+    assert first["total"] == 15 and len(first["results"]) == 10
+    second = index.search("collateral", limit=10, offset=10)
+    assert len(second["results"]) == 5
+    refs = {(r["chatId"], r["ref"]) for r in first["results"]} | {(r["chatId"], r["ref"]) for r in second["results"]}
+    assert len(refs) == 15
+    scores = [r["score"] for r in first["results"] + second["results"]]
+    assert scores == sorted(scores, reverse=True)
+    assert index.search("collateral", limit=1000)["limit"] == 100
@@ -0,0 +1,32 @@
+import importlib
+
+from app.memory.session_store import SessionStore
+
+# app.memory re-exports the store instance under the module's name
+store_module = importlib.import_module("app.memory.session_store")
+
+def _session(turn: int):
+    return {
+        "messages": [{"role": "user", "content": f"turn {i} " + "x" * 200} for i in range(turn)],
+        "updated_at": f"2026-01-01T00:00:{turn:02d}",
+    }
+
+def test_compaction_keeps_latest_records_and_bounds_the_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_module, "SESSION_LOG_COMPACT_MIN_BYTES", 0)
+    store = SessionStore(str(tmp_path), checkpoint_records=1000)
+    for turn in range(1, 30):
+        for chat in range(5):
+            store.save(f"chat-{chat}", _session(turn))
+    grown = store.stats()["log_bytes"]
+    store.checkpoint()
+    stats = store.stats()
+    assert stats["compactions"] == 1 and stats["log_generation"] == 1
+    assert stats["log_bytes"] == stats["live_bytes"] < grown / 2
+
+    store.save("chat-0", _session(30))
+    store.close()
+    reopened = SessionStore(str(tmp_path))
+    assert len(reopened.load("chat-0")["messages"]) == 30
+    assert len(reopened.load("chat-4")["messages"]) == 29
+    assert sorted(name for name in tmp_path.iterdir() if "sessions" in name.name and name.suffix == ".log") == [tmp_path / "sessions.1.log"]
+    reopened.close()
@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+
+from app.monitoring.metrics import Histogram
+from app.monitoring.timing import format_server_timing
+from main import app
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_timing_histogram_seconds", "Test histogram", ["stage"], buckets=[0.1, 1.0])
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, stage="llm")
+    lines = histogram.render()
+    assert 'test_timing_histogram_seconds_bucket{stage="llm",le="0.1"} 1' in lines
+    assert 'test_timing_histogram_seconds_bucket{stage="llm",le="1"} 3' in lines
+    assert 'test_timing_histogram_seconds_bucket{stage="llm",le="+Inf"} 4' in lines
+    assert 'test_timing_histogram_seconds_count{stage="llm"} 4' in lines
+
+def test_server_timing_sums_repeated_stages():
+    header = format_server_timing([("summary_llm", 0.5), ("credit_fetch", 0.02), ("summary_llm", 0.25)], 0.8)
+    assert header == "summary_llm;dur=750.0, credit_fetch;dur=20.0, total;dur=800.0"
+
+def test_requests_carry_server_timing_and_reach_metrics():
+    with TestClient(app) as client:
+        response = client.get("/memos/stats")
+        assert "total;dur=" in response.headers["server-timing"]
+        metrics = client.get("/metrics").text
+    assert 'agentic_lender_requests_total{method="GET",endpoint="/memos/stats",status="200"}' in metrics
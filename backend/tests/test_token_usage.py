@@ -0,0 +1,26 @@
+from types import SimpleNamespace
+
+from app.monitoring.token_usage import TokenUsageStore, estimate_cost_usd, extract_token_usage
+
+def test_extract_token_usage_sums_per_call_lists():
+    response = SimpleNamespace(metrics={"input_tokens": [100, 50], "output_tokens": [20, None], "cached_tokens": [30]})
+    usage = extract_token_usage(response)
+    assert usage == {"input_tokens": 150, "output_tokens": 20, "cache_read_tokens": 30, "cache_write_tokens": 0}
+    assert extract_token_usage(SimpleNamespace(metrics=None))["input_tokens"] == 0
+
+def test_cost_uses_base_model_pricing():
+    usage = {"input_tokens": 1_000_000, "output_tokens": 1_000_000, "cache_read_tokens": 0, "cache_write_tokens": 0}
+    assert estimate_cost_usd("claude-3-5-sonnet-20241022", usage) == 18.0
+    assert estimate_cost_usd("fake:claude-3-5-sonnet-20241022", usage) == 18.0
+    assert estimate_cost_usd("some-other-model", usage) == 0.0
+
+def test_store_aggregates_and_bounds_sessions():
+    store = TokenUsageStore(max_keys=2)
+    usage = {"input_tokens": 1000, "output_tokens": 500, "cache_read_tokens": 0, "cache_write_tokens": 0}
+    for chat_id in ("a", "b", "c"):
+        store.record(usage, "claude-3-haiku", "/chat", "credit_agent", chat_id=chat_id, request_id="US-123456-0001")
+    snapshot = store.snapshot()
+    assert snapshot["total"]["calls"] == 3
+    assert snapshot["by_endpoint"]["/chat"]["input_tokens"] == 3000
+    assert sorted(s["id"] for s in snapshot["top_sessions"]) == ["b", "c"]
+    assert snapshot["top_request_ids"][0]["calls"] == 3
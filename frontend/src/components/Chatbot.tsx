@@ -125,7 +125,8 @@ const Chatbot: React.FC<ChatbotProps> = ({
 				// If HTML summary is included in the response, add it to summary data
 				if (data.html_summary) {
 					summaryData.htmlSummary = data.html_summary;
-					summaryData.creditRequestId = data.credit_request_id;
+					// Messages with several request IDs get one combined memo
+					summaryData.creditRequestId = data.credit_request_ids?.join(', ') ?? data.credit_request_id;
 					summaryData.summaryGenerated = data.summary_generated;
 				}
 